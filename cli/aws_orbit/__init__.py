@@ -13,11 +13,18 @@
 #    limitations under the License.
 
 import os
-
-import pkg_resources
+import sys
 
 from aws_orbit.__metadata__ import __description__, __license__, __title__  # noqa
 
-__version__: str = pkg_resources.get_distribution(__title__).version
+# pkg_resources scans every installed distribution when imported, importlib.metadata only reads ours
+if sys.version_info >= (3, 8):
+    from importlib.metadata import version as _distribution_version
+
+    __version__: str = _distribution_version(__title__)
+else:
+    import pkg_resources
+
+    __version__ = pkg_resources.get_distribution(__title__).version
 
 ORBIT_CLI_ROOT = os.path.dirname(os.path.abspath(__file__))
@@ -20,14 +20,6 @@ from typing import List, Optional, TextIO, Tuple, cast
 
 import click
 
-from aws_orbit.commands import deploy as deploy_commands
-from aws_orbit.commands import destroy as destroy_commands
-from aws_orbit.commands.build import build_podsetting
-from aws_orbit.commands.delete import delete_image, delete_podsetting
-from aws_orbit.commands.init import init
-from aws_orbit.commands.list import list_env, list_images
-from aws_orbit.utils import print_dir
-
 DEBUG_LOGGING_FORMAT = "[%(asctime)s][%(filename)-13s:%(lineno)3d] %(message)s"
 DEBUG_LOGGING_FORMAT_REMOTE = "[%(filename)-13s:%(lineno)3d] %(message)s"
 _logger: logging.Logger = logging.getLogger(__name__)
@@ -86,6 +78,8 @@ def init_cli(
     _logger.debug("name: %s", name)
     _logger.debug("region: %s", region)
     _logger.debug("debug: %s", debug)
+    from aws_orbit.commands.init import init
+
     init(name=name, region=region, debug=debug)
 
 
@@ -118,6 +112,8 @@ def deploy_toolkit(
         enable_debug(format=DEBUG_LOGGING_FORMAT)
     filename = filename if filename[0] in (".", "/") else f"./{filename}"
     _logger.debug("filename: %s", filename)
+    from aws_orbit.commands import deploy as deploy_commands
+
     deploy_commands.deploy_toolkit(
         filename=filename,
         debug=debug,
@@ -158,6 +154,8 @@ def deploy_credentials(
     _logger.debug("filename: %s", filename)
     _logger.debug("username: %s", username)
     _logger.debug("registry: %s", registry)
+    from aws_orbit.commands import deploy as deploy_commands
+
     deploy_commands.deploy_credentials(
         filename=filename,
         username=username,
@@ -174,6 +172,14 @@ def deploy_credentials(
     type=str,
     help="The target Orbit Workbench manifest file (yaml).",
 )
+@click.option(
+    "--parallelism",
+    "-p",
+    type=int,
+    default=4,
+    help="Number of teams deployed concurrently.",
+    show_default=True,
+)
 @click.option(
     "--debug/--no-debug",
     default=False,
@@ -182,6 +188,7 @@ def deploy_credentials(
 )
 def deploy_teams(
     filename: str,
+    parallelism: int,
     debug: bool,
 ) -> None:
     """Deploy a Orbit Workbench environment based on a manisfest file (yaml)."""
@@ -189,9 +196,12 @@ def deploy_teams(
         enable_debug(format=DEBUG_LOGGING_FORMAT)
     filename = filename if filename[0] in (".", "/") else f"./{filename}"
     _logger.debug("filename: %s", filename)
+    from aws_orbit.commands import deploy as deploy_commands
+
     deploy_commands.deploy_teams(
         filename=filename,
         debug=debug,
+        parallelism=parallelism,
     )
 
 
@@ -218,6 +228,8 @@ def deploy_env(
         enable_debug(format=DEBUG_LOGGING_FORMAT)
     filename = filename if filename[0] in (".", "/") else f"./{filename}"
     _logger.debug("filename: %s", filename)
+    from aws_orbit.commands import deploy as deploy_commands
+
     deploy_commands.deploy_env(
         filename=filename,
         debug=debug,
@@ -298,6 +310,8 @@ def deploy_foundation(
     _logger.debug("custom_domain_name: %s", custom_domain_name)
     _logger.debug("max_availability_zones: %s", max_availability_zones)
     _logger.debug("role_prefix: %s", role_prefix)
+    from aws_orbit.commands import deploy as deploy_commands
+
     deploy_commands.deploy_foundation(
         filename=filename,
         name=name,
@@ -325,17 +339,27 @@ def deploy_foundation(
     help="The name of ONE image to build- MUST match dir in 'images/', else ALL built",
     required=False,
 )
+@click.option(
+    "--parallelism",
+    "-p",
+    type=int,
+    default=4,
+    help="Number of images built concurrently.",
+    show_default=True,
+)
 @click.option(
     "--debug/--no-debug",
     default=False,
     help="Enable detailed logging.",
     show_default=True,
 )
-def deploy_images(filename: str, debug: bool, image: str) -> None:
+def deploy_images(filename: str, debug: bool, image: str, parallelism: int) -> None:
     """Deploy Orbit Workbench images based on a manifest file (yaml)."""
     if debug:
         enable_debug(format=DEBUG_LOGGING_FORMAT)
-    deploy_commands.deploy_images(filename=filename, debug=debug, reqested_image=image)
+    from aws_orbit.commands import deploy as deploy_commands
+
+    deploy_commands.deploy_images(filename=filename, debug=debug, reqested_image=image, parallelism=parallelism)
 
 
 @click.group(name="destroy")
@@ -357,6 +381,8 @@ def destroy_teams(env: str, debug: bool) -> None:
     if debug:
         enable_debug(format=DEBUG_LOGGING_FORMAT)
     _logger.debug("env: %s", env)
+    from aws_orbit.commands import destroy as destroy_commands
+
     destroy_commands.destroy_teams(env=env, debug=debug)
 
 
@@ -379,6 +405,8 @@ def destroy_env(env: str, preserve_credentials: bool, debug: bool) -> None:
     if debug:
         enable_debug(format=DEBUG_LOGGING_FORMAT)
     _logger.debug("env: %s", env)
+    from aws_orbit.commands import destroy as destroy_commands
+
     destroy_commands.destroy_env(env=env, preserve_credentials=preserve_credentials, debug=debug)
 
 
@@ -395,6 +423,8 @@ def destroy_foundation(name: str, debug: bool) -> None:
     if debug:
         enable_debug(format=DEBUG_LOGGING_FORMAT)
     _logger.debug("name: %s", name)
+    from aws_orbit.commands import destroy as destroy_commands
+
     destroy_commands.destroy_foundation(env=name, debug=debug)
 
 
@@ -413,6 +443,8 @@ def destroy_credentials(env: str, registry: str, debug: bool) -> None:
         enable_debug(format=DEBUG_LOGGING_FORMAT)
     _logger.debug("env: %s", env)
     _logger.debug("registry: %s", registry)
+    from aws_orbit.commands import destroy as destroy_commands
+
     destroy_commands.destroy_credentials(env=env, registry=registry, debug=debug)
 
 
@@ -429,6 +461,8 @@ def destroy_images(env: str, debug: bool) -> None:
     if debug:
         enable_debug(format=DEBUG_LOGGING_FORMAT)
     _logger.debug("env: %s", env)
+    from aws_orbit.commands import destroy as destroy_commands
+
     destroy_commands.destroy_images(env=env)
 
 
@@ -445,6 +479,8 @@ def destroy_toolkit(env: str, debug: bool) -> None:
     if debug:
         enable_debug(format=DEBUG_LOGGING_FORMAT)
     _logger.debug("env: %s", env)
+    from aws_orbit.commands import destroy as destroy_commands
+
     destroy_commands.destroy_toolkit(env=env, debug=debug)
 
 
@@ -501,6 +537,8 @@ def deploy_image_cli(
     _logger.debug("build_arg: %s", build_arg)
     _logger.debug("debug: %s", debug)
 
+    from aws_orbit.commands import deploy as deploy_commands
+
     deploy_commands.deploy_user_image(
         path=dir, image_name=name, env=env, timeout=cast(int, timeout), script=script, build_args=build_arg, debug=debug
     )
@@ -540,6 +578,8 @@ def add_podsetting_cli(env: str, team: str, debug: bool, podsetting: TextIO) ->
     _logger.debug("podsetting: %s", podsetting_str)
     _logger.debug("debug: %s", debug)
     try:
+        from aws_orbit.commands.build import build_podsetting
+
         build_podsetting(env_name=env, team_name=team, podsetting=podsetting_str, debug=debug)
     except ImportError:
         raise click.ClickException('The "utils" submodule is required to use "run" commands')
@@ -581,6 +621,8 @@ def delete_podsetting_cli(team: str, podsetting: str, debug: bool) -> None:
     _logger.debug("team: %s", team)
     _logger.debug("podsetting: %s", podsetting)
     _logger.debug("debug: %s", debug)
+    from aws_orbit.commands.delete import delete_podsetting
+
     delete_podsetting(namespace=team, podsetting_name=podsetting, debug=debug)
 
 
@@ -600,6 +642,8 @@ def delete_image_cli(env: str, name: str, debug: bool) -> None:
     _logger.debug("env: %s", env)
     _logger.debug("name: %s", name)
     _logger.debug("debug: %s", debug)
+    from aws_orbit.commands.delete import delete_image
+
     delete_image(name=name, env=env, debug=debug)
 
 
@@ -643,6 +687,8 @@ def list_images_cli(env: str, region: Optional[str], debug: bool) -> None:
     """List all Docker images available into the target environment."""
     if debug:
         enable_debug(format=DEBUG_LOGGING_FORMAT)
+    from aws_orbit.commands.list import list_images
+
     list_images(env=env, region=region)
 
 
@@ -664,6 +710,8 @@ def list_env_cli(debug: bool, env: str, variable: str) -> None:
     """List all Docker images available into the target environment."""
     if debug:
         enable_debug(format=DEBUG_LOGGING_FORMAT)
+    from aws_orbit.commands.list import list_env
+
     list_env(env, variable)
 
 
@@ -676,6 +724,8 @@ def remote_cli(command: str, args: Tuple[str]) -> None:
     from aws_orbit.remote_files import REMOTE_FUNC_TYPE, RemoteCommands
 
     _logger.debug("Remote bundle structure:")
+    from aws_orbit.utils import print_dir
+
     print_dir(os.getcwd(), exclude=["__pycache__", "cdk", ".venv", ".mypy_cache"])
     remote_func: REMOTE_FUNC_TYPE = getattr(RemoteCommands, command)
     remote_func(args)
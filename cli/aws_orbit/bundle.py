@@ -13,16 +13,20 @@
 #    limitations under the License.
 
 import glob
+import hashlib
 import logging
 import os
 import shutil
+import stat
 from pprint import pformat
-from typing import List, Optional, Tuple
+from typing import Any, List, Optional, Tuple
 
 from aws_orbit.models.context import Context
 
 _logger: logging.Logger = logging.getLogger(__name__)
 
+_READ_BUFFER_SIZE = 1024 * 1024
+
 
 def _is_valid_image_file(file_path: str) -> bool:
     for word in ("/node_modules/", "/build/", "/.mypy_cache/", ".egg-info", "__pycache__"):
@@ -86,3 +90,26 @@ def generate_bundle(
 
     shutil.make_archive(base_name=bundle_dir, format="zip", root_dir=remote_dir, base_dir="bundle")
     return bundle_dir + ".zip"
+
+
+def _hash_dir(digest: Any, dir: str, name: str) -> None:
+    absolute_dir = os.path.realpath(dir)
+    files: List[str] = sorted(_list_files(path=absolute_dir))
+    if len(files) == 0:
+        raise ValueError(f"{name} ({absolute_dir}) is empty!")
+    for file in files:
+        arcname = "/".join(["bundle", name] + os.path.relpath(file, absolute_dir).split(os.sep))
+        mode = 0o755 if os.stat(file).st_mode & stat.S_IXUSR else 0o644
+        digest.update(f"{arcname}\0{mode:o}\0".encode("utf-8"))
+        with open(file, "rb") as src:
+            for chunk in iter(lambda: src.read(_READ_BUFFER_SIZE), b""):
+                digest.update(chunk)
+        digest.update(b"\0")
+
+
+def hash_dirs(dirs: List[Tuple[str, str]]) -> str:
+    """sha256 of the paths, modes and contents of the files generate_bundle would bundle from ``dirs``"""
+    digest = hashlib.sha256()
+    for dir, name in sorted(dirs, key=lambda d: d[1]):
+        _hash_dir(digest=digest, dir=dir, name=name)
+    return digest.hexdigest()
@@ -16,7 +16,7 @@ import logging
 import os
 from typing import List, TypeVar
 
-from aws_orbit import sh
+from aws_orbit import sh, tracing
 from aws_orbit.models.context import Context, FoundationContext
 from aws_orbit.services import cfn
 
@@ -46,7 +46,8 @@ def deploy(context: T, stack_name: str, app_filename: str, args: List[str]) -> N
         f"{get_app_argument(app_filename, args)} "
         f"{get_output_argument(context, stack_name)}"
     )
-    sh.run(cmd=cmd)
+    with tracing.span(f"cdk deploy {stack_name}"):
+        sh.run(cmd=cmd)
 
 
 def destroy(context: T, stack_name: str, app_filename: str, args: List[str]) -> None:
@@ -61,7 +62,8 @@ def destroy(context: T, stack_name: str, app_filename: str, args: List[str]) ->
         f"{get_app_argument(app_filename, args)} "
         f"{get_output_argument(context, stack_name)}"
     )
-    sh.run(cmd=cmd)
+    with tracing.span(f"cdk destroy {stack_name}"):
+        sh.run(cmd=cmd)
 
 
 def deploy_toolkit(context: T) -> None:
@@ -73,4 +75,5 @@ def deploy_toolkit(context: T) -> None:
         f"{get_output_argument(context, context.cdk_toolkit.stack_name)} "
         f"aws://{context.account_id}/{context.region}"
     )
-    sh.run(cmd=cmd)
+    with tracing.span("cdk bootstrap"):
+        sh.run(cmd=cmd)
@@ -12,7 +12,7 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 
-import concurrent.futures
+import functools
 import logging
 import pprint
 import re
@@ -23,6 +23,7 @@ import botocore.exceptions
 
 from aws_orbit import sh
 from aws_orbit.models.context import Context, FoundationContext
+from aws_orbit.remote_files.teardown_scheduler import TeardownPlan
 from aws_orbit.remote_files.utils import get_k8s_context
 from aws_orbit.services import cfn, efs, eks, elb, s3
 from aws_orbit.utils import boto3_client, boto3_resource
@@ -37,47 +38,49 @@ def _detach_network_interface(nid: int, network_interface: Any) -> None:
     network_interface.reload()
 
 
-def _network_interface(vpc_id: str) -> None:
-    client = boto3_client("ec2")
+def _delete_network_interface(network_interface_id: str) -> None:
     ec2 = boto3_resource("ec2")
-    for i in client.describe_network_interfaces(Filters=[{"Name": "vpc-id", "Values": [vpc_id]}])["NetworkInterfaces"]:
-        try:
-            network_interface = ec2.NetworkInterface(i["NetworkInterfaceId"])
-            if "Interface for NAT Gateway" not in network_interface.description:
-                _logger.debug(f"Forgotten NetworkInterface: {i['NetworkInterfaceId']}.")
-                if network_interface.attachment is not None and network_interface.attachment["Status"] == "attached":
-                    attempts: int = 0
-                    while network_interface.attachment is None or network_interface.attachment["Status"] != "detached":
-                        if attempts >= 10:
-                            _logger.debug(
-                                f"Ignoring NetworkInterface: {i['NetworkInterfaceId']} after 10 detach attempts."
-                            )
-                            break
-                        _detach_network_interface(i["NetworkInterfaceId"], network_interface)
-                        attempts += 1
-                        time.sleep(3)
-                    else:
-                        network_interface.delete()
-                        _logger.debug(f"NetWorkInterface {i['NetworkInterfaceId']} deleted.")
-        except botocore.exceptions.ClientError as ex:
-            error: Dict[str, Any] = ex.response["Error"]
-            if "is currently in use" in error["Message"]:
-                _logger.warning(f"Ignoring NetWorkInterface {i['NetworkInterfaceId']} because it stills in use.")
-            elif "does not exist" in error["Message"]:
-                _logger.warning(
-                    f"Ignoring NetWorkInterface {i['NetworkInterfaceId']} because it does not exist anymore."
-                )
-            elif "You are not allowed to manage" in error["Message"]:
-                _logger.warning(
-                    f"Ignoring NetWorkInterface {i['NetworkInterfaceId']} because you are not allowed to manage."
-                )
-            elif "You do not have permission to access the specified resource" in error["Message"]:
-                _logger.warning(
-                    f"Ignoring NetWorkInterface {i['NetworkInterfaceId']} "
-                    "because you do not have permission to access the specified resource."
-                )
+    try:
+        network_interface = ec2.NetworkInterface(network_interface_id)
+        if network_interface.attachment is not None and network_interface.attachment["Status"] == "attached":
+            attempts: int = 0
+            while network_interface.attachment is None or network_interface.attachment["Status"] != "detached":
+                if attempts >= 10:
+                    _logger.debug(f"Ignoring NetworkInterface: {network_interface_id} after 10 detach attempts.")
+                    break
+                _detach_network_interface(network_interface_id, network_interface)
+                attempts += 1
+                time.sleep(3)
             else:
-                raise
+                network_interface.delete()
+                _logger.debug(f"NetWorkInterface {network_interface_id} deleted.")
+    except botocore.exceptions.ClientError as ex:
+        error: Dict[str, Any] = ex.response["Error"]
+        if "is currently in use" in error["Message"]:
+            raise
+        elif "does not exist" in error["Message"]:
+            _logger.warning(f"Ignoring NetWorkInterface {network_interface_id} because it does not exist anymore.")
+        elif "You are not allowed to manage" in error["Message"]:
+            _logger.warning(f"Ignoring NetWorkInterface {network_interface_id} because you are not allowed to manage.")
+        elif "You do not have permission to access the specified resource" in error["Message"]:
+            _logger.warning(
+                f"Ignoring NetWorkInterface {network_interface_id} "
+                "because you do not have permission to access the specified resource."
+            )
+        else:
+            raise
+
+
+def _network_interfaces(vpc_id: str) -> List[str]:
+    client = boto3_client("ec2")
+    paginator = client.get_paginator("describe_network_interfaces")
+    network_interface_ids: List[str] = []
+    for page in paginator.paginate(Filters=[{"Name": "vpc-id", "Values": [vpc_id]}]):
+        for i in page["NetworkInterfaces"]:
+            if "Interface for NAT Gateway" not in i.get("Description", ""):
+                _logger.debug(f"Forgotten NetworkInterface: {i['NetworkInterfaceId']}.")
+                network_interface_ids.append(i["NetworkInterfaceId"])
+    return network_interface_ids
 
 
 def delete_sec_group(sec_group: str) -> None:
@@ -86,35 +89,25 @@ def delete_sec_group(sec_group: str) -> None:
         sgroup = ec2.SecurityGroup(sec_group)
         if sgroup.ip_permissions:
             sgroup.revoke_ingress(IpPermissions=sgroup.ip_permissions)
-        try:
-            sgroup.delete()
-        except botocore.exceptions.ClientError as ex:
-            error: Dict[str, Any] = ex.response["Error"]
-            if f"resource {sec_group} has a dependent object" not in error["Message"]:
-                raise
-            time.sleep(60)
-            _logger.warning(f"Waiting 60 seconds to have {sec_group} free of dependents.")
-            sgroup.delete()
+        sgroup.delete()
     except botocore.exceptions.ClientError as ex:
-        error = ex.response["Error"]
-        if f"The security group '{sec_group}' does not exist" not in error["Message"]:
+        error: Dict[str, Any] = ex.response["Error"]
+        if error["Code"] == "InvalidGroup.NotFound" or "does not exist" in error["Message"]:
             _logger.warning(f"Ignoring security group {sec_group} because it does not exist anymore.")
-        elif f"resource {sec_group} has a dependent object" not in error["Message"]:
-            _logger.warning(f"Ignoring security group {sec_group} because it has a dependent object")
         else:
+            # Dependent objects are retried by the teardown plan
             raise
 
 
-def _security_group(vpc_id: str) -> None:
+def _security_groups(vpc_id: str) -> List[str]:
     client = boto3_client("ec2")
-    sec_groups: List[str] = [
+    paginator = client.get_paginator("describe_security_groups")
+    return [
         s["GroupId"]
-        for s in client.describe_security_groups()["SecurityGroups"]
-        if s["VpcId"] == vpc_id and s["GroupName"] != "default"
+        for page in paginator.paginate(Filters=[{"Name": "vpc-id", "Values": [vpc_id]}])
+        for s in page["SecurityGroups"]
+        if s["GroupName"] != "default"
     ]
-    if sec_groups:
-        with concurrent.futures.ThreadPoolExecutor(max_workers=len(sec_groups)) as executor:
-            list(executor.map(delete_sec_group, sec_groups))
 
 
 def _endpoints(vpc_id: str) -> None:
@@ -133,32 +126,54 @@ def _endpoints(vpc_id: str) -> None:
             _logger.debug("resp:\n%s", pprint.pformat(resp))
 
 
+def _plan_remaining_dependencies(plan: TeardownPlan, env_name: str, vpc_id: Optional[str]) -> None:
+    # Mount targets, load balancers and endpoints own network interfaces, all of them hold on to security groups
+    owners: List[str] = []
+    for fs_id in efs.fetch_env_filesystems(env_name=env_name):
+        owners.append(plan.add(f"efs {fs_id}", functools.partial(efs.delete_filesystem, fs_id=fs_id)))
+    if vpc_id is None:
+        return
+    for lb in elb.describe_load_balancers(env_name=env_name):
+        name = lb["LoadBalancerName"]
+        owners.append(plan.add(f"elb {name}", functools.partial(elb.delete_load_balancer, name=name)))
+    owners.append(plan.add(f"vpc-endpoints {vpc_id}", functools.partial(_endpoints, vpc_id=vpc_id)))
+    network_interfaces = [
+        plan.add(f"eni {i}", functools.partial(_delete_network_interface, network_interface_id=i), after=owners)
+        for i in _network_interfaces(vpc_id=vpc_id)
+    ]
+    for sec_group in _security_groups(vpc_id=vpc_id):
+        plan.add(
+            f"security-group {sec_group}",
+            functools.partial(delete_sec_group, sec_group=sec_group),
+            after=owners + network_interfaces,
+        )
+
+
+def _delete_scratch_bucket(bucket: str) -> None:
+    try:
+        s3.delete_bucket(bucket=bucket)
+    except Exception as ex:
+        _logger.debug("Skipping Team Scratch Bucket deletion. Cause: %s", ex)
+
+
 def foundation_remaining_dependencies(context: "FoundationContext", vpc_id: Optional[str] = None) -> None:
-    efs.delete_env_filesystems(env_name=context.name)
+    plan = TeardownPlan(name=f"{context.name} foundation")
     if context.scratch_bucket_arn:
         scratch_bucket: str = context.scratch_bucket_arn.split(":::")[1]
-        try:
-            s3.delete_bucket(bucket=scratch_bucket)
-        except Exception as ex:
-            _logger.debug("Skipping Team Scratch Bucket deletion. Cause: %s", ex)
+        plan.add(f"s3 {scratch_bucket}", functools.partial(_delete_scratch_bucket, bucket=scratch_bucket))
     if vpc_id is None:
         if context.networking.vpc_id is None:
             _logger.debug("Skipping _cleanup_remaining_dependencies() because manifest.vpc.vpc_id is None!")
-            return None
         vpc_id = context.networking.vpc_id
-    elb.delete_load_balancers(env_name=context.name)
-    _endpoints(vpc_id=vpc_id)
-    _network_interface(vpc_id=vpc_id)
-    _security_group(vpc_id=vpc_id)
+    _plan_remaining_dependencies(plan=plan, env_name=context.name, vpc_id=vpc_id)
+    # Leftovers are reported, deleting the stacks afterwards fails on anything really stuck
+    plan.run(raise_on_error=False)
 
 
 def foundation_remaining_dependencies_contextless(env_name: str, vpc_id: Optional[str] = None) -> None:
-    efs.delete_env_filesystems(env_name=env_name)
-    if vpc_id:
-        elb.delete_load_balancers(env_name=env_name)
-        _endpoints(vpc_id=vpc_id)
-        _network_interface(vpc_id=vpc_id)
-        _security_group(vpc_id=vpc_id)
+    plan = TeardownPlan(name=f"{env_name} foundation")
+    _plan_remaining_dependencies(plan=plan, env_name=env_name, vpc_id=vpc_id)
+    plan.run(raise_on_error=False)
 
 
 def delete_cert_from_iam(context: "FoundationContext") -> None:
@@ -223,43 +238,55 @@ def delete_kubeflow_roles(env_stack_name: str, region: str, account_id: str) ->
                 _logger.error(f"Service error: {err}")
 
 
+def _delete_alb(elb_client: Any, arn: str) -> None:
+    try:
+        _logger.info(f"Removing ELB: {arn}")
+        elb_client.delete_load_balancer(LoadBalancerArn=arn)
+        _logger.info("ELB deleted")
+    except elb_client.exceptions.LoadBalancerNotFoundException as err:
+        _logger.warning(f"ELB not found: {err}")
+    except elb_client.exceptions.OperationNotPermittedException as err:
+        _logger.error(err)
+
+
+def _delete_target_group(elb_client: Any, arn: str) -> None:
+    _logger.info(f"Removing target group: {arn}")
+    try:
+        elb_client.delete_target_group(TargetGroupArn=arn)
+    except elb_client.exceptions.TargetGroupNotFoundException as err:
+        _logger.warning(f"Target group not found: {err}")
+        return
+    _logger.info("Target group deleted")
+
+
 # Removes ELB since the listener is attached to the target group
 # and the target group can't be removed with a listener attached
 def delete_target_group(cluster_name: str) -> None:
     elb_client = boto3_client("elbv2")
+    target_groups: List[Dict[str, Any]] = [
+        tg for page in elb_client.get_paginator("describe_target_groups").paginate() for tg in page["TargetGroups"]
+    ]
 
-    target_groups = elb_client.describe_target_groups()
-
-    for target_group in target_groups.get("TargetGroups", []):
-        target_group_arn = target_group.get("TargetGroupArn")
-
-        target_group_tags = elb_client.describe_tags(ResourceArns=[target_group_arn])
-
-        for tag in target_group_tags.get("TagDescriptions", [{}])[0].get("Tags", []):
-            if tag.get("Key") == "ingress.k8s.aws/cluster":
-                if tag.get("Value") == cluster_name:
-                    elbs = target_group.get("LoadBalancerArns")
-
-                    for _elb in elbs:
-                        try:
-                            _logger.info(f"Removing ELB: {_elb}")
-                            elb_client.delete_load_balancer(LoadBalancerArn=_elb)
-                            time.sleep(10)
-                            _logger.info("ELB deleted")
-                        except elb_client.exceptions.LoadBalancerNotFoundException as err:
-                            _logger.warning(f"ELB not found: {err}")
-                        except elb_client.exceptions.OperationNotPermittedException as err:
-                            _logger.error(err)
-                        except elb_client.exceptions.ResourceInUseException as err:
-                            _logger.error(f"Resource in use: {err}")
-
-                    target_group_name = target_group.get("Name")
-                    try:
-                        _logger.info(f"Removing target group: {target_group_name}")
-                        elb_client.delete_target_group(TargetGroupArn=target_group_arn)
-                        _logger.info("Target group deleted")
-                    except elb_client.exceptions.ResourceInUseException as err:
-                        _logger.error(f"Target in use: {err}")
+    plan = TeardownPlan(name=f"{cluster_name} target groups")
+    # DescribeTags takes at most 20 resources
+    for i in range(0, len(target_groups), 20):
+        chunk = {tg["TargetGroupArn"]: tg for tg in target_groups[i : i + 20]}
+        for description in elb_client.describe_tags(ResourceArns=list(chunk.keys())).get("TagDescriptions", []):
+            tags = {tag.get("Key"): tag.get("Value") for tag in description.get("Tags", [])}
+            if tags.get("ingress.k8s.aws/cluster") != cluster_name:
+                continue
+            target_group = chunk[description["ResourceArn"]]
+            elbs: List[str] = []
+            for arn in target_group.get("LoadBalancerArns", []):
+                if f"alb {arn}" not in plan.resources:
+                    plan.add(f"alb {arn}", functools.partial(_delete_alb, elb_client=elb_client, arn=arn))
+                elbs.append(f"alb {arn}")
+            plan.add(
+                f"target-group {target_group.get('TargetGroupName')}",
+                functools.partial(_delete_target_group, elb_client=elb_client, arn=target_group["TargetGroupArn"]),
+                after=elbs,
+            )
+    plan.run(raise_on_error=False)
 
 
 def delete_elb_security_group(cluster_name: str) -> None:
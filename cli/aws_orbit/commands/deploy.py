@@ -19,7 +19,7 @@ import random
 import string
 from typing import List, Optional, cast
 
-from aws_orbit import toolkit
+from aws_orbit import toolkit, tracing
 from aws_orbit.messages import MessagesContext, stylize
 from aws_orbit.models.changeset import Changeset, dump_changeset_to_str, extract_changeset
 from aws_orbit.models.context import Context, ContextSerDe, FoundationContext
@@ -41,6 +41,7 @@ from aws_orbit.utils import get_account_id, get_region
 _logger: logging.Logger = logging.getLogger(__name__)
 
 
+@tracing.traced()
 def _deploy_toolkit(
     context: "Context",
     top_level: str = "orbit",
@@ -126,7 +127,7 @@ def deploy_foundation(
     max_availability_zones: Optional[int] = None,
     role_prefix: Optional[str] = None,
 ) -> None:
-    with MessagesContext("Deploying", debug=debug) as msg_ctx:
+    with MessagesContext("Deploying", debug=debug) as msg_ctx, tracing.trace_run(name="deploy-foundation") as trace:
         msg_ctx.progress(2)
 
         if filename:
@@ -161,6 +162,7 @@ def deploy_foundation(
 
         ManifestSerDe.dump_manifest_to_ssm(manifest=manifest)
         msg_ctx.info(f"Manifest loaded: {manifest.name}")
+        trace.env_name = manifest.name
         msg_ctx.progress(3)
 
         context: FoundationContext = ContextSerDe.load_context_from_manifest(manifest=manifest)
@@ -184,11 +186,12 @@ def deploy_env(
     filename: str,
     debug: bool,
 ) -> None:
-    with MessagesContext("Deploying", debug=debug) as msg_ctx:
+    with MessagesContext("Deploying", debug=debug) as msg_ctx, tracing.trace_run(name="deploy-env") as trace:
         msg_ctx.progress(2)
 
         manifest: "Manifest" = ManifestSerDe.load_manifest_from_file(filename=filename, type=Manifest)
         msg_ctx.info(f"Manifest loaded: {filename}")
+        trace.env_name = manifest.name
         msg_ctx.progress(5)
 
         manifest_dir: str = os.path.dirname(os.path.abspath(filename))
@@ -239,12 +242,14 @@ def deploy_env(
 def deploy_teams(
     filename: str,
     debug: bool,
+    parallelism: int = 4,
 ) -> None:
-    with MessagesContext("Deploying", debug=debug) as msg_ctx:
+    with MessagesContext("Deploying", debug=debug) as msg_ctx, tracing.trace_run(name="deploy-teams") as trace:
         msg_ctx.progress(2)
 
         manifest: "Manifest" = ManifestSerDe.load_manifest_from_file(filename=filename, type=Manifest)
         msg_ctx.info(f"Manifest loaded: {filename}")
+        trace.env_name = manifest.name
         msg_ctx.info(f"Teams: {','.join([t.name for t in manifest.teams])}")
         msg_ctx.progress(5)
 
@@ -270,6 +275,7 @@ def deploy_teams(
         deploy.deploy_teams(
             env_name=context.name,
             manifest_dir=manifest_dir,
+            parallelism=parallelism,
         )
 
         msg_ctx.info("Orbit Workbench deployed")
@@ -291,7 +297,7 @@ def deploy_teams(
         msg_ctx.progress(100)
 
 
-def deploy_images(debug: bool, filename: str, reqested_image: Optional[str] = None) -> None:
+def deploy_images(debug: bool, filename: str, reqested_image: Optional[str] = None, parallelism: int = 4) -> None:
     with MessagesContext("Deploying", debug=debug) as msg_ctx:
         msg_ctx.progress(2)
 
@@ -305,7 +311,7 @@ def deploy_images(debug: bool, filename: str, reqested_image: Optional[str] = No
             return
         env = manifest.name
         msg_ctx.info(f"Deploying images for env {env}")
-        deploy.deploy_images_remotely(env=env, requested_image=reqested_image)
+        deploy.deploy_images_remotely(env=env, requested_image=reqested_image, parallelism=parallelism)
         msg_ctx.progress(95)
         msg_ctx.progress(100)
 
@@ -14,6 +14,7 @@
 
 import logging
 import os
+import shutil
 from typing import List, Optional, TypeVar
 
 from aws_orbit import exceptions, sh, utils
@@ -25,6 +26,11 @@ _logger: logging.Logger = logging.getLogger(__name__)
 
 T = TypeVar("T")
 
+BUILDER_NAME = "orbit"
+BUILD_CACHE_TAG = "buildcache"
+# Docker data is only pruned once the disk holding it is fuller than this (percent)
+PRUNE_THRESHOLD = int(os.environ.get("AWS_ORBIT_DOCKER_PRUNE_THRESHOLD", "80"))
+
 
 def login(context: T) -> None:
     # leaving this method to support legacy build process
@@ -78,12 +84,74 @@ def build(
     pull_str: str = "--pull" if pull else ""
     build_args_str = " ".join([f"--build-arg {ba}" for ba in build_args]) if build_args else ""
     if use_cache:
-        try:
-            ecr_pull(name=repo_address, tag=tag)
-            cache_str = f"--cache-from {repo_address_tag}"
-        except exceptions.FailedShellCommand:
-            _logger.debug(f"Docker cache not found at ECR {name}:{tag}")
-    sh.run(f"docker build {pull_str} {cache_str} {build_args_str} --tag {name}:{tag} .", cwd=dir)
+        # BuildKit reads the inline cache metadata and only pulls the layers it reuses
+        cache_str = f"--cache-from {repo_address_tag}"
+    # Embed the cache metadata in the pushed image for the next build
+    sh.run(
+        f"docker build {pull_str} {cache_str} {build_args_str} --build-arg BUILDKIT_INLINE_CACHE=1 "
+        f"--tag {name}:{tag} .",
+        cwd=dir,
+        env={"DOCKER_BUILDKIT": "1"},
+    )
+
+
+def buildx_available() -> bool:
+    try:
+        sh.run("docker buildx version")
+    except exceptions.FailedShellCommand:
+        return False
+    return True
+
+
+def _ensure_builder() -> None:
+    # The default docker driver cannot export a registry cache, a docker-container builder can
+    try:
+        sh.run(f"docker buildx inspect {BUILDER_NAME}")
+    except exceptions.FailedShellCommand:
+        sh.run(f"docker buildx create --name {BUILDER_NAME} --driver docker-container")
+
+
+def build_and_push(
+    account_id: str,
+    region: str,
+    dir: str,
+    name: str,
+    tag: str = "latest",
+    use_cache: bool = True,
+    pull: bool = False,
+    build_args: Optional[List[str]] = None,
+) -> None:
+    """Build with BuildKit and push straight to ECR, sharing a layer cache through the ``buildcache`` tag of the repo.
+
+    With ``use_cache=False`` the cache is not read but still refreshed for the next build.
+    """
+    ecr_address = f"{account_id}.dkr.ecr.{region}.amazonaws.com"
+    repo_address = f"{ecr_address}/{name}"
+    cache_ref = f"type=registry,ref={repo_address}:{BUILD_CACHE_TAG}"
+    cache_from_str = f"--cache-from {cache_ref}" if use_cache else ""
+    cache_to_str = f"--cache-to {cache_ref},mode=max,image-manifest=true,oci-mediatypes=true"
+    pull_str: str = "--pull" if pull else ""
+    build_args_str = " ".join([f"--build-arg {ba}" for ba in build_args]) if build_args else ""
+    _ensure_builder()
+    sh.run(
+        f"docker buildx build --builder {BUILDER_NAME} {pull_str} {cache_from_str} {cache_to_str} {build_args_str} "
+        f"--tag {repo_address}:{tag} --push .",
+        cwd=dir,
+    )
+
+
+def prune_if_low_on_disk(path: str = "/var/lib/docker") -> None:
+    usage = shutil.disk_usage(path if os.path.exists(path) else "/")
+    used = usage.used * 100 / usage.total
+    if used < PRUNE_THRESHOLD:
+        _logger.debug("Docker disk usage %.0f%% below %s%%, not pruning", used, PRUNE_THRESHOLD)
+        return
+    _logger.info("Docker disk usage %.0f%%, pruning", used)
+    sh.run(cmd="docker system prune --all --force --volumes")
+    try:
+        sh.run(cmd=f"docker buildx prune --builder {BUILDER_NAME} --all --force")
+    except exceptions.FailedShellCommand:
+        _logger.debug("No %s builder to prune", BUILDER_NAME)
 
 
 def push(account_id: str, region: str, name: str, tag: str = "latest") -> None:
@@ -123,8 +191,9 @@ def deploy_image_from_source(
     tag: str = "latest",
     use_cache: bool = True,
     build_args: Optional[List[str]] = None,
+    extra_tags: Optional[List[str]] = None,
 ) -> None:
-    _logger.debug(f"deploy_image_from_source {dir} {name} {env} {tag} {build_args}")
+    _logger.debug(f"deploy_image_from_source {dir} {name} {env} {tag} {build_args} {extra_tags}")
     if not os.path.exists(dir):
         bundle_dir = os.path.join("bundle", dir)
         if os.path.exists(bundle_dir):
@@ -133,20 +202,36 @@ def deploy_image_from_source(
     region = utils.get_region()
     build_args = [] if build_args is None else build_args
     _logger.debug("Building docker image from %s", os.path.abspath(dir))
-    sh.run(cmd="docker system prune --all --force --volumes")
+    prune_if_low_on_disk()
     update_docker_file(account_id=account_id, region=region, env=env, tag=tag, dir=dir)
-    build(
-        account_id=account_id,
-        region=region,
-        dir=dir,
-        name=name,
-        tag=tag,
-        use_cache=use_cache,
-        pull=True,
-        build_args=build_args,
-    )
-    _logger.debug("Docker Image built")
-    tag_image(account_id=account_id, region=region, name=name, tag=tag)
-    _logger.debug("Docker Image tagged")
-    push(account_id=account_id, region=region, name=name, tag=tag)
-    _logger.debug("Docker Image pushed")
+    if buildx_available():
+        build_and_push(
+            account_id=account_id,
+            region=region,
+            dir=dir,
+            name=name,
+            tag=tag,
+            use_cache=use_cache,
+            pull=True,
+            build_args=build_args,
+        )
+        _logger.debug("Docker Image built and pushed")
+    else:
+        build(
+            account_id=account_id,
+            region=region,
+            dir=dir,
+            name=name,
+            tag=tag,
+            use_cache=use_cache,
+            pull=True,
+            build_args=build_args,
+        )
+        _logger.debug("Docker Image built")
+        tag_image(account_id=account_id, region=region, name=name, tag=tag)
+        _logger.debug("Docker Image tagged")
+        push(account_id=account_id, region=region, name=name, tag=tag)
+        _logger.debug("Docker Image pushed")
+    for extra_tag in extra_tags or []:
+        ecr.tag_image(repository_name=name, source_tag=tag, tag=extra_tag)
+        _logger.debug("Docker Image tagged %s", extra_tag)
@@ -1,12 +1,72 @@
+import concurrent.futures
+import datetime
+import json
 import logging
+import os
+import threading
 import time
-from typing import Any, Dict, List, cast
+from typing import Any, Callable, Dict, Iterable, List, Optional, cast
 
-from kubernetes import config
-from kubernetes.client import AppsV1Api, CoreV1Api, NetworkingV1beta1Api, NetworkingV1beta1IngressList, V1Service
+import yaml
+from dataclasses import dataclass
+from kubernetes import config, watch
+from kubernetes.client import (
+    ApiClient,
+    ApiextensionsV1Api,
+    AppsV1Api,
+    CoreV1Api,
+    NetworkingV1beta1Api,
+    NetworkingV1beta1IngressList,
+    V1Service,
+)
+from kubernetes.dynamic import DynamicClient
+
+from aws_orbit import sh
 
 _logger: logging.Logger = logging.getLogger(__name__)
 
+FIELD_MANAGER = "orbit"
+# Managers of the fields set by client-side ``kubectl apply``, the way these manifests were applied before
+CLIENT_SIDE_APPLY_MANAGERS = ("kubectl-client-side-apply", "before-first-apply")
+LAST_APPLIED_ANNOTATION = "kubectl.kubernetes.io/last-applied-configuration"
+APPLY_PARALLELISM = 8
+ROLLOUT_TIMEOUT = 1200
+ENDPOINTS_TIMEOUT = 600
+WATCH_TIMEOUT = 60
+
+# Kinds other objects depend on are applied first, kinds missing here (custom resources, webhook configurations) last
+APPLY_ORDER = [
+    "Namespace",
+    "NetworkPolicy",
+    "ResourceQuota",
+    "LimitRange",
+    "PodSecurityPolicy",
+    "PodDisruptionBudget",
+    "ServiceAccount",
+    "Secret",
+    "ConfigMap",
+    "StorageClass",
+    "PersistentVolume",
+    "PersistentVolumeClaim",
+    "CustomResourceDefinition",
+    "ClusterRole",
+    "ClusterRoleBinding",
+    "Role",
+    "RoleBinding",
+    "Service",
+    "DaemonSet",
+    "Pod",
+    "ReplicationController",
+    "ReplicaSet",
+    "Deployment",
+    "HorizontalPodAutoscaler",
+    "StatefulSet",
+    "Job",
+    "CronJob",
+    "Ingress",
+    "APIService",
+]
+
 
 def get_service_hostname(name: str, k8s_context: str, namespace: str = "default") -> str:
     config.load_kube_config(context=k8s_context)
@@ -106,6 +166,316 @@ def get_resource_status(name: str, k8s_context: str, type: str, namespace: str =
     return cast(Dict[str, Any], resource.get("status"))
 
 
+@dataclass(frozen=True)
+class ResourceRef:
+    kind: str
+    name: str
+    namespace: Optional[str] = None
+
+    def __str__(self) -> str:
+        return f"{self.kind} {self.namespace}/{self.name}" if self.namespace else f"{self.kind} {self.name}"
+
+
+def _new_client(k8s_context: str) -> ApiClient:
+    # A new client per call picks up a fresh token from the kubeconfig exec plugin, EKS tokens expire after 15 minutes
+    client = config.new_client_from_config(context=k8s_context)
+    client.rest_client.pool_manager.connection_pool_kw["maxsize"] = APPLY_PARALLELISM
+    return cast(ApiClient, client)
+
+
+def read_manifests(path: str, kustomization: bool = False) -> List[Dict[str, Any]]:
+    """Documents ``kubectl apply -f`` (or ``-k``) would read from ``path``, with List kinds flattened"""
+    if kustomization:
+        contents = [sh.run_capturing(f"kubectl kustomize {path}")]
+    else:
+        files = (
+            [os.path.join(path, f) for f in sorted(os.listdir(path)) if f.endswith((".yaml", ".yml", ".json"))]
+            if os.path.isdir(path)
+            else [path]
+        )
+        contents = []
+        for file in files:
+            with open(file, "r") as f:
+                contents.append(f.read())
+    documents: List[Dict[str, Any]] = []
+    for content in contents:
+        for document in yaml.safe_load_all(content):
+            if not document:
+                continue
+            if document.get("kind", "").endswith("List") and "items" in document:
+                documents.extend(document["items"])
+            else:
+                documents.append(document)
+    return documents
+
+
+def _apply_rank(document: Dict[str, Any]) -> int:
+    kind = document.get("kind")
+    return APPLY_ORDER.index(kind) if kind in APPLY_ORDER else len(APPLY_ORDER)
+
+
+def _batches(documents: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    batches: Dict[int, List[Dict[str, Any]]] = {}
+    for document in documents:
+        batches.setdefault(_apply_rank(document), []).append(document)
+    return [batches[rank] for rank in sorted(batches)]
+
+
+def _merge_fields(fields: Dict[str, Any], other: Dict[str, Any]) -> Dict[str, Any]:
+    merged = dict(fields)
+    for key, value in other.items():
+        merged[key] = _merge_fields(merged.get(key) or {}, value) if value else merged.get(key, value)
+    return merged
+
+
+def _upgrade_managed_fields(managed_fields: List[Dict[str, Any]], api_version: str) -> Optional[List[Dict[str, Any]]]:
+    """``managed_fields`` with the client-side apply entries folded into the FIELD_MANAGER apply entry.
+
+    Same migration as ``kubectl apply --server-side`` does for kubectl's own manager, so fields removed from the
+    manifests are also removed from objects last applied client-side. None when there is nothing to migrate.
+    """
+    legacy = [
+        entry
+        for entry in managed_fields
+        if entry.get("manager") in CLIENT_SIDE_APPLY_MANAGERS
+        and entry.get("operation") == "Update"
+        and not entry.get("subresource")
+    ]
+    if not legacy:
+        return None
+    upgraded = [entry for entry in managed_fields if not any(entry is e for e in legacy)]
+    owned = next(
+        (e for e in upgraded if e.get("manager") == FIELD_MANAGER and e.get("operation") == "Apply"),
+        None,
+    )
+    if owned is None:
+        owned = {"manager": FIELD_MANAGER, "operation": "Apply", "apiVersion": api_version, "fieldsType": "FieldsV1"}
+        upgraded.append(owned)
+    fields = owned.get("fieldsV1") or {}
+    for entry in legacy:
+        fields = _merge_fields(fields, entry.get("fieldsV1") or {})
+    # The annotation is left to kubectl, owning it (or an annotations map holding only it) would delete it on apply
+    metadata = fields.get("f:metadata", {})
+    annotations = metadata.get("f:annotations", {})
+    annotations.pop(f"f:{LAST_APPLIED_ANNOTATION}", None)
+    if set(annotations) <= {"."}:
+        metadata.pop("f:annotations", None)
+    if set(metadata) <= {"."}:
+        fields.pop("f:metadata", None)
+    owned["fieldsV1"] = fields
+    owned["time"] = datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    return upgraded
+
+
+class _Applier:
+    def __init__(self, k8s_context: str) -> None:
+        self.k8s_context = k8s_context
+        self.client = DynamicClient(_new_client(k8s_context=k8s_context))
+        self._discovery_lock = threading.Lock()
+
+    def apply(self, document: Dict[str, Any]) -> ResourceRef:
+        with self._discovery_lock:
+            resource = self.client.resources.get(api_version=document["apiVersion"], kind=document["kind"])
+        name = document["metadata"]["name"]
+        namespace = document["metadata"].get("namespace", "default") if resource.namespaced else None
+        if namespace:
+            document["metadata"]["namespace"] = namespace
+        ref = ResourceRef(kind=document["kind"], name=name, namespace=namespace)
+        try:
+            applied = self._apply(resource=resource, document=document, name=name, namespace=namespace)
+            metadata = applied.to_dict()["metadata"]
+            managed_fields = _upgrade_managed_fields(
+                managed_fields=metadata.get("managedFields") or [], api_version=document["apiVersion"]
+            )
+            if managed_fields is not None:
+                _logger.debug("Moving the fields of %s last applied client-side to %s", ref, FIELD_MANAGER)
+                self.client.patch(
+                    resource=resource,
+                    body=[
+                        {"op": "test", "path": "/metadata/resourceVersion", "value": metadata["resourceVersion"]},
+                        {"op": "replace", "path": "/metadata/managedFields", "value": managed_fields},
+                    ],
+                    name=name,
+                    namespace=namespace,
+                    content_type="application/json-patch+json",
+                )
+                # Applied again now that every field is ours, so the ones no longer in the manifest are removed
+                self._apply(resource=resource, document=document, name=name, namespace=namespace)
+        except Exception as e:
+            raise RuntimeError(f"Failed to apply {ref}: {e}") from e
+        _logger.debug("%s applied", ref)
+        return ref
+
+    def _apply(self, resource: Any, document: Dict[str, Any], name: str, namespace: Optional[str]) -> Any:
+        return self.client.patch(
+            resource=resource,
+            body=json.dumps(document),
+            name=name,
+            namespace=namespace,
+            content_type="application/apply-patch+yaml",
+            query_params=[("fieldManager", FIELD_MANAGER), ("force", "true")],
+        )
+
+    def wait_for_crds(self, refs: List[ResourceRef]) -> None:
+        """Custom resources in later batches can only be applied once their definitions are served"""
+        api = ApiextensionsV1Api(api_client=self.client.client)
+        deadline = time.monotonic() + WATCH_TIMEOUT
+        pending = {ref.name for ref in refs}
+        while pending:
+            for name in list(pending):
+                crd = api.read_custom_resource_definition(name=name)
+                conditions = (crd.status.conditions if crd.status else None) or []
+                if any(c.type == "Established" and c.status == "True" for c in conditions):
+                    pending.discard(name)
+            if pending:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"Timeout waiting for CustomResourceDefinitions {sorted(pending)}")
+                time.sleep(1)
+        with self._discovery_lock:
+            self.client.resources.invalidate_cache()
+
+
+def apply_manifests(path: str, k8s_context: str, kustomization: bool = False) -> List[ResourceRef]:
+    """Server-side apply the manifests in ``path`` in dependency order.
+
+    Documents are grouped by kind following ``APPLY_ORDER``, the documents of a group are applied concurrently and the
+    next group starts once the previous one is applied. Returns the applied objects.
+    """
+    documents = read_manifests(path=path, kustomization=kustomization)
+    applier = _Applier(k8s_context=k8s_context)
+    applied: List[ResourceRef] = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=APPLY_PARALLELISM) as executor:
+        for batch in _batches(documents):
+            refs = list(executor.map(applier.apply, batch))
+            if refs[0].kind == "CustomResourceDefinition":
+                applier.wait_for_crds(refs=refs)
+            applied.extend(refs)
+    _logger.debug("Applied %s objects from %s", len(applied), path)
+    return applied
+
+
+def _rolled_out(kind: str, obj: Any) -> bool:
+    """Same completion criteria as ``kubectl rollout status``"""
+    status = obj.status
+    if status is None or (status.observed_generation or 0) < (obj.metadata.generation or 0):
+        return False
+    if kind == "DaemonSet":
+        desired = status.desired_number_scheduled or 0
+        return bool((status.updated_number_scheduled or 0) >= desired and (status.number_available or 0) >= desired)
+    replicas = obj.spec.replicas if obj.spec.replicas is not None else 1
+    if kind == "StatefulSet":
+        return bool((status.ready_replicas or 0) >= replicas and (status.updated_replicas or 0) >= replicas)
+    return bool(
+        (status.updated_replicas or 0) >= replicas
+        and (status.replicas or 0) <= (status.updated_replicas or 0)
+        and (status.available_replicas or 0) >= (status.updated_replicas or 0)
+    )
+
+
+def _has_addresses(obj: Any) -> bool:
+    return any(subset.addresses for subset in obj.subsets or [])
+
+
+def _watch_until(
+    ref: ResourceRef,
+    k8s_context: str,
+    list_func: Callable[[ApiClient], Callable[..., Any]],
+    condition: Callable[[Any], bool],
+    timeout: int,
+) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining = int(deadline - time.monotonic())
+        if remaining <= 0:
+            raise TimeoutError(f"Timeout waiting for {ref}")
+        w = watch.Watch()
+        for event in w.stream(
+            list_func(_new_client(k8s_context=k8s_context)),
+            namespace=ref.namespace,
+            field_selector=f"metadata.name={ref.name}",
+            timeout_seconds=min(remaining, WATCH_TIMEOUT),
+        ):
+            if event["type"] != "DELETED" and condition(event["object"]):
+                w.stop()
+                _logger.debug("%s ready", ref)
+                return
+
+
+def wait_for_rollout(ref: ResourceRef, k8s_context: str, timeout: int = ROLLOUT_TIMEOUT) -> None:
+    list_funcs: Dict[str, Callable[[ApiClient], Callable[..., Any]]] = {
+        "Deployment": lambda client: AppsV1Api(api_client=client).list_namespaced_deployment,
+        "StatefulSet": lambda client: AppsV1Api(api_client=client).list_namespaced_stateful_set,
+        "DaemonSet": lambda client: AppsV1Api(api_client=client).list_namespaced_daemon_set,
+    }
+    if ref.kind not in list_funcs:
+        raise ValueError(f"Unable to wait for the rollout of {ref}")
+    _watch_until(
+        ref=ref,
+        k8s_context=k8s_context,
+        list_func=list_funcs[ref.kind],
+        condition=lambda obj: _rolled_out(kind=ref.kind, obj=obj),
+        timeout=timeout,
+    )
+
+
+def wait_for_endpoints(ref: ResourceRef, k8s_context: str, timeout: int = ENDPOINTS_TIMEOUT) -> None:
+    _watch_until(
+        ref=ref,
+        k8s_context=k8s_context,
+        list_func=lambda client: CoreV1Api(api_client=client).list_namespaced_endpoints,
+        condition=_has_addresses,
+        timeout=timeout,
+    )
+
+
+def wait_for(refs: Iterable[ResourceRef], k8s_context: str) -> None:
+    """Wait concurrently for the rollout of workloads and for Services (given as Endpoints) to have addresses"""
+    refs = list(refs)
+    if not refs:
+        return
+    waits = {ref: (wait_for_endpoints if ref.kind == "Endpoints" else wait_for_rollout) for ref in dict.fromkeys(refs)}
+    errors: List[str] = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(waits)) as executor:
+        futures = {executor.submit(wait, ref=ref, k8s_context=k8s_context): ref for ref, wait in waits.items()}
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                errors.append(f"{futures[future]}: {e}")
+    if errors:
+        raise RuntimeError(f"Resources not ready: {'; '.join(errors)}")
+
+
+def patch_workload(ref: ResourceRef, patch: Dict[str, Any], k8s_context: str) -> None:
+    """Strategic merge patch, like ``kubectl patch``"""
+    apps = AppsV1Api(api_client=_new_client(k8s_context=k8s_context))
+    patch_funcs = {
+        "Deployment": apps.patch_namespaced_deployment,
+        "StatefulSet": apps.patch_namespaced_stateful_set,
+        "DaemonSet": apps.patch_namespaced_daemon_set,
+    }
+    patch_funcs[ref.kind](name=ref.name, namespace=ref.namespace, body=patch)
+    _logger.debug("%s patched", ref)
+
+
+def patch_deployments(namespace: str, patch: Dict[str, Any], k8s_context: str) -> None:
+    """Patch every Deployment in ``namespace`` concurrently"""
+    apps = AppsV1Api(api_client=_new_client(k8s_context=k8s_context))
+    refs = [
+        ResourceRef(kind="Deployment", name=d.metadata.name, namespace=namespace)
+        for d in apps.list_namespaced_deployment(namespace=namespace).items
+    ]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=APPLY_PARALLELISM) as executor:
+        list(executor.map(lambda ref: patch_workload(ref=ref, patch=patch, k8s_context=k8s_context), refs))
+
+
+def rollout_restart(ref: ResourceRef, k8s_context: str) -> None:
+    """Same as ``kubectl rollout restart``"""
+    restarted_at = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    patch = {"spec": {"template": {"metadata": {"annotations": {"kubectl.kubernetes.io/restartedAt": restarted_at}}}}}
+    patch_workload(ref=ref, patch=patch, k8s_context=k8s_context)
+
+
 if __name__ == "__main__":
     k8s_context = config.load_kube_config()
     r = get_ingress_dns(name="istio-ingress", k8s_context=k8s_context, namespace="istio-system")
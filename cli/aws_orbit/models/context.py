@@ -171,6 +171,11 @@ class TeamContext:
     team_helm_repository: Optional[str] = None
     user_helm_repository: Optional[str] = None
     team_efs_fs_id: Optional[str] = None
+    job_retention_count: Optional[int] = None
+    job_retention_hours: Optional[int] = None
+    job_queue_team_quota: Optional[int] = None
+    job_queue_user_quota: Optional[int] = None
+    job_queue_weight: Optional[int] = None
 
     # Manifest default
     authentication_groups: Optional[List[str]] = None
@@ -283,6 +288,7 @@ class Context:
     helm_repository: Optional[str] = None
     install_ssm_agent: Optional[bool] = False
     install_image_replicator: Optional[bool] = False
+    applied_manifests: Optional[Dict[str, str]] = cast(Dict[str, str], field(default_factory=dict))
 
     def get_team_by_name(self, name: str) -> Optional[TeamContext]:
         for t in self.teams:
@@ -508,40 +514,44 @@ class ContextSerDe(Generic[T, V]):
         if isinstance(context, Context):
             _logger.debug("Teams: %s", [t.name for t in context.teams])
             content: Dict[str, Any] = cast(Dict[str, Any], Context.Schema().dump(context))
-            current_teams_contexts: List[str] = ssm.list_teams_contexts(env_name=context.name)
-            written_teams_contexts: List[str] = []
-            for team in content["Teams"]:
-                ssm.put_parameter(name=team["SsmParameterName"], obj=team)
-                written_teams_contexts.append(team["SsmParameterName"])
-            old_teams_contexts: List[str] = list(set(current_teams_contexts) - set(written_teams_contexts))
+            # Only remove team contexts this process has seen, others were created concurrently by another writer
+            teams_prefix = f"/orbit/{context.name}/teams/"
+            current_teams_contexts: List[str] = [
+                p for p in ssm.seen_parameters(prefix=teams_prefix) if p.endswith("/context")
+            ] or ssm.list_teams_contexts(env_name=context.name)
+            parameters = {team["SsmParameterName"]: team for team in content["Teams"]}
+            del content["Teams"]
+            parameters[context.ssm_parameter_name] = content
+            ssm.put_parameters_if_changed(objs=parameters)
+            old_teams_contexts: List[str] = [p for p in current_teams_contexts if p not in parameters]
             _logger.debug("old_teams_contexts: %s", old_teams_contexts)
             ssm.delete_parameters(parameters=old_teams_contexts)
-            del content["Teams"]
-            ssm_parameter_name = context.ssm_parameter_name
         elif isinstance(context, FoundationContext):
             content = cast(Dict[str, Any], FoundationContext.Schema().dump(context))
-            ssm_parameter_name = cast(str, context.ssm_parameter_name)
+            ssm.put_parameter(name=cast(str, context.ssm_parameter_name), obj=content)
         else:
             raise ValueError("Unknown 'context' Type")
 
-        ssm.put_parameter(name=ssm_parameter_name, obj=content)
         _logger.debug("Context written to SSM: %s", content)
 
     @staticmethod
     def load_context_from_ssm(env_name: str, type: Type[V]) -> V:
         if type is Context:
             context_parameter_name: str = f"/orbit/{env_name}/context"
-            if ssm.does_parameter_exist(context_parameter_name):
-                main = ssm.get_parameter(name=context_parameter_name)
-            else:
+            versions = ssm.describe_parameters(prefix=f"/orbit/{env_name}/")
+            teams_parameters = [
+                p for p in versions if p.startswith(f"/orbit/{env_name}/teams/") and p.endswith("/context")
+            ]
+            _logger.debug("teams_parameters: %s", teams_parameters)
+            # The env context is requested even when not listed yet, DescribeParameters is eventually consistent
+            values = ssm.get_parameters(names=[context_parameter_name] + teams_parameters, versions=versions)
+            if context_parameter_name not in values:
                 msg = f"SSM parameter {context_parameter_name} not found for env {env_name}"
                 _logger.error(msg)
                 raise Exception(msg)
+            main = values[context_parameter_name]
             _logger.debug("Raw SSM: %s", main)
-            teams_parameters = ssm.list_parameters(prefix=f"/orbit/{env_name}/teams/")
-            _logger.debug("teams_parameters: %s", teams_parameters)
-            teams = [ssm.get_parameter_if_exists(name=p) for p in teams_parameters if p.endswith("/context")]
-            main["Teams"] = [t for t in teams if t]
+            main["Teams"] = [values[p] for p in teams_parameters if p in values]
             return cast(V, Context.Schema().load(data=main, many=False, partial=False, unknown="EXCLUDE"))
         elif type is FoundationContext:
             context_parameter_name = f"/orbit-f/{env_name}/context"
@@ -14,11 +14,11 @@
 
 # flake8: noqa: F811
 
-import json
+import functools
 import logging
 import os
 import re
-from typing import Any, ClassVar, Dict, Generic, List, Optional, Set, Type, TypeVar, Union, cast
+from typing import Any, ClassVar, Dict, Generic, List, Optional, Set, Tuple, Type, TypeVar, Union, cast
 
 import jsonpath_ng as jsonpath_ng
 import yaml
@@ -31,7 +31,6 @@ import aws_orbit
 from aws_orbit import utils
 from aws_orbit.models.common import BaseSchema
 from aws_orbit.services import ssm
-from aws_orbit.utils import boto3_client
 
 _logger: logging.Logger = logging.getLogger(__name__)
 
@@ -61,6 +60,11 @@ class TeamManifest:
     efs_life_cycle: Optional[str] = None
     authentication_groups: Optional[List[str]] = None
     team_efs_fs_id: Optional[str] = None
+    job_retention_count: Optional[int] = None
+    job_retention_hours: Optional[int] = None
+    job_queue_team_quota: Optional[int] = None
+    job_queue_user_quota: Optional[int] = None
+    job_queue_weight: Optional[int] = None
 
 
 @dataclass(base_schema=BaseSchema, frozen=True)
@@ -227,7 +231,85 @@ class Manifest:
         return None
 
 
-def _add_ssm_param_injector(tag: str = "!SSM") -> Set[str]:
+@functools.lru_cache(maxsize=None)
+def _parse_jsonpath(jsonpath: str) -> Any:
+    return jsonpath_ng.parse(jsonpath)
+
+
+class _SsmParameterInjections:
+    """
+    Resolves the !SSM references of a manifest in two passes. While collecting, references are only
+    recorded and left unresolved. prefetch() then reads every referenced parameter in batched calls,
+    and the next parse of the document resolves the references from those values.
+    """
+
+    def __init__(self, pattern: "re.Pattern[str]") -> None:
+        self.pattern = pattern
+        self.collecting = True
+        self.references: Set[Tuple[str, str]] = set()
+        self.ssm_parameters: Set[str] = set()
+
+    def _references(self, value: str) -> List[Tuple[str, str]]:
+        references = []
+        for g in self.pattern.findall(value):
+            _logger.debug(f"match: {g}")
+            (ssm_param_name, jsonpath) = g.split("::")
+            if "${" in ssm_param_name:
+                ssm_param_name = ssm_param_name.replace("$", "").format(os.environ)
+            references.append((ssm_param_name, jsonpath))
+        return references
+
+    def _find(self, ssm_param_name: str, jsonpath: str) -> List[Any]:
+        return cast(List[Any], _parse_jsonpath(jsonpath).find(SSM_CONTEXT[ssm_param_name]))
+
+    def prefetch(self) -> None:
+        names = sorted({name for name, _ in self.references if name not in SSM_CONTEXT})
+        if names:
+            _logger.debug(f"Prefetching injected SSM parameters {names}")
+            values = ssm.get_parameters(names=names)
+            SSM_CONTEXT.update(values)
+            self.ssm_parameters.update(values)
+
+        errors = []
+        for ssm_param_name, jsonpath in sorted(self.references):
+            if ssm_param_name not in SSM_CONTEXT:
+                errors.append(f"SSM parameter {ssm_param_name} not found")
+                continue
+            try:
+                json_match = self._find(ssm_param_name=ssm_param_name, jsonpath=jsonpath)
+            except Exception as e:
+                errors.append(f"Injected parameter {ssm_param_name}::{jsonpath} is invalid: {e}")
+                continue
+            if len(json_match) > 1:
+                errors.append(f"Injected parameter {ssm_param_name}::{jsonpath} is ambiguous")
+            elif len(json_match) == 0:
+                errors.append(f"Injected parameter {jsonpath} not found in SSM {ssm_param_name}")
+        if errors:
+            raise Exception("Unable to resolve injected SSM parameters:\n" + "\n".join(sorted(set(errors))))
+        self.collecting = False
+
+    def constructor_ssm_parameter(self, loader, node) -> Any:  # type: ignore
+        """
+        Extracts the SSM parameter from the node's value
+        :param yaml.Loader loader: the yaml loader
+        :param node: the current node in the yaml
+        :return: the value the first reference in the node resolves to
+        """
+        value = loader.construct_scalar(node)
+        references = self._references(value)
+        if not references:
+            return value
+        if self.collecting:
+            self.references.update(references)
+            return value
+        ssm_param_name, jsonpath = references[0]
+        _logger.debug(f"found injected parameter {(ssm_param_name, jsonpath)}")
+        param_value: str = self._find(ssm_param_name=ssm_param_name, jsonpath=jsonpath)[0].value
+        _logger.debug(f"injected SSM parameter {ssm_param_name}::{jsonpath} resolved to {param_value}")
+        return param_value
+
+
+def _add_ssm_param_injector(tag: str = "!SSM") -> _SsmParameterInjections:
     """
     Load a yaml configuration file and resolve any SSM parameters
     The SSM parameters must have !SSM before them and be in this format
@@ -236,6 +318,7 @@ def _add_ssm_param_injector(tag: str = "!SSM") -> Set[str]:
     database:
         host: !SSM ${/orbit-f/dev-env/resources::/UserAccessPolicy}
         port: !SSM ${/orbit-f/dev-env/resources::/PublicSubnet/*}
+    The returned injections start collecting references, call prefetch() before the resolving parse.
     """
     # pattern for global vars: look for ${word}
     pattern = re.compile(".*?\${([^}]+::[^}]*)}.*?")  # noqa: W605
@@ -245,53 +328,9 @@ def _add_ssm_param_injector(tag: str = "!SSM") -> Set[str]:
     # e.g. somekey: !SSM somestring${MYENVVAR}blah blah blah
     loader.add_implicit_resolver(tag, pattern, None)  # type: ignore
 
-    ssm_parameters = set()
-
-    def constructor_ssm_parameter(loader, node) -> Any:  # type: ignore
-        """
-        Extracts the environment variable from the node's value
-        :param yaml.Loader loader: the yaml loader
-        :param node: the current node in the yaml
-        :return: the parsed string that contains the value of the environment
-        variable
-        """
-        value = loader.construct_scalar(node)
-        match = pattern.findall(value)  # to find all env variables in line
-        if match:
-            full_value = value
-            for g in match:
-                _logger.debug(f"match: {g}")
-                (ssm_param_name, jsonpath) = g.split("::")
-                if "${" in ssm_param_name:
-                    ssm_param_name = ssm_param_name.replace("$", "").format(os.environ)
-                _logger.debug(f"found injected parameter {(ssm_param_name, jsonpath)}")
-                if ssm_param_name not in SSM_CONTEXT:
-                    ssm = boto3_client("ssm")
-                    try:
-                        SSM_CONTEXT[ssm_param_name] = json.loads(
-                            ssm.get_parameter(Name=ssm_param_name)["Parameter"]["Value"]
-                        )
-                        ssm_parameters.add(ssm_param_name)
-                    except Exception as e:
-                        _logger.error(f"Error resolving injected parameter {g}: {e}")
-
-                json_expr = jsonpath_ng.parse(jsonpath)
-                json_data = SSM_CONTEXT[ssm_param_name]
-                json_match = json_expr.find(json_data)
-
-                if len(json_match) > 1:
-                    raise Exception(f"Injected parameter {g} is ambiguous")
-                elif len(json_match) == 0:
-                    raise Exception(f"Injected parameter {jsonpath} not found in SSM {ssm_param_name}")
-
-                param_value: str = json_match[0].value
-                _logger.debug(f"injected SSM parameter {g} resolved to {param_value}")
-                return param_value
-            return full_value
-        return value
-
-    loader.add_constructor(tag, constructor_ssm_parameter)  # type: ignore
-    return ssm_parameters
+    injections = _SsmParameterInjections(pattern=pattern)
+    loader.add_constructor(tag, injections.constructor_ssm_parameter)  # type: ignore
+    return injections
 
 
 def _add_env_var_injector(tag: str = "!ENV") -> None:
@@ -352,10 +391,14 @@ class ManifestSerDe(Generic[T]):
         filedir: str = os.path.dirname(filepath)
         utils.print_dir(dir=filedir)
         YamlIncludeConstructor.add_to_loader_class(loader_class=yaml.SafeLoader, base_dir=filedir)
-        _add_ssm_param_injector()
+        ssm_injections = _add_ssm_param_injector()
         _add_env_var_injector()
         with open(filepath, "r") as f:
-            raw: Dict[str, Any] = cast(Dict[str, Any], yaml.safe_load(f))
+            content = f.read()
+        # First pass collects the !SSM references so they can be fetched together
+        yaml.safe_load(content)
+        ssm_injections.prefetch()
+        raw: Dict[str, Any] = cast(Dict[str, Any], yaml.safe_load(content))
         _logger.debug("raw: %s", raw)
         if type is Manifest:
             raw["SsmParameterName"] = f"/orbit/{raw['Name']}/manifest"
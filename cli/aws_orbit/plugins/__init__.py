@@ -16,7 +16,7 @@ import importlib
 import logging
 from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Set, Union, cast
 
-from aws_orbit import utils
+from aws_orbit import tracing, utils
 from aws_orbit.services import s3
 
 if TYPE_CHECKING:
@@ -281,7 +281,8 @@ class PluginRegistries:
                 ("Skipping %s deletion for team %s because it is not registered.", plugin_id, team_context.name)
             )
         _logger.debug("Destroying %s for team %s.", plugin_id, team_context.name)
-        self._registries[team_context.name][plugin_id].destroy(context=context, team_context=team_context)
+        with tracing.span(f"plugin {plugin_id} destroy", team=team_context.name):
+            self._registries[team_context.name][plugin_id].destroy(context=context, team_context=team_context)
         if plugin_id != "custom_cfn":
             del self._registries[team_context.name][plugin_id]
 
@@ -317,7 +318,8 @@ class PluginRegistries:
                 )
                 return None
             _logger.debug(f"Deploying {plugin_id} for team {team_context.name}.")
-            hook(plugin_id, context, team_context, parameters)
+            with tracing.span(f"plugin {plugin_id} deploy", team=team_context.name):
+                hook(plugin_id, context, team_context, parameters)
         else:
             _logger.debug(
                 "Skipping deploy_plugin for %s/%s because there is no plugins registered.",
@@ -2,11 +2,10 @@ import json
 import logging
 import os
 import subprocess
-import time
 from typing import Any, Dict, List, Optional, cast
 
 import boto3
-from kubernetes import client, config, dynamic
+from kubernetes import client, config, dynamic, watch
 from kubernetes.client import api_client
 from kubernetes.client.rest import ApiException
 
@@ -201,10 +200,34 @@ def delete_user_namespace(
                 logger.warning(ae.body)
 
 
-def delete_user_profile(user_profile: str) -> None:
+def delete_user_profile(user_profile: str, timeout: int = 30) -> None:
     logger.info(f"Removing profile {user_profile}")
-    run_command(f"kubectl delete profile {user_profile} --kubeconfig {KUBECONFIG_PATH}")
-    time.sleep(5)
+    api = client.CustomObjectsApi()
+    kwargs = {"group": "kubeflow.org", "version": "v1", "plural": "profiles"}
+    try:
+        api.delete_cluster_custom_object(name=user_profile, **kwargs)
+    except ApiException as ae:
+        if ae.status == 404:
+            return
+        raise
+
+    # Wait for the profile to actually disappear instead of sleeping a fixed time
+    profiles = api.list_cluster_custom_object(field_selector=f"metadata.name={user_profile}", **kwargs)
+    if not profiles["items"]:
+        return
+    w = watch.Watch()
+    for event in w.stream(
+        api.list_cluster_custom_object,
+        field_selector=f"metadata.name={user_profile}",
+        resource_version=profiles["metadata"]["resourceVersion"],
+        timeout_seconds=timeout,
+        **kwargs,
+    ):
+        if event["type"] == "DELETED":
+            w.stop()
+            logger.info(f"Removed profile {user_profile}")
+            return
+    logger.warning(f"Timed out waiting for removal of profile {user_profile}")
 
 
 def manage_user_namespace(event: Dict[str, Any], api: client.CoreV1Api, userspace_dc: dynamic.DynamicClient) -> None:
@@ -3,10 +3,10 @@ import logging
 import subprocess
 from typing import cast
 
-import boto3
 from botocore.exceptions import ClientError
 
 from aws_orbit.models.context import FoundationContext
+from aws_orbit.utils import boto3_client
 
 _logger: logging.Logger = logging.getLogger(__name__)
 
@@ -63,7 +63,7 @@ def deploy_selfsigned_cert(context: "FoundationContext") -> str:
 
 def upload_cert_iam(context: "FoundationContext", private_pem: str, public_pem: str) -> str:
     """Uploads the cert to AWS IAM"""
-    iam_client = boto3.client("iam")
+    iam_client = boto3_client("iam")
     ssl_cert_name = f"{context.name}-{context.region}"
     try:
         response = iam_client.get_server_certificate(ServerCertificateName=ssl_cert_name)
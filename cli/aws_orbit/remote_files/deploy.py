@@ -12,16 +12,16 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 
-import concurrent.futures
+import hashlib
 import json
 import logging
 import os
 import subprocess
-from typing import Any, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from aws_codeseeder import codeseeder
 
-from aws_orbit import ORBIT_CLI_ROOT, docker, plugins, sh
+from aws_orbit import ORBIT_CLI_ROOT, bundle, docker, plugins, sh, tracing
 from aws_orbit.models.changeset import (
     Changeset,
     check_changeset_from_s3_exists,
@@ -30,19 +30,40 @@ from aws_orbit.models.changeset import (
 )
 from aws_orbit.models.context import Context, ContextSerDe, FoundationContext, TeamContext
 from aws_orbit.models.manifest import ImageManifest, ImagesManifest, Manifest, ManifestSerDe
-from aws_orbit.remote_files import cdk_toolkit, eksctl, env, foundation, helm, kubectl, teams, utils
+from aws_orbit.remote_files import (
+    cdk_toolkit,
+    eksctl,
+    env,
+    foundation,
+    helm,
+    image_scheduler,
+    kubectl,
+    team_scheduler,
+    teams,
+    utils,
+)
 from aws_orbit.services import ecr, kms, secretsmanager
 from aws_orbit.utils import boto3_client, get_account_id, get_region, resolve_parameters
 
 _logger: logging.Logger = logging.getLogger(__name__)
 
+# Content addressed image tags, see _image_content_tag
+IMAGE_TAG_PREFIX = "src-"
+IMAGE_TAG_LENGTH = 32
+
 
 def print_results(msg: str) -> None:
     if msg.startswith("[RESULT] "):
         _logger.info(msg)
 
 
-def _deploy_image(image_name: str, env: str, build_args: Optional[List[str]], use_cache: bool = True) -> None:
+def _deploy_image(
+    image_name: str,
+    env: str,
+    build_args: Optional[List[str]],
+    use_cache: bool = True,
+    extra_tags: Optional[List[str]] = None,
+) -> None:
     region = get_region()
     account_id = get_account_id()
     _logger.debug(f"_deploy_image args: {account_id}, {region}, {image_name}, {env} {build_args}")
@@ -60,7 +81,13 @@ def _deploy_image(image_name: str, env: str, build_args: Optional[List[str]], us
     _logger.debug("path: %s", path)
 
     docker.deploy_image_from_source(
-        dir=path, name=ecr_repo, build_args=build_args, use_cache=use_cache, tag="latest", env=env
+        dir=path,
+        name=ecr_repo,
+        build_args=build_args,
+        use_cache=use_cache,
+        tag="latest",
+        env=env,
+        extra_tags=extra_tags,
     )
 
     _logger.debug("Docker Image Deployed to ECR")
@@ -123,8 +150,9 @@ def _deploy_images_batch(
     env: str,
     build_execution_role: str,
     build_args: List[str] = [],
+    tag: Optional[str] = None,
 ) -> List[Tuple[str, str, str]]:
-    _logger.debug(f"_deploy_images_batch args: {path} {image_name} {env} {build_execution_role}")
+    _logger.debug(f"_deploy_images_batch args: {path} {image_name} {env} {build_execution_role} {tag}")
     extra_dirs = {image_name: path}
     pre_build_commands = []
     if os.path.exists(os.path.join(path, "toolkit_helper.json")):
@@ -156,14 +184,33 @@ def _deploy_images_batch(
         env: str,
         build_execution_role: str,
         build_args: List[str],
+        extra_tags: List[str],
     ) -> None:
         _logger.info(f"running ...{image_name} at {path}")
-        _deploy_image(image_name=image_name, env=env, build_args=build_args, use_cache=False)
+        _deploy_image(image_name=image_name, env=env, build_args=build_args, extra_tags=extra_tags)
 
-    _deploy_images_batch(path, image_name, env, build_execution_role, build_args)
+    _deploy_images_batch(path, image_name, env, build_execution_role, build_args, [tag] if tag else [])
     ecr_address = f"{get_account_id()}.dkr.ecr.{get_region()}.amazonaws.com"
     remote_name = f"{ecr_address}/orbit-{env}/{image_name}"
-    return [image_name, remote_name, "latest"]  # type: ignore
+    return [image_name, remote_name, tag or "latest"]  # type: ignore
+
+
+def _image_content_tag(path: str, image_name: str, env: str, parent_tags: Dict[str, str]) -> str:
+    """Tag derived from everything the build of ``image_name`` reads from the bundle and from its parent images"""
+    dirs = [(path, image_name)]
+    helper = ""
+    helper_file = os.path.join(path, "toolkit_helper.json")
+    if os.path.exists(helper_file):
+        # The unresolved helper, so the tag does not depend on where the repository is checked out
+        with open(helper_file, "r") as file:
+            helper = file.read()
+        resolved = json.loads(_load_toolkit_helper(file_path=helper_file, image_name=image_name, env=env))
+        dirs += [(d, n) for n, d in resolved.get("extra_dirs", {}).items()]
+    digest = hashlib.sha256(bundle.hash_dirs(dirs=dirs).encode("utf-8"))
+    digest.update(helper.encode("utf-8"))
+    for parent, parent_tag in sorted(parent_tags.items()):
+        digest.update(f"\0{parent}:{parent_tag}".encode("utf-8"))
+    return f"{IMAGE_TAG_PREFIX}{digest.hexdigest()[:IMAGE_TAG_LENGTH]}"
 
 
 def _deploy_remote_image(
@@ -218,8 +265,10 @@ def _deploy_remote_image(
     _deploy_remote_image(path, image_name, env, build_args)
 
 
-def deploy_images_remotely(env: str, requested_image: Optional[str] = None) -> None:
-    _logger.debug(f"deploy_images_remotely args: {env} {requested_image}")
+def deploy_images_remotely(
+    env: str, requested_image: Optional[str] = None, parallelism: int = image_scheduler.DEFAULT_PARALLELISM
+) -> None:
+    _logger.debug(f"deploy_images_remotely args: {env} {requested_image} {parallelism}")
     image_dir = os.path.realpath(os.path.join(ORBIT_CLI_ROOT, "../../images"))
     context: "Context" = ContextSerDe.load_context_from_ssm(env_name=env, type=Context)
 
@@ -248,37 +297,43 @@ def deploy_images_remotely(env: str, requested_image: Optional[str] = None) -> N
 
     else:
         new_images_manifest = {}
-        # first build k8s-utilities
-        (image_name, image_addr, version) = _deploy_images_batch(
-            path=f"{image_dir}/k8s-utilities",
-            image_name="k8s-utilities",
-            env=env,
-            build_execution_role=codebuild_role,
-        )
-        _logger.debug(f"Returned from _deploy_images_batch: {image_name} {image_addr} {version}")
-        im = str(image_name).replace("-", "_")
-        new_images_manifest[im] = ImageManifest(repository=str(image_addr), version=str(version))
-
-        # now build the images dependent on k8s-utilities
-        list_subfolders_with_paths = [f.path for f in os.scandir(image_dir) if f.is_dir()]
-        max_workers = 4
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-
-            def deploy_images_batch_helper(args_tuple: List[Any]) -> List[Tuple[str, str, str]]:
-                return _deploy_images_batch(
-                    path=args_tuple[0], image_name=args_tuple[1], env=args_tuple[2], build_execution_role=args_tuple[3]
+        image_names = sorted(f.name for f in os.scandir(image_dir) if f.is_dir())
+        dependencies = image_scheduler.parse_dependencies(image_dir=image_dir, image_names=image_names)
+        _logger.debug(f"Image dependencies: {dependencies}")
+
+        image_tags: Dict[str, str] = {}
+
+        def build_image(image_name: str) -> None:
+            path = os.path.join(image_dir, image_name)
+            # The scheduler only starts an image once its parents are done, so their tags are known
+            tag = _image_content_tag(
+                path=path,
+                image_name=image_name,
+                env=env,
+                parent_tags={p: image_tags[p] for p in dependencies[image_name]},
+            )
+            ecr_repo = f"orbit-{env}/{image_name}"
+            if ecr.describe_image(repository_name=ecr_repo, tag=tag):
+                _logger.info("Image %s:%s is up to date, skipping the build", ecr_repo, tag)
+                ecr.tag_image(repository_name=ecr_repo, source_tag=tag, tag="latest")
+                ecr_address = f"{get_account_id()}.dkr.ecr.{get_region()}.amazonaws.com"
+                res = [image_name, f"{ecr_address}/{ecr_repo}", tag]
+            else:
+                res = _deploy_images_batch(
+                    path=path,
+                    image_name=image_name,
+                    env=env,
+                    build_execution_role=codebuild_role,
+                    tag=tag,
                 )
+            _logger.debug(f"Returned from _deploy_images_batch: {res}")
+            image_tags[image_name] = tag
+            im = str(res[0]).replace("-", "_")
+            new_images_manifest[im] = ImageManifest(repository=str(res[1]), version=str(res[2]))
 
-            args_tuples = [
-                (path, path.split("/")[-1], env, codebuild_role)
-                for path in list_subfolders_with_paths
-                if "k8s-utilities" not in path
-            ]
-
-            results = list(executor.map(deploy_images_batch_helper, args_tuples))
-            for res in results:
-                im = str(res[0]).replace("-", "_")
-                new_images_manifest[im] = ImageManifest(repository=str(res[1]), version=str(res[2]))
+        image_scheduler.build_images(
+            env_name=env, dependencies=dependencies, build=build_image, parallelism=parallelism
+        )
         _logger.debug(f"New image manifest from all images: {new_images_manifest}")
         context_latest_all: "Context" = ContextSerDe.load_context_from_ssm(env_name=env, type=Context)
         context_latest_all.images = ImagesManifest(**new_images_manifest)  # type: ignore
@@ -331,14 +386,17 @@ def deploy_foundation(env_name: str) -> None:
 
     @codeseeder.remote_function("orbit", codebuild_role=context.toolkit.admin_role)
     def deploy_foundation(env_name: str) -> None:
-        docker.login(context=context)
+        with tracing.span("docker login"):
+            docker.login(context=context)
         _logger.debug("DockerHub and ECR Logged in")
         cdk_toolkit.deploy(context=context)
         _logger.debug("CDK Toolkit Stack deployed")
-        foundation.deploy(context=context)
+        with tracing.span("foundation stack"):
+            foundation.deploy(context=context)
         _logger.debug("Demo Stack deployed")
 
-    deploy_foundation(env_name=env_name)
+    with tracing.remote_span("deploy_foundation", env_name=env_name, bucket=context.toolkit.s3_bucket):
+        deploy_foundation(env_name=env_name)
 
 
 def deploy_env(env_name: str, manifest_dir: str) -> None:
@@ -367,14 +425,16 @@ def deploy_env(env_name: str, manifest_dir: str) -> None:
         },
     )
     def deploy_env(env_name: str, manifest_dir: str) -> None:
-        docker.login(context=context)
+        with tracing.span("docker login"):
+            docker.login(context=context)
         _logger.debug("DockerHub and ECR Logged in")
         cdk_toolkit.deploy(context=context)
         _logger.debug("CDK Toolkit Stack deployed")
-        env.deploy(
-            context=context,
-            eks_system_masters_roles_changes=changeset.eks_system_masters_roles_changeset if changeset else None,
-        )
+        with tracing.span("env stack"):
+            env.deploy(
+                context=context,
+                eks_system_masters_roles_changes=changeset.eks_system_masters_roles_changeset if changeset else None,
+            )
 
         _logger.debug("Env Stack deployed")
         eksctl.deploy_env(
@@ -388,14 +448,17 @@ def deploy_env(env_name: str, manifest_dir: str) -> None:
         helm.deploy_env(context=context)
         _logger.debug("Helm Charts installed")
 
-        k8s_context = utils.get_k8s_context(context=context)
-        kubectl.fetch_kubectl_data(context=context, k8s_context=k8s_context)
-        ContextSerDe.dump_context_to_ssm(context=context)
+        with tracing.span("fetch kubectl data"):
+            k8s_context = utils.get_k8s_context(context=context)
+            kubectl.fetch_kubectl_data(context=context, k8s_context=k8s_context)
+            ContextSerDe.dump_context_to_ssm(context=context)
         _logger.debug("Updating userpool redirect")
-        _update_userpool_client(context=context)
-        _update_userpool(context=context)
+        with tracing.span("userpool"):
+            _update_userpool_client(context=context)
+            _update_userpool(context=context)
 
-    deploy_env(env_name=env_name, manifest_dir=manifest_dir)
+    with tracing.remote_span("deploy_env", env_name=env_name, bucket=context.toolkit.s3_bucket):
+        deploy_env(env_name=env_name, manifest_dir=manifest_dir)
 
 
 def _update_userpool(context: Context) -> None:
@@ -437,7 +500,7 @@ def _update_userpool_client(context: Context) -> None:
     )
 
 
-def deploy_teams(env_name: str, manifest_dir: str) -> None:
+def deploy_teams(env_name: str, manifest_dir: str, parallelism: int = team_scheduler.DEFAULT_PARALLELISM) -> None:
     _logger.debug("env_name: %s", env_name)
     context: "Context" = ContextSerDe.load_context_from_ssm(env_name=env_name, type=Context)
     _logger.debug("Context loaded.")
@@ -475,7 +538,7 @@ def deploy_teams(env_name: str, manifest_dir: str) -> None:
             "aws-orbit-code-commit": os.path.realpath(os.path.join(ORBIT_CLI_ROOT, "../../plugins/code_commit")),
         },
     )
-    def deploy_teams(env_name: str, manifest_dir: str) -> None:
+    def deploy_teams(env_name: str, manifest_dir: str, parallelism: int = team_scheduler.DEFAULT_PARALLELISM) -> None:
         if changeset:
             plugins.PLUGINS_REGISTRIES.load_plugins(
                 context=context,
@@ -484,7 +547,8 @@ def deploy_teams(env_name: str, manifest_dir: str) -> None:
             )
             _logger.debug("Plugins loaded")
 
-        docker.login(context=context)
+        with tracing.span("docker login"):
+            docker.login(context=context)
         _logger.debug("DockerHub and ECR Logged in")
         if changeset and changeset.teams_changeset and changeset.teams_changeset.removed_teams_names:
             kubectl.write_kubeconfig(context=context)
@@ -515,30 +579,45 @@ def deploy_teams(env_name: str, manifest_dir: str) -> None:
         manifest: Optional["Manifest"] = ManifestSerDe.load_manifest_from_ssm(env_name=context.name, type=Manifest)
         if manifest is None:
             raise RuntimeError(f"Manifest {context.name} not found!")
+        env_manifest: "Manifest" = manifest
         kubectl.write_kubeconfig(context=context)
-        for team_name in team_names:
-            team_manifest = manifest.get_team_by_name(name=team_name)
+
+        def deploy_team(team_name: str, result: team_scheduler.TeamResult) -> None:
+            team_manifest = env_manifest.get_team_by_name(name=team_name)
             if team_manifest is None:
                 raise RuntimeError(f"TeamManifest {team_name} not found!")
-            teams.deploy_team(context=context, manifest=manifest, team_manifest=team_manifest)
+            with result.step("stack"):
+                teams.deploy_team(context=context, manifest=env_manifest, team_manifest=team_manifest)
             _logger.debug("Team Stacks deployed")
             team_context = context.get_team_by_name(name=team_name)
             if team_context is None:
                 raise RuntimeError(f"TeamContext {team_name} not found!")
-            eksctl.deploy_team(context=context, team_context=team_context)
+            with team_scheduler.EKSCTL_LOCK, result.step("eksctl"):
+                eksctl.deploy_team(context=context, team_context=team_context)
             _logger.debug("EKS Team Stack deployed")
-            kubectl.deploy_team(context=context, team_context=team_context)
+            with result.step("kubectl"):
+                kubectl.deploy_team(context=context, team_context=team_context)
             _logger.debug("Kubernetes Team components deployed")
-            helm.deploy_team(context=context, team_context=team_context)
+            with result.step("helm"):
+                helm.deploy_team(context=context, team_context=team_context)
             _logger.debug("Team Helm Charts installed")
-            plugins.PLUGINS_REGISTRIES.deploy_team_plugins(
-                context=context, team_context=team_context, changes=changeset.plugin_changesets if changeset else []
-            )
+            with team_scheduler.PLUGINS_LOCK, result.step("plugins"):
+                plugins.PLUGINS_REGISTRIES.deploy_team_plugins(
+                    context=context, team_context=team_context, changes=changeset.plugin_changesets if changeset else []
+                )
 
-            team_context.plugins = team_manifest.plugins
-            ContextSerDe.dump_context_to_ssm(context=context)
+            with team_scheduler.CONTEXT_LOCK:
+                team_context.plugins = team_manifest.plugins
+                ContextSerDe.dump_context_to_ssm(context=context)
             _logger.debug("Team Plugins deployed")
 
+        team_scheduler.deploy_teams(
+            env_name=context.name,
+            team_names=list(dict.fromkeys(team_names)),
+            deploy_team=deploy_team,
+            parallelism=parallelism,
+        )
         _logger.debug("Teams deployed")
 
-    deploy_teams(env_name=env_name, manifest_dir=manifest_dir)
+    with tracing.remote_span("deploy_teams", env_name=env_name, bucket=context.toolkit.s3_bucket):
+        deploy_teams(env_name=env_name, manifest_dir=manifest_dir, parallelism=parallelism)
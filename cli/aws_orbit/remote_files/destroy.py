@@ -12,6 +12,7 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 
+import functools
 import logging
 import os
 import time
@@ -22,7 +23,7 @@ from aws_codeseeder import codeseeder
 from aws_orbit import ORBIT_CLI_ROOT, cleanup, plugins, sh
 from aws_orbit.exceptions import FailedShellCommand
 from aws_orbit.models.context import Context, ContextSerDe, FoundationContext
-from aws_orbit.remote_files import cdk_toolkit, eksctl, env, foundation, helm, kubectl, teams
+from aws_orbit.remote_files import cdk_toolkit, eksctl, env, foundation, helm, kubectl, teams, teardown_scheduler
 from aws_orbit.services import ecr, secretsmanager, ssm
 
 _logger: logging.Logger = logging.getLogger(__name__)
@@ -85,8 +86,13 @@ def destroy_teams(env_name: str) -> None:
     def destroy_teams(env_name: str) -> None:
         plugins.PLUGINS_REGISTRIES.load_plugins(context=context, plugin_changesets=[], teams_changeset=None)
         kubectl.write_kubeconfig(context=context)
+        plan = teardown_scheduler.TeardownPlan(name=f"{context.name} team spaces")
         for team_context in context.teams:
-            destroy_team_user_resources(team_context.name)
+            plan.add(
+                f"teamspaces {team_context.name}",
+                functools.partial(destroy_team_user_resources, team_name=team_context.name),
+            )
+        plan.run()
         time.sleep(60)
         _logger.debug("Plugins loaded")
         for team_context in context.teams:
@@ -20,7 +20,7 @@ from typing import Any, Dict, List, Optional, cast
 
 import yaml
 
-from aws_orbit import sh
+from aws_orbit import sh, tracing
 from aws_orbit.models.changeset import Changeset, ListChangeset
 from aws_orbit.models.context import Context, ContextSerDe, TeamContext
 from aws_orbit.models.manifest import ManagedNodeGroupManifest
@@ -342,6 +342,7 @@ def fetch_cluster_data(context: "Context", cluster_name: str) -> None:
     _logger.debug("Cluster data fetched successfully.")
 
 
+@tracing.traced()
 def deploy_env(context: "Context", changeset: Optional[Changeset]) -> None:
     stack_name: str = f"orbit-{context.name}"
     final_eks_stack_name: str = f"eksctl-{stack_name}-cluster"
@@ -510,6 +511,7 @@ def deploy_env(context: "Context", changeset: Optional[Changeset]) -> None:
     _logger.debug("EKSCTL deployed")
 
 
+@tracing.traced()
 def deploy_team(context: "Context", team_context: "TeamContext") -> None:
     stack_name: str = f"orbit-{context.name}"
     final_eks_stack_name: str = f"eksctl-{stack_name}-cluster"
@@ -556,6 +558,7 @@ def deploy_team(context: "Context", team_context: "TeamContext") -> None:
             _logger.debug(f"Skipping existing IAM Identity Mapping - Role: {arn}, Username: {username}")
 
 
+@tracing.traced()
 def destroy_env(context: "Context") -> None:
     stack_name: str = f"orbit-{context.name}"
     final_eks_stack_name: str = f"eksctl-{stack_name}-cluster"
@@ -586,6 +589,7 @@ def destroy_env(context: "Context") -> None:
         )
 
 
+@tracing.traced()
 def destroy_teams(context: "Context") -> None:
     stack_name: str = f"orbit-{context.name}"
     final_eks_stack_name: str = f"eksctl-{stack_name}-cluster"
@@ -621,6 +625,7 @@ def destroy_teams(context: "Context") -> None:
         _logger.debug("EKSCTL Teams destroyed")
 
 
+@tracing.traced()
 def destroy_team(context: "Context", team_context: "TeamContext") -> None:
     stack_name: str = f"orbit-{context.name}"
     final_eks_stack_name: str = f"eksctl-{stack_name}-cluster"
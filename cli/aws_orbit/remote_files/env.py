@@ -16,10 +16,9 @@ import logging
 import os
 from typing import TYPE_CHECKING, List, Optional, cast
 
-import boto3
-
 from aws_orbit import ORBIT_CLI_ROOT, cdk, cleanup, docker
 from aws_orbit.services import cfn, ecr, iam, ssm
+from aws_orbit.utils import boto3_client
 
 if TYPE_CHECKING:
     from aws_orbit.models.changeset import ListChangeset
@@ -29,7 +28,7 @@ _logger: logging.Logger = logging.getLogger(__name__)
 
 
 def update_subnet_tags(context: "Context") -> None:
-    ec2 = boto3.client("ec2")
+    ec2 = boto3_client("ec2")
     cluster_name = f"orbit-{context.name}"
     if context.networking.public_subnets:
         subnet_ids = [x.subnet_id for x in context.networking.public_subnets]
@@ -20,9 +20,9 @@ from typing import Any, Dict, Optional, Tuple, cast
 import yaml
 
 import aws_orbit
-from aws_orbit import ORBIT_CLI_ROOT, exceptions, sh, utils
+from aws_orbit import ORBIT_CLI_ROOT, exceptions, sh, tracing, utils
 from aws_orbit.models.context import Context, TeamContext
-from aws_orbit.remote_files import kubectl
+from aws_orbit.remote_files import kubectl, team_scheduler
 from aws_orbit.services import cfn, s3
 
 _logger: logging.Logger = logging.getLogger(__name__)
@@ -61,7 +61,8 @@ def create_team_charts_copy(team_context: TeamContext, path: str, target_path: O
 
 def add_repo(repo: str, repo_location: str) -> None:
     _logger.debug("Adding Helm Repository: %s at %s", repo, repo_location)
-    sh.run(f"helm repo add {repo} {repo_location}")
+    with team_scheduler.HELM_REPO_LOCK:
+        sh.run(f"helm repo add {repo} {repo_location}")
 
 
 def init_env_repo(context: Context) -> str:
@@ -107,7 +108,9 @@ def _init_team_repo(context: Context, team_context: TeamContext) -> str:
     return repo_location
 
 
-def package_chart(repo: str, chart_path: str, values: Optional[Dict[str, Any]]) -> Tuple[str, str, str]:
+def package_chart(
+    repo: str, chart_path: str, values: Optional[Dict[str, Any]], destination: Optional[str] = None
+) -> Tuple[str, str, str]:
     chart_yaml = os.path.join(chart_path, "Chart.yaml")
     values_yaml = os.path.join(chart_path, "values.yaml")
 
@@ -122,7 +125,9 @@ def package_chart(repo: str, chart_path: str, values: Optional[Dict[str, Any]])
 
     chart_name = chart_path.split("/")[-1]
     _logger.debug("Packaging %s at %s", chart_name, chart_path)
-    for line in sh.run_iterating(f"helm package --debug {chart_path}"):
+    # Teams package charts of the same name and version, a per team destination keeps the packages apart
+    destination_arg = f" --destination {destination}" if destination else ""
+    for line in sh.run_iterating(f"helm package --debug {chart_path}{destination_arg}"):
         if line.startswith("Successfully packaged chart and saved it to: "):
             chart_package = line.replace("Successfully packaged chart and saved it to: ", "")
             _logger.debug("Created package: %s", chart_package)
@@ -135,21 +140,23 @@ def package_chart(repo: str, chart_path: str, values: Optional[Dict[str, Any]])
 def install_chart(repo: str, namespace: str, name: str, chart_name: str, chart_version: str) -> None:
     chart_version = aws_orbit.__version__.replace(".dev", "-")
     _logger.debug("Installing %s, version %s as %s from %s", chart_name, chart_version, name, repo)
-    try:
-        sh.run(f"helm uninstall --debug {name} -n {namespace}")
-    except exceptions.FailedShellCommand:
-        _logger.debug("helm uninstall did not find the release")
-
-    sh.run(
-        f"helm upgrade --install --debug --namespace {namespace} --version "
-        f"{chart_version} {name} {repo}/{chart_name}"
-    )
+    with tracing.span(f"helm install {name}", namespace=namespace, chart=chart_name):
+        try:
+            sh.run(f"helm uninstall --debug {name} -n {namespace}")
+        except exceptions.FailedShellCommand:
+            _logger.debug("helm uninstall did not find the release")
+
+        sh.run(
+            f"helm upgrade --install --debug --namespace {namespace} --version "
+            f"{chart_version} {name} {repo}/{chart_name}"
+        )
 
 
 def install_chart_no_upgrade(repo: str, namespace: str, name: str, chart_name: str, chart_version: str) -> None:
     chart_version = aws_orbit.__version__.replace(".dev", "-")
     _logger.debug("Installing %s, version %s as %s from %s", chart_name, chart_version, name, repo)
-    sh.run(f"helm install --debug --namespace {namespace} --version {chart_version} {name} {repo}/{chart_name}")
+    with tracing.span(f"helm install {name}", namespace=namespace, chart=chart_name):
+        sh.run(f"helm install --debug --namespace {namespace} --version {chart_version} {name} {repo}/{chart_name}")
 
 
 def uninstall_chart(name: str, namespace: str) -> None:
@@ -199,6 +206,7 @@ def delete_chart(repo: str, chart_name: str) -> None:
         _logger.error(e)
 
 
+@tracing.traced()
 def deploy_env(context: Context) -> None:
     eks_stack_name: str = f"eksctl-orbit-{context.name}-cluster"
     _logger.debug("EKSCTL stack name: %s", eks_stack_name)
@@ -209,6 +217,7 @@ def deploy_env(context: Context) -> None:
         kubectl.write_kubeconfig(context=context)
 
 
+@tracing.traced()
 def deploy_team(context: Context, team_context: TeamContext) -> None:
     eks_stack_name: str = f"eksctl-orbit-{context.name}-cluster"
     _logger.debug("EKSCTL stack name: %s", eks_stack_name)
@@ -216,7 +225,7 @@ def deploy_team(context: Context, team_context: TeamContext) -> None:
         team_repo_location = _init_team_repo(context=context, team_context=team_context)
         team_repo = team_context.name
         add_repo(repo=team_repo, repo_location=team_repo_location)
-        kubectl.write_kubeconfig(context=context)
+        # Teams deploy concurrently, deploy_teams writes the kubeconfig once before any of them starts
 
         team_charts_path = create_team_charts_copy(team_context=team_context, path=os.path.join(CHARTS_PATH, "team"))
         package_team_space_pkg(context, team_repo, team_charts_path, team_context)
@@ -233,6 +242,7 @@ def package_team_space_pkg(context: Context, repo: str, team_charts_path: str, t
     chart_name, chart_version, chart_package = package_chart(
         repo=repo,
         chart_path=os.path.join(team_charts_path, "team-space"),
+        destination=team_charts_path,
         values={
             "env_name": context.name,
             "team": team_context.name,
@@ -261,6 +271,7 @@ def package_user_space_pkg(context: Context, repo: str, team_charts_path: str, t
     chart_name, chart_version, chart_package = package_chart(
         repo=repo,
         chart_path=os.path.join(team_charts_path, "user-space"),
+        destination=team_charts_path,
         values={
             "env_name": context.name,
             "team": team_context.name,
@@ -278,6 +289,7 @@ def package_user_space_pkg(context: Context, repo: str, team_charts_path: str, t
     )
 
 
+@tracing.traced()
 def destroy_env(context: Context) -> None:
     eks_stack_name: str = f"eksctl-orbit-{context.name}-cluster"
     _logger.debug("EKSCTL stack name: %s", eks_stack_name)
@@ -285,6 +297,7 @@ def destroy_env(context: Context) -> None:
         kubectl.write_kubeconfig(context=context)
 
 
+@tracing.traced()
 def destroy_team(context: Context, team_context: TeamContext) -> None:
     eks_stack_name: str = f"eksctl-orbit-{context.name}-cluster"
     _logger.debug("EKSCTL stack name: %s", eks_stack_name)
@@ -0,0 +1,172 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License").
+#    You may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+import json
+import logging
+import os
+import re
+from typing import Callable, Dict, Iterator, List, Match, Optional, Set
+
+from aws_orbit.remote_files import task_graph
+
+_logger: logging.Logger = logging.getLogger(__name__)
+
+DEFAULT_PARALLELISM = 4
+
+# docker.update_docker_file resolves this Dockerfile placeholder to the env's jupyter-user image
+JUPYTER_USER_BASE = "${ACCOUNT_ID}.dkr.ecr.${REGION}.amazonaws.com/orbit-${ENV}/jupyter-user:latest"
+
+_ARG_RE = re.compile(r"^ARG\s+([A-Za-z_][A-Za-z0-9_]*)(?:=(\S*))?", re.IGNORECASE)
+_FROM_RE = re.compile(r"^FROM\s+(.+)$", re.IGNORECASE)
+_VAR_RE = re.compile(r"\$\{([A-Za-z_][A-Za-z0-9_]*)(?::-([^}]*))?\}|\$([A-Za-z_][A-Za-z0-9_]*)")
+
+
+class ImageResult(task_graph.Task):
+    @property
+    def parents(self) -> List[str]:
+        return self.after
+
+
+def _instructions(docker_file: str) -> Iterator[str]:
+    with open(docker_file, "r") as file:
+        instruction = ""
+        for line in file:
+            line = line.strip()
+            if not instruction and (not line or line.startswith("#")):
+                continue
+            if line.endswith("\\"):
+                instruction += line[:-1] + " "
+                continue
+            yield instruction + line
+            instruction = ""
+        if instruction:
+            yield instruction
+
+
+def _substitute(value: str, args: Dict[str, str]) -> str:
+    def replace(match: Match[str]) -> str:
+        name = match.group(1) or match.group(3)
+        if name in args:
+            return args[name]
+        return match.group(2) if match.group(2) is not None else match.group(0)
+
+    return _VAR_RE.sub(replace, value)
+
+
+def _ecr_image_name(reference: str) -> Optional[str]:
+    if ".dkr.ecr." not in reference:
+        return None
+    repository = reference.split("@")[0]
+    if ":" in repository.rsplit("/", 1)[-1]:
+        repository = repository.rsplit(":", 1)[0]
+    return repository.rsplit("/", 1)[-1]
+
+
+def _parents(path: str, name: str, names: Set[str]) -> Set[str]:
+    build_args: Dict[str, str] = {}
+    helper_file = os.path.join(path, "toolkit_helper.json")
+    if os.path.exists(helper_file):
+        with open(helper_file, "r") as file:
+            for build_arg in json.load(file).get("build_args", []):
+                key, _, value = build_arg.partition("=")
+                build_args[key] = value
+
+    parents: Set[str] = set()
+    docker_file = os.path.join(path, "Dockerfile")
+    if not os.path.exists(docker_file):
+        return parents
+    args: Dict[str, str] = {"jupyter_user_base": JUPYTER_USER_BASE}
+    seen_from = False
+    for instruction in _instructions(docker_file):
+        arg = _ARG_RE.match(instruction)
+        if arg and not seen_from:
+            # Only the ARGs declared before a FROM apply to FROM lines, --build-arg values win over defaults
+            args[arg.group(1)] = build_args.get(arg.group(1), arg.group(2) or "")
+        source = _FROM_RE.match(instruction)
+        if source:
+            seen_from = True
+            reference = next(t for t in source.group(1).split() if not t.startswith("--"))
+            parent = _ecr_image_name(_substitute(reference, args))
+            if parent in names and parent != name:
+                parents.add(parent)
+    return parents
+
+
+def parse_dependencies(image_dir: str, image_names: List[str]) -> Dict[str, Set[str]]:
+    """Map every image to the images its Dockerfile builds FROM, resolving ARGs and toolkit_helper.json build_args.
+
+    Only base images in the env's own ECR repositories named after one of ``image_names`` are dependencies.
+    """
+    names = set(image_names)
+    return {name: _parents(path=os.path.join(image_dir, name), name=name, names=names) for name in image_names}
+
+
+def _log_summary(results: List[ImageResult]) -> None:
+    task_graph.log_summary(
+        title="Image build summary", tasks=results, detail=lambda r: f"parents: {', '.join(r.parents) or '-'}"
+    )
+
+
+def _write_report(env_name: str, results: List[ImageResult]) -> str:
+    report_dir = os.path.join(".orbit.out", env_name, "images")
+    os.makedirs(report_dir, exist_ok=True)
+    report_path = os.path.join(report_dir, "build-report.json")
+    report = [
+        {
+            "name": r.name,
+            "parents": r.parents,
+            "status": r.status,
+            "start": r.start,
+            "duration": r.duration,
+            "error": str(r.error) if r.error else None,
+        }
+        for r in results
+    ]
+    with open(report_path, "w") as file:
+        json.dump(report, file, indent=4)
+    return report_path
+
+
+def build_images(
+    env_name: str,
+    dependencies: Dict[str, Set[str]],
+    build: Callable[[str], None],
+    parallelism: int = DEFAULT_PARALLELISM,
+) -> List[ImageResult]:
+    """Run ``build`` for every image once all of its parents are built, up to ``parallelism`` builds at a time.
+
+    Images depending on a failed build are skipped. Timings are written to .orbit.out/<env>/images/build-report.json
+    and the failures are raised together once nothing is left to build.
+    """
+    results = [
+        ImageResult(name=name, after=sorted(parents & dependencies.keys())) for name, parents in dependencies.items()
+    ]
+    if not results:
+        return []
+
+    def run(result: ImageResult) -> None:
+        _logger.info("Building image %s", result.name)
+        try:
+            build(result.name)
+        except Exception:
+            _logger.exception("Image %s failed", result.name)
+            raise
+
+    ordered = task_graph.run(tasks=results, execute=run, parallelism=parallelism, kind="image")
+    _log_summary(ordered)
+    _logger.debug("Image build report: %s", _write_report(env_name=env_name, results=ordered))
+    errors = [r for r in ordered if r.error]
+    if errors:
+        raise RuntimeError(f"Failed to build images: {', '.join(f'{r.name} ({r.error})' for r in errors)}")
+    return ordered
@@ -12,19 +12,22 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 
+import hashlib
 import logging
 import os
 import shutil
 import time
-from typing import Any, Dict, List, Optional, Tuple, cast
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple, cast
 
 import yaml
+from kubernetes.client.rest import ApiException
 
 import aws_orbit
-from aws_orbit import ORBIT_CLI_ROOT, exceptions, k8s, sh, utils
+from aws_orbit import ORBIT_CLI_ROOT, exceptions, k8s, sh, tracing, utils
 from aws_orbit.exceptions import FailedShellCommand
 from aws_orbit.models.context import Context, ContextSerDe, TeamContext
-from aws_orbit.remote_files import kubeflow
+from aws_orbit.remote_files import kubeflow, team_scheduler
 from aws_orbit.remote_files.utils import get_k8s_context
 from aws_orbit.services import cfn, elb
 from aws_orbit.utils import resolve_parameters
@@ -443,8 +446,11 @@ def _generate_kubeflow_patch(context: "Context", clean_up: bool = True) -> Tuple
     return output, patch
 
 
-def _prepare_team_context_path(context: "Context") -> str:
+def _prepare_team_context_path(context: "Context", team_name: Optional[str] = None) -> str:
     output_path = os.path.join(".orbit.out", context.name, "kubectl", "apps")
+    if team_name:
+        # Teams deployed concurrently each apply their own directory
+        output_path = os.path.join(output_path, "teams", team_name)
     os.makedirs(output_path, exist_ok=True)
     _cleanup_output(output_path=output_path)
     if context.account_id is None:
@@ -460,8 +466,9 @@ def _generate_teams_manifest(context: "Context") -> str:
 
 
 def _generate_team_context(context: "Context", team_context: "TeamContext") -> str:
-    output_path: str = _prepare_team_context_path(context=context)
-    _team(context=context, team_context=team_context, output_path=output_path)
+    output_path: str = _prepare_team_context_path(context=context, team_name=team_context.name)
+    with team_scheduler.CONTEXT_LOCK:
+        _team(context=context, team_context=team_context, output_path=output_path)
     return output_path
 
 
@@ -565,185 +572,291 @@ def _generate_fsx_driver_manifest(output_path: str, context: "Context") -> str:
     return overlays_path
 
 
-# Confirm orbit-system Service Endpoints
-def _confirm_endpoints(name: str, namespace: str, k8s_context: str) -> None:
-    addresses = k8s.get_service_addresses(name=name, namespace=namespace, k8s_context=k8s_context)
-    if addresses:
-        for address in addresses:
-            _logger.debug(
-                "Service: %s Namespace: %s Hostname: %s IP: %s",
-                name,
-                namespace,
-                address.get("hostname"),
-                address.get("ip"),
-            )
-    else:
-        raise Exception("No Endpoints found for Service: %s Namespace: %s", name, namespace)
-
-
-def _confirm_readiness(name: str, namespace: str, type: str, k8s_context: str) -> None:
-    for _ in range(20):
-        status = k8s.get_resource_status(name=name, namespace=namespace, type=type, k8s_context=k8s_context)
-        ready_replicas = status.get("ready_replicas")
-        if ready_replicas and int(ready_replicas) > 0:
-            _logger.debug("%s/%s ready", namespace, name)
-            break
-        else:
-            _logger.debug("%s/%s not yet ready, sleeping for 1 minute", namespace, name)
-            time.sleep(60)
+def write_kubeconfig(context: "Context") -> None:
+    sh.run(f"eksctl utils write-kubeconfig --cluster orbit-{context.name} --set-kubeconfig-context")
+
+
+def _manifest_digest(path: str, k8s_context: str, kustomization: bool) -> str:
+    """Digest of everything ``kubectl apply`` reads for ``path``.
+
+    Kustomizations are rendered as an overlays directory next to their base, so the whole parent directory is hashed.
+    A manifest directory is applied without recursion, so only its own manifest files are hashed.
+    """
+    digest = hashlib.sha256(f"{k8s_context}:{'-k' if kustomization else '-f'}".encode("utf-8"))
+    if os.path.isfile(path):
+        root, files = os.path.dirname(path), [path]
+    elif kustomization:
+        root = os.path.dirname(os.path.normpath(path))
+        files = [os.path.join(dirpath, f) for dirpath, _, filenames in os.walk(root) for f in filenames]
     else:
-        raise Exception("Timeout wating for Image Replicator to become ready")
+        root = path
+        files = [os.path.join(path, f) for f in os.listdir(path) if f.endswith((".yaml", ".yml", ".json"))]
+    for file in sorted(files):
+        digest.update(os.path.relpath(file, root).encode("utf-8"))
+        with open(file, "rb") as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+def _apply(context: "Context", name: str, path: str, k8s_context: str, kustomization: bool = False) -> bool:
+    """Apply ``path`` unless it is unchanged since the last successful apply recorded in the context.
+
+    Returns whether it was applied, so callers can skip the readiness checks of unchanged components too. The digest is
+    recorded in ``context.applied_manifests`` and persisted with the context once the deployment succeeds.
+    """
+    if context.applied_manifests is None:
+        context.applied_manifests = {}
+    digest = _manifest_digest(path=path, k8s_context=k8s_context, kustomization=kustomization)
+    if context.applied_manifests.get(name) == digest:
+        _logger.info("Skipping unchanged %s manifests", name)
+        return False
+    k8s.apply_manifests(path=path, k8s_context=k8s_context, kustomization=kustomization)
+    context.applied_manifests[name] = digest
+    return True
+
+
+class _Stages:
+    """Wall clock time of each deployment stage, logged together once the deployment ends"""
+
+    def __init__(self) -> None:
+        self.timings: List[Tuple[str, float]] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        _logger.debug("Stage %s started", name)
+        start = time.monotonic()
+        try:
+            with tracing.span(f"kubectl {name}"):
+                yield
+        finally:
+            self.timings.append((name, time.monotonic() - start))
 
+    def report(self) -> None:
+        _logger.info("Kubernetes stages: %s", ", ".join(f"{name} {seconds:.0f}s" for name, seconds in self.timings))
 
-def write_kubeconfig(context: "Context") -> None:
-    sh.run(f"eksctl utils write-kubeconfig --cluster orbit-{context.name} --set-kubeconfig-context")
+
+def _endpoints(name: str, namespace: str) -> k8s.ResourceRef:
+    return k8s.ResourceRef(kind="Endpoints", name=name, namespace=namespace)
+
+
+def _deployment(name: str, namespace: str) -> k8s.ResourceRef:
+    return k8s.ResourceRef(kind="Deployment", name=name, namespace=namespace)
 
 
+@tracing.traced()
 def deploy_env(context: "Context") -> None:
     eks_stack_name: str = f"eksctl-orbit-{context.name}-cluster"
     _logger.debug("EKSCTL stack name: %s", eks_stack_name)
     if cfn.does_stack_exist(stack_name=eks_stack_name):
         k8s_context = get_k8s_context(context=context)
         _logger.debug("k8s_context: %s", k8s_context)
+        stages = _Stages()
+        try:
+            _deploy_env_stages(context=context, k8s_context=k8s_context, stages=stages)
+        finally:
+            stages.report()
+
 
+def _deploy_env_stages(context: "Context", k8s_context: str, stages: _Stages) -> None:
+    kubectl_path = os.path.join(".orbit.out", context.name, "kubectl")
+
+    with stages.stage("cert-manager"):
         # orbit-system kustomizations
         output_paths = _generate_orbit_system_kustomizations(context=context)
+        commons_applied = False
         for path in output_paths:
-            sh.run(f"kubectl apply -k {path} --context {k8s_context} --wait")
+            name = os.path.relpath(os.path.dirname(path), kubectl_path)
+            commons_applied |= _apply(
+                context=context, name=name, path=path, k8s_context=k8s_context, kustomization=True
+            )
 
         # Wait until cert-manager webhook is available
-        _confirm_endpoints(name="cert-manager-webhook", namespace="cert-manager", k8s_context=k8s_context)
-        _confirm_readiness(name="cert-manager", namespace="cert-manager", type="Deployment", k8s_context=k8s_context)
-        _confirm_readiness(
-            name="cert-manager-cainjector", namespace="cert-manager", type="Deployment", k8s_context=k8s_context
-        )
-
+        waits = [_endpoints(name="cert-manager-webhook", namespace="cert-manager")]
+        if commons_applied:
+            waits += [
+                _deployment(name="cert-manager", namespace="cert-manager"),
+                _deployment(name="cert-manager-cainjector", namespace="cert-manager"),
+            ]
+        k8s.wait_for(refs=waits, k8s_context=k8s_context)
+
+    with stages.stage("orbit-system"):
         output_path: Optional[str] = _generate_orbit_system_manifest(context=context, clean_up=True)
-        sh.run(f"kubectl apply -f {output_path} --context {k8s_context} --wait")
+        orbit_system_applied = _apply(
+            context=context, name="orbit-system", path=cast(str, output_path), k8s_context=k8s_context
+        )
 
         output_path = _generate_orbit_image_replicator_manifest(context=context, clean_up=True)
+        image_replicator_applied = False
         if output_path is not None:
-            sh.run(f"kubectl apply -f {output_path} --context {k8s_context} --wait")
+            image_replicator_applied = _apply(
+                context=context, name="orbit-system/image-replicator", path=output_path, k8s_context=k8s_context
+            )
 
         # Commented until we confirm this isn't needed
         # Restart orbit-system deployments and statefulsets to force reload of caches etc
         # sh.run(f"kubectl rollout restart deployments -n orbit-system --context {k8s_context}")
 
-        _confirm_readiness(
-            name="podsetting-operator", namespace="orbit-system", type="deployment", k8s_context=k8s_context
-        )
-        _confirm_readiness(
-            name="teamspace-operator", namespace="orbit-system", type="deployment", k8s_context=k8s_context
-        )
-        _confirm_readiness(
-            name="userspace-operator", namespace="orbit-system", type="deployment", k8s_context=k8s_context
-        )
-        _confirm_endpoints(name="podsetting-pod-webhook", namespace="orbit-system", k8s_context=k8s_context)
-
+        waits = [_endpoints(name="podsetting-pod-webhook", namespace="orbit-system")]
+        if orbit_system_applied:
+            waits += [
+                _deployment(name="podsetting-operator", namespace="orbit-system"),
+                _deployment(name="teamspace-operator", namespace="orbit-system"),
+                _deployment(name="userspace-operator", namespace="orbit-system"),
+            ]
         if context.install_image_replicator or not context.networking.data.internet_accessible:
-            _confirm_readiness(
-                name="imagereplication-operator", namespace="orbit-system", type="deployment", k8s_context=k8s_context
-            )
-            _confirm_endpoints(name="imagereplication-pod-webhook", namespace="orbit-system", k8s_context=k8s_context)
-            if context.install_ssm_agent:
-                sh.run(
-                    "kubectl rollout restart daemonsets -n orbit-system-ssm-daemons "
-                    f"ssm-agent-installer --context {k8s_context}"
+            waits.append(_endpoints(name="imagereplication-pod-webhook", namespace="orbit-system"))
+            if image_replicator_applied:
+                waits.append(_deployment(name="imagereplication-operator", namespace="orbit-system"))
+            if context.install_ssm_agent and orbit_system_applied:
+                k8s.rollout_restart(
+                    ref=k8s.ResourceRef(
+                        kind="DaemonSet", name="ssm-agent-installer", namespace="orbit-system-ssm-daemons"
+                    ),
+                    k8s_context=k8s_context,
                 )
+        k8s.wait_for(refs=waits, k8s_context=k8s_context)
 
+    with stages.stage("kube-system"):
         # kube-system kustomizations
         output_paths = _generate_kube_system_kustomizations(context=context)
         for output_path in output_paths:
-            sh.run(f"kubectl apply -k {output_path} --context {k8s_context} --wait")
+            name = os.path.relpath(os.path.dirname(output_path), kubectl_path)
+            _apply(context=context, name=name, path=output_path, k8s_context=k8s_context, kustomization=True)
 
         # kube-system manifests
         output_path = _generate_kube_system_manifest(context=context)
-        sh.run(f"kubectl apply -f {output_path} --context {k8s_context} --wait")
+        _apply(context=context, name="kube-system", path=output_path, k8s_context=k8s_context)
 
         # Enable ENIs
         _enable_eni(k8s_context=k8s_context)
 
+    with stages.stage("kubeflow"):
         # kubeflow-namespaces
         output_path = _kubeflow_namespaces(context=context)
-        sh.run(f"kubectl apply -f {output_path} --context {k8s_context} --wait")
+        _apply(context=context, name="kubeflow-namespaces", path=output_path, k8s_context=k8s_context)
 
         kubeflow.deploy_kubeflow(context=context)
 
+    with stages.stage("env"):
         # env
         output_paths = _generate_orbit_system_env_kustomizations(context=context)
         for output_path in output_paths:
-            sh.run(f"kubectl apply -k {output_path} --context {k8s_context} --wait")
+            name = os.path.relpath(os.path.dirname(output_path), kubectl_path)
+            _apply(context=context, name=name, path=output_path, k8s_context=k8s_context, kustomization=True)
 
         # Patch Kubeflow
         _logger.debug("Orbit applying KubeFlow patch")
         jupyter_launcher_config_map, patch = _generate_kubeflow_patch(context=context)
-        sh.run(f"kubectl apply -f {jupyter_launcher_config_map} --context {k8s_context} --wait")
-        sh.run(f'kubectl patch deployment -n kubeflow jupyter-web-app-deployment --patch "{patch}"')
-        sh.run("kubectl rollout restart deployment jupyter-web-app-deployment -n kubeflow")
+        _apply(
+            context=context, name="kubeflow/jupyter-launcher", path=jupyter_launcher_config_map, k8s_context=k8s_context
+        )
+        jupyter_web_app = _deployment(name="jupyter-web-app-deployment", namespace="kubeflow")
+        k8s.patch_workload(ref=jupyter_web_app, patch=yaml.safe_load(patch), k8s_context=k8s_context)
+        k8s.rollout_restart(ref=jupyter_web_app, k8s_context=k8s_context)
 
-        _apply_deployment_patch_force_env_nodes("istio-system")
-        _apply_deployment_patch_force_env_nodes("knative-serving")
-        _apply_deployment_patch_force_env_nodes("kube-system")
-        _apply_deployment_patch_force_env_nodes("kubeflow")
+        for namespace in ["istio-system", "knative-serving", "kube-system", "kubeflow"]:
+            _apply_deployment_patch_force_env_nodes(namespace=namespace, k8s_context=k8s_context)
 
         # Patch Pods to push into Fargate when deploying in an isolated subnet
         if not context.networking.data.internet_accessible:
-            patch = (
-                '{"spec":{"template":{"metadata":{"labels":{"orbit/node-type":"fargate"}},'
-                '"spec":{"nodeSelector": null}}}}'
+            fargate_patch: Dict[str, Any] = {
+                "spec": {
+                    "template": {"metadata": {"labels": {"orbit/node-type": "fargate"}}, "spec": {"nodeSelector": None}}
+                }
+            }
+            k8s.patch_workload(
+                ref=_deployment(name="authzadaptor", namespace="istio-system"),
+                patch=fargate_patch,
+                k8s_context=k8s_context,
             )
-            sh.run(f"kubectl patch deployment -n istio-system authzadaptor --patch '{patch}'")
 
-            patch = (
-                '{"spec":{"template":{"metadata":{"labels":{"orbit/node-type":"fargate"}},'
-                '"spec":{"nodeSelector": null, "containers":[{"name":"alb-ingress-controller","args":'
-                '["--ingress-class=alb","--cluster-name=$(CLUSTER_NAME)","--aws-vpc-id=VPC_ID"]}]}}}}'
+            fargate_patch["spec"]["template"]["spec"]["containers"] = [
+                {
+                    "name": "alb-ingress-controller",
+                    "args": [
+                        "--ingress-class=alb",
+                        "--cluster-name=$(CLUSTER_NAME)",
+                        f"--aws-vpc-id={context.networking.vpc_id}",
+                    ],
+                }
+            ]
+            k8s.patch_workload(
+                ref=_deployment(name="alb-ingress-controller", namespace="kubeflow"),
+                patch=fargate_patch,
+                k8s_context=k8s_context,
             )
-            patch = patch.replace("VPC_ID", cast(str, context.networking.vpc_id))
-            sh.run(f"kubectl patch deployment -n kubeflow alb-ingress-controller --patch '{patch}'")
 
         # Patch the kubeflow mpi-operator deployment to version lock the images to v0.2.3
-        patch = (
-            '{"spec":{"template":{"spec":{"containers":[{"name":"mpi-operator","args":["-alsologtostderr",'
-            '"--lock-namespace","kubeflow","--kubectl-delivery-image","mpioperator/kubectl-delivery:v0.2.3"],'
-            '"image":"mpioperator/mpi-operator:v0.2.3"}]}}}}'
+        mpi_operator_patch = {
+            "spec": {
+                "template": {
+                    "spec": {
+                        "containers": [
+                            {
+                                "name": "mpi-operator",
+                                "args": [
+                                    "-alsologtostderr",
+                                    "--lock-namespace",
+                                    "kubeflow",
+                                    "--kubectl-delivery-image",
+                                    "mpioperator/kubectl-delivery:v0.2.3",
+                                ],
+                                "image": "mpioperator/mpi-operator:v0.2.3",
+                            }
+                        ]
+                    }
+                }
+            }
+        }
+        k8s.patch_workload(
+            ref=_deployment(name="mpi-operator", namespace="kubeflow"),
+            patch=mpi_operator_patch,
+            k8s_context=k8s_context,
         )
-        sh.run(f"kubectl patch deployment -n kubeflow mpi-operator --patch '{patch}'")
 
         # Confirm env Service Endpoints
-        _confirm_endpoints(name="landing-page-service", namespace="orbit-system", k8s_context=k8s_context)
+        k8s.wait_for(refs=[_endpoints(name="landing-page-service", namespace="orbit-system")], k8s_context=k8s_context)
 
 
 def _enable_eni(k8s_context: str) -> None:
     _logger.debug("Setting aws-node daemonset in kube-system -- ENABLE_POD_ENI=true")
-    sh.run(f"kubectl set env daemonset aws-node -n kube-system --context {k8s_context} ENABLE_POD_ENI=true")
-
     _logger.debug("Patch aws-node daemonset, container aws-vpc-cni-init -- DISABLE_TCP_EARLY_DEMUX=true")
-    patch = (
-        '{"spec": {"template": {"spec": {"initContainers": '
-        '[{"env":[{"name":"DISABLE_TCP_EARLY_DEMUX","value":"true"}],"name":"aws-vpc-cni-init"}]}}}}'
+    patch = {
+        "spec": {
+            "template": {
+                "spec": {
+                    "containers": [{"name": "aws-node", "env": [{"name": "ENABLE_POD_ENI", "value": "true"}]}],
+                    "initContainers": [
+                        {"name": "aws-vpc-cni-init", "env": [{"name": "DISABLE_TCP_EARLY_DEMUX", "value": "true"}]}
+                    ],
+                }
+            }
+        }
+    }
+    k8s.patch_workload(
+        ref=k8s.ResourceRef(kind="DaemonSet", name="aws-node", namespace="kube-system"),
+        patch=patch,
+        k8s_context=k8s_context,
     )
-    sh.run(f"kubectl patch daemonset aws-node -n kube-system --context {k8s_context} --patch '{patch}'")
 
 
-def _apply_deployment_patch_force_env_nodes(namespace: str) -> None:
+def _apply_deployment_patch_force_env_nodes(namespace: str, k8s_context: str) -> None:
     _logger.debug(f"Force {namespace} deployments to env nodes")
-    patch = (
-        '{"spec":{"template":{"metadata":{"labels":{"orbit/node-type":"ec2"}},'
-        '"spec":{"nodeSelector":{"orbit/usage":"reserved","orbit/node-group":"env"}}}}}'
-    )
+    patch = {
+        "spec": {
+            "template": {
+                "metadata": {"labels": {"orbit/node-type": "ec2"}},
+                "spec": {"nodeSelector": {"orbit/usage": "reserved", "orbit/node-group": "env"}},
+            }
+        }
+    }
     try:
-        sh.run(
-            f"bash -c 'for dep in $(kubectl get deployments -n {namespace} "
-            f"--output=jsonpath={{.items..metadata.name}}); "
-            f"do kubectl patch deployment $dep -n {namespace} --patch '\"'\"'{patch}'\"'\"'; "
-            f"done'"
-        )
-
-    except FailedShellCommand:
+        k8s.patch_deployments(namespace=namespace, patch=patch, k8s_context=k8s_context)
+    except ApiException:
         _logger.debug(f"Ignoring failed moving of {namespace} pods to env nodes")
 
 
+@tracing.traced()
 def deploy_team(context: "Context", team_context: "TeamContext") -> None:
     eks_stack_name: str = f"eksctl-orbit-{context.name}-cluster"
     _logger.debug("EKSCTL stack name: %s", eks_stack_name)
@@ -751,12 +864,15 @@ def deploy_team(context: "Context", team_context: "TeamContext") -> None:
         k8s_context = get_k8s_context(context=context)
         _logger.debug("kubectl context: %s", k8s_context)
         output_path = _generate_team_context(context=context, team_context=team_context)
-        sh.run(f"kubectl apply -f {output_path} --context {k8s_context} --wait")
+        k8s.apply_manifests(path=output_path, k8s_context=k8s_context)
 
 
+@tracing.traced()
 def destroy_env(context: "Context") -> None:
     eks_stack_name: str = f"eksctl-orbit-{context.name}-cluster"
     _logger.debug("EKSCTL stack name: %s", eks_stack_name)
+    # Anything deployed after this must be applied again
+    context.applied_manifests = {}
     if cfn.does_stack_exist(stack_name=eks_stack_name):
         sh.run(f"eksctl utils write-kubeconfig --cluster orbit-{context.name} --set-kubeconfig-context")
         k8s_context = get_k8s_context(context=context)
@@ -789,6 +905,7 @@ def destroy_env(context: "Context") -> None:
             pass  # Let's leave for eksctl, it will destroy everything anyway...
 
 
+@tracing.traced()
 def destroy_teams(context: "Context") -> None:
     eks_stack_name: str = f"eksctl-orbit-{context.name}-cluster"
     _logger.debug("EKSCTL stack name: %s", eks_stack_name)
@@ -809,6 +926,7 @@ def destroy_teams(context: "Context") -> None:
             pass  # Let's leave for eksctl, it will destroy everything anyway...
 
 
+@tracing.traced()
 def destroy_team(context: "Context", team_context: "TeamContext") -> None:
     eks_stack_name: str = f"eksctl-orbit-{context.name}-cluster"
     _logger.debug("EKSCTL stack name: %s", eks_stack_name)
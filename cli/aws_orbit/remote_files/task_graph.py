@@ -0,0 +1,125 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License").
+#    You may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+import concurrent.futures
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Set, TypeVar
+
+from dataclasses import dataclass, field
+
+_logger: logging.Logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Task:
+    name: str
+    after: List[str] = field(default_factory=list)  # Tasks to finish before this one
+    start: Optional[float] = None  # Seconds after the first task started
+    duration: float = 0.0
+    error: Optional[BaseException] = None
+    skipped: bool = False
+
+    @property
+    def status(self) -> str:
+        if self.skipped:
+            return "SKIPPED"
+        return "FAILED" if self.error else "OK"
+
+
+T = TypeVar("T", bound=Task)
+
+
+def topological_order(dependencies: Dict[str, Set[str]], kind: str = "task") -> List[str]:
+    """Every name of ``dependencies`` after the names it depends on, names outside ``dependencies`` are ignored"""
+    order: List[str] = []
+    remaining = {name: set(after) & dependencies.keys() for name, after in dependencies.items()}
+    while remaining:
+        ready = sorted(name for name, after in remaining.items() if not after)
+        if not ready:
+            raise ValueError(f"Circular {kind} dependencies: {', '.join(sorted(remaining))}")
+        order.extend(ready)
+        for name in ready:
+            del remaining[name]
+        for after in remaining.values():
+            after.difference_update(ready)
+    return order
+
+
+def run(
+    tasks: List[T],
+    execute: Callable[[T], None],
+    parallelism: int,
+    skip_dependents: bool = True,
+    kind: str = "task",
+) -> List[T]:
+    """Run ``execute`` for every task once the tasks it comes after are finished, up to ``parallelism`` at a time.
+
+    An exception raised by ``execute`` is recorded as the task's error. With ``skip_dependents`` the tasks coming after
+    a failed one are skipped, otherwise they run anyway. Tasks are returned in the order they were scheduled.
+    """
+    by_name = {task.name: task for task in tasks}
+    order = topological_order({task.name: set(task.after) for task in tasks}, kind=kind)
+    if not order:
+        return []
+
+    origin = time.monotonic()
+
+    def run_task(task: T) -> None:
+        task.start = time.monotonic() - origin
+        try:
+            execute(task)
+        except Exception as e:
+            task.error = e
+        finally:
+            task.duration = time.monotonic() - origin - task.start
+
+    pending = list(order)
+    finished: Set[str] = set()
+    failed: Set[str] = set()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, min(parallelism, len(order)))) as executor:
+        running: Dict["concurrent.futures.Future[None]", str] = {}
+        while pending or running:
+            for name in list(pending):
+                after = set(by_name[name].after) & by_name.keys()
+                if skip_dependents and after & failed:
+                    _logger.warning("Skipping %s %s, %s failed", kind, name, ", ".join(sorted(after & failed)))
+                    by_name[name].skipped = True
+                    finished.add(name)
+                    failed.add(name)
+                    pending.remove(name)
+                elif after <= finished:
+                    running[executor.submit(run_task, by_name[name])] = name
+                    pending.remove(name)
+            if not running:
+                break
+            done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                finished.add(name)
+                if by_name[name].error:
+                    failed.add(name)
+    return [by_name[name] for name in order]
+
+
+def log_summary(title: str, tasks: List[T], detail: Optional[Callable[[T], str]] = None) -> None:
+    """One line per task with its status and timings, followed by ``detail`` when given"""
+    succeeded = [t for t in tasks if t.status == "OK"]
+    _logger.info("%s: %s of %s succeeded", title, len(succeeded), len(tasks))
+    for task in tasks:
+        start = "-" if task.start is None else f"{task.start:.0f}s"
+        error = f" ({task.error})" if task.error else ""
+        extra = f", {detail(task)}" if detail else ""
+        log = _logger.info if task.status == "OK" else _logger.warning
+        log("  %s: %s%s started at %s, ran for %.0fs%s", task.name, task.status, error, start, task.duration, extra)
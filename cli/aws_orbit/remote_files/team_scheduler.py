@@ -0,0 +1,132 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License").
+#    You may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+import concurrent.futures
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+from dataclasses import dataclass, field
+
+from aws_orbit import tracing
+
+_logger: logging.Logger = logging.getLogger(__name__)
+
+DEFAULT_PARALLELISM = 4
+LOG_TAIL_LINES = 50
+
+# Steps touching state shared by every team run one team at a time
+CONTEXT_LOCK = threading.RLock()  # Context mutations and writes to SSM
+HELM_REPO_LOCK = threading.Lock()  # Local helm repositories.yaml
+EKSCTL_LOCK = threading.Lock()  # Fargate profiles and the aws-auth ConfigMap accept one change at a time
+PLUGINS_LOCK = threading.RLock()  # Plugin hooks are not written to run concurrently
+
+
+@dataclass
+class TeamResult:
+    name: str
+    log_path: str
+    duration: float = 0.0
+    steps: Dict[str, float] = field(default_factory=dict)
+    error: Optional[BaseException] = None
+
+    @contextmanager
+    def step(self, name: str) -> Iterator[None]:
+        start = time.monotonic()
+        try:
+            with tracing.span(name, team=self.name):
+                yield
+        finally:
+            self.steps[name] = time.monotonic() - start
+
+
+class _ThreadFilter(logging.Filter):
+    def __init__(self, thread_name: str) -> None:
+        super().__init__()
+        self.thread_name = thread_name
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.threadName == self.thread_name
+
+
+def _run_team(deploy_team: Callable[[str, TeamResult], None], result: TeamResult) -> TeamResult:
+    thread = threading.current_thread()
+    previous_name = thread.name
+    thread.name = f"team-{result.name}"
+    handler = logging.FileHandler(result.log_path, mode="w")
+    handler.setFormatter(logging.Formatter("[%(asctime)s][%(filename)-13s:%(lineno)3d] %(message)s"))
+    handler.addFilter(_ThreadFilter(thread_name=thread.name))
+    logging.getLogger().addHandler(handler)
+    start = time.monotonic()
+    try:
+        _logger.info("Deploying team %s", result.name)
+        with tracing.span(f"team {result.name}"):
+            deploy_team(result.name, result)
+    except Exception as e:
+        _logger.exception("Team %s failed", result.name)
+        result.error = e
+    finally:
+        result.duration = time.monotonic() - start
+        logging.getLogger().removeHandler(handler)
+        handler.close()
+        thread.name = previous_name
+    return result
+
+
+def _log_tail(path: str) -> str:
+    try:
+        with open(path, "r") as file:
+            return "".join(file.readlines()[-LOG_TAIL_LINES:])
+    except OSError:
+        return ""
+
+
+def _log_summary(results: List[TeamResult]) -> None:
+    _logger.info("Team deployment summary:")
+    for result in results:
+        steps = ", ".join(f"{step} {seconds:.0f}s" for step, seconds in result.steps.items())
+        status = f"FAILED ({result.error})" if result.error else "OK"
+        _logger.info("  %s: %s in %.0fs [%s] log: %s", result.name, status, result.duration, steps, result.log_path)
+
+
+def deploy_teams(
+    env_name: str,
+    team_names: List[str],
+    deploy_team: Callable[[str, TeamResult], None],
+    parallelism: int = DEFAULT_PARALLELISM,
+) -> List[TeamResult]:
+    """Run ``deploy_team`` for every team, up to ``parallelism`` teams at a time.
+
+    Each team logs to its own file under .orbit.out/<env>/teams. Every team runs to completion even when another one
+    fails, the failures are raised together once all teams are done.
+    """
+    log_dir = os.path.join(".orbit.out", env_name, "teams")
+    os.makedirs(log_dir, exist_ok=True)
+    results = [TeamResult(name=name, log_path=os.path.join(log_dir, f"{name}.log")) for name in team_names]
+    if not results:
+        return results
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, min(parallelism, len(results)))) as executor:
+        list(executor.map(lambda r: _run_team(deploy_team=deploy_team, result=r), results))
+
+    _log_summary(results)
+    failed = [r for r in results if r.error]
+    for result in failed:
+        _logger.error("Last lines of the %s team log:\n%s", result.name, _log_tail(result.log_path))
+    if failed:
+        raise RuntimeError(f"Failed to deploy teams: {', '.join(f'{r.name} ({r.error})' for r in failed)}")
+    return results
@@ -12,17 +12,17 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 
+import functools
 import logging
 import os
 import shutil
 from typing import Iterator, List, Optional, cast
 
-import boto3
-
 import aws_orbit
 from aws_orbit import ORBIT_CLI_ROOT, cdk, plugins
 from aws_orbit.models.context import Context, ContextSerDe, TeamContext, create_team_context_from_manifest
 from aws_orbit.models.manifest import Manifest, TeamManifest
+from aws_orbit.remote_files import team_scheduler, teardown_scheduler
 from aws_orbit.services import cfn
 from aws_orbit.utils import boto3_client
 
@@ -105,7 +105,7 @@ def _deploy_team_bootstrap(context: "Context", team_context: "TeamContext") -> N
                 Optional[str], hook(plugin.plugin_id, context, team_context, plugin.parameters)
             )
             if script_content is not None:
-                client = boto3.client("s3")
+                client = boto3_client("s3")
                 key: str = f"{team_context.bootstrap_s3_prefix}{plugin.plugin_id}.sh"
                 _logger.debug(f"Uploading s3://{context.toolkit.s3_bucket}/{key}")
                 client.put_object(
@@ -124,16 +124,17 @@ def deploy_team(context: "Context", manifest: Manifest, team_manifest: TeamManif
     if team_context:
         _logger.debug(f"team_context.plugins={team_context.plugins}")
         _logger.debug("Calling team pre_hook")
-        for plugin in team_context.plugins:
-            hook: plugins.HOOK_TYPE = plugins.PLUGINS_REGISTRIES.get_hook(
-                context=context,
-                team_name=team_context.name,
-                plugin_name=plugin.plugin_id,
-                hook_name="pre_hook",
-            )
-            if hook is not None:
-                _logger.debug(f"Found pre_hook for plugin_id {plugin}")
-                hook(plugin.plugin_id, context, team_context, plugin.parameters)
+        with team_scheduler.PLUGINS_LOCK:
+            for plugin in team_context.plugins:
+                hook: plugins.HOOK_TYPE = plugins.PLUGINS_REGISTRIES.get_hook(
+                    context=context,
+                    team_name=team_context.name,
+                    plugin_name=plugin.plugin_id,
+                    hook_name="pre_hook",
+                )
+                if hook is not None:
+                    _logger.debug(f"Found pre_hook for plugin_id {plugin}")
+                    hook(plugin.plugin_id, context, team_context, plugin.parameters)
         _logger.debug("End of pre_hook plugin execution")
     else:
         _logger.debug(f"Skipping pre_hook for unknown Team: {team_manifest.name}")
@@ -145,20 +146,30 @@ def deploy_team(context: "Context", manifest: Manifest, team_manifest: TeamManif
         app_filename=os.path.join(ORBIT_CLI_ROOT, "remote_files", "cdk", "team.py"),
         args=args,
     )
-    team_context = context.get_team_by_name(name=team_manifest.name)
-    if team_context:
-        team_context.fetch_team_data()
-    else:
-        team_context = create_team_context_from_manifest(manifest=manifest, team_manifest=team_manifest)
-        team_context.fetch_team_data()
-        context.teams.append(team_context)
-
-    _logger.debug(
-        f"team_context.helm_repository: s3://{context.toolkit.s3_bucket}/helm/repositories/teams/{team_context.name}"
-    )
-    team_context.team_helm_repository = f"s3://{context.toolkit.s3_bucket}/helm/repositories/teams/{team_context.name}"
-    team_context.user_helm_repository = f"s3://{context.toolkit.s3_bucket}/helm/repositories/user/{team_context.name}"
-    ContextSerDe.dump_context_to_ssm(context=context)
+    with team_scheduler.CONTEXT_LOCK:
+        team_context = context.get_team_by_name(name=team_manifest.name)
+        if team_context:
+            team_context.fetch_team_data()
+        else:
+            team_context = create_team_context_from_manifest(manifest=manifest, team_manifest=team_manifest)
+            team_context.fetch_team_data()
+            context.teams.append(team_context)
+
+        # Read by orbit-controller from the team context, synced on every deploy so existing teams pick up changes
+        team_context.job_retention_count = team_manifest.job_retention_count
+        team_context.job_retention_hours = team_manifest.job_retention_hours
+        team_context.job_queue_team_quota = team_manifest.job_queue_team_quota
+        team_context.job_queue_user_quota = team_manifest.job_queue_user_quota
+        team_context.job_queue_weight = team_manifest.job_queue_weight
+
+        team_context.team_helm_repository = (
+            f"s3://{context.toolkit.s3_bucket}/helm/repositories/teams/{team_context.name}"
+        )
+        _logger.debug(f"team_context.helm_repository: {team_context.team_helm_repository}")
+        team_context.user_helm_repository = (
+            f"s3://{context.toolkit.s3_bucket}/helm/repositories/user/{team_context.name}"
+        )
+        ContextSerDe.dump_context_to_ssm(context=context)
 
 
 def destroy_team(context: "Context", team_context: "TeamContext") -> None:
@@ -189,18 +200,27 @@ def destroy_team(context: "Context", team_context: "TeamContext") -> None:
             )
             if hook is not None:
                 _logger.debug(f"Found post hook for team {team_context.name} plugin {plugin.plugin_id}")
-                hook(plugin.plugin_id, context, team_context, plugin.parameters)
+                with team_scheduler.PLUGINS_LOCK:
+                    hook(plugin.plugin_id, context, team_context, plugin.parameters)
 
 
-def destroy_all(context: "Context") -> None:
+def destroy_all(context: "Context", parallelism: int = team_scheduler.DEFAULT_PARALLELISM) -> None:
+    plan = teardown_scheduler.TeardownPlan(name=f"{context.name} teams")
     for team_context in context.teams:
-        destroy_team(context=context, team_context=team_context)
-    context.teams = []
+        plan.add(
+            f"team {team_context.name}",
+            functools.partial(destroy_team, context=context, team_context=team_context),
+        )
+    resources = plan.run(parallelism=parallelism, raise_on_error=False)
+    destroyed = {r.name for r in resources if r.done}
+    context.teams = [t for t in context.teams if f"team {t.name}" not in destroyed]
     ContextSerDe.dump_context_to_ssm(context=context)
+    if context.teams:
+        raise RuntimeError(f"Failed to destroy teams: {', '.join(t.name for t in context.teams)}")
 
 
 def _delete_efs_endpoints(filesystem_id: str, team_name: str) -> None:
-    efs = boto3.client("efs")
+    efs = boto3_client("efs")
 
     access_points = efs.describe_access_points(FileSystemId=filesystem_id)
 
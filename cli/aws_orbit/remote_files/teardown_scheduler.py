@@ -0,0 +1,128 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License").
+#    You may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+import logging
+import time
+from typing import Callable, Dict, Iterable, List
+
+import botocore.exceptions
+from dataclasses import dataclass, field
+
+from aws_orbit.remote_files import task_graph
+
+_logger: logging.Logger = logging.getLogger(__name__)
+
+DEFAULT_PARALLELISM = 8
+RETRY_TIMEOUT = 600  # Seconds a resource is retried while something still depends on it
+RETRY_DELAY = 5
+RETRY_MAX_DELAY = 60
+
+_DEPENDENCY_CODES = (
+    "DependencyViolation",
+    "ResourceInUse",
+    "ResourceInUseException",
+    "InvalidNetworkInterface.InUse",
+    "FileSystemInUse",
+)
+_DEPENDENCY_MESSAGES = ("has a dependent object", "is currently in use")
+
+
+def is_dependency_violation(ex: BaseException) -> bool:
+    if isinstance(ex, botocore.exceptions.ClientError):
+        error = ex.response.get("Error", {})
+        return error.get("Code") in _DEPENDENCY_CODES or any(
+            m in error.get("Message", "") for m in _DEPENDENCY_MESSAGES
+        )
+    return False
+
+
+@dataclass
+class Resource(task_graph.Task):
+    attempts: int = 0
+    blocked_by: List[str] = field(default_factory=list)
+
+    @property
+    def done(self) -> bool:
+        return self.start is not None and self.error is None
+
+
+class TeardownPlan:
+    """Resources to delete and the resources each one waits for.
+
+    Resources run as soon as everything they wait for is gone, up to ``parallelism`` at a time. A delete failing
+    because the resource is still in use is retried with backoff until ``retry_timeout``, unless one of the resources
+    it waits for already failed, in which case that resource is reported as the blocker.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.resources: Dict[str, Resource] = {}
+        self._deletes: Dict[str, Callable[[], None]] = {}
+
+    def add(self, name: str, delete: Callable[[], None], after: Iterable[str] = ()) -> str:
+        if name in self.resources:
+            raise ValueError(f"Resource {name} is already part of the {self.name} teardown")
+        self.resources[name] = Resource(name=name, after=sorted(set(after)))
+        self._deletes[name] = delete
+        return name
+
+    def _failed_blockers(self, resource: Resource) -> List[str]:
+        return sorted(n for n in resource.after if n in self.resources and self.resources[n].error)
+
+    def _delete(self, resource: Resource, retry_timeout: float) -> None:
+        start = time.monotonic()
+        delay = RETRY_DELAY
+        while True:
+            resource.attempts += 1
+            try:
+                self._deletes[resource.name]()
+                return
+            except Exception as ex:
+                if is_dependency_violation(ex):
+                    resource.blocked_by = self._failed_blockers(resource)
+                    if not resource.blocked_by and time.monotonic() - start + delay <= retry_timeout:
+                        _logger.info("%s is still in use, retrying in %ss: %s", resource.name, delay, ex)
+                        time.sleep(delay)
+                        delay = min(delay * 2, RETRY_MAX_DELAY)
+                        continue
+                _logger.warning("Failed to delete %s: %s", resource.name, ex)
+                raise
+
+    @staticmethod
+    def _detail(resource: Resource) -> str:
+        if resource.blocked_by:
+            return f"blocked by {', '.join(resource.blocked_by)}"
+        return f"attempts: {resource.attempts}"
+
+    def run(
+        self,
+        parallelism: int = DEFAULT_PARALLELISM,
+        retry_timeout: float = RETRY_TIMEOUT,
+        raise_on_error: bool = True,
+    ) -> List[Resource]:
+        # Failed resources do not skip their dependents, those run into them and report them as blockers
+        resources = task_graph.run(
+            tasks=list(self.resources.values()),
+            execute=lambda r: self._delete(resource=r, retry_timeout=retry_timeout),
+            parallelism=parallelism,
+            skip_dependents=False,
+            kind="teardown",
+        )
+        if not resources:
+            return []
+        task_graph.log_summary(title=f"{self.name} teardown", tasks=resources, detail=self._detail)
+        failed = [r for r in resources if r.error]
+        if failed and raise_on_error:
+            raise RuntimeError(f"Failed to delete {', '.join(r.name for r in failed)}")
+        return resources
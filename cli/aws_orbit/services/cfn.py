@@ -12,11 +12,13 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 
+import hashlib
+import json
 import logging
 import os
 import time
 from datetime import datetime
-from typing import Any, Dict, Optional, Tuple, cast
+from typing import Any, Dict, List, Optional, Set, Tuple, cast
 
 import botocore.exceptions
 
@@ -25,6 +27,12 @@ from aws_orbit.utils import boto3_client
 
 CHANGESET_PREFIX = "aws-orbit-cli-deploy-"
 SSM_CONTEXT: Dict[str, str] = {}
+DEPLOY_TIMEOUT = 2400  # Seconds
+DESTROY_TIMEOUT = 1000
+EVENTS_DELAY = 1
+EVENTS_MAX_DELAY = 5
+
+_SETTLED_STATUSES = ("CREATE_COMPLETE", "UPDATE_COMPLETE", "IMPORT_COMPLETE")
 
 _logger: logging.Logger = logging.getLogger(__name__)
 
@@ -74,7 +82,13 @@ def _wait_for_changeset(changeset_id: str, stack_name: str) -> bool:
     return True
 
 
-def _create_changeset(stack_name: str, template_str: str, env_tag: str, template_path: str = "") -> Tuple[str, str]:
+def _create_changeset(
+    stack_name: str,
+    template_str: str,
+    env_tag: str,
+    template_path: str = "",
+    parameters: Optional[Dict[str, str]] = None,
+) -> Tuple[str, str, str]:
     now = datetime.utcnow().isoformat()
     description = f"Created by AWS Orbit Workbench CLI at {now} UTC"
     changeset_name = CHANGESET_PREFIX + str(int(time.time()))
@@ -87,37 +101,113 @@ def _create_changeset(stack_name: str, template_str: str, env_tag: str, template
         "Description": description,
         "Tags": ({"Key": "Env", "Value": env_tag},),
     }
+    if parameters:
+        kwargs["Parameters"] = [{"ParameterKey": k, "ParameterValue": v} for k, v in parameters.items()]
     if template_str:
         kwargs.update({"TemplateBody": template_str})
     elif template_path:
         _logger.info(f"template_path={template_path}")
         kwargs.update({"TemplateURL": template_path})
     resp = boto3_client("cloudformation").create_change_set(**kwargs)
-    return str(resp["Id"]), changeset_type
+    return str(resp["Id"]), changeset_type, str(resp["StackId"])
 
 
 def _execute_changeset(changeset_id: str, stack_name: str) -> None:
     boto3_client("cloudformation").execute_change_set(ChangeSetName=changeset_id, StackName=stack_name)
 
 
-def _wait_for_execute(stack_name: str, changeset_type: str) -> None:
-    if changeset_type == "CREATE":
-        waiter = boto3_client("cloudformation").get_waiter("stack_create_complete")
-    elif changeset_type == "UPDATE":
-        waiter = boto3_client("cloudformation").get_waiter("stack_update_complete")
-    else:
-        raise RuntimeError(f"Invalid changeset type {changeset_type}")
-    waiter_config = {
-        "Delay": 5,
-        "MaxAttempts": 480,
-    }
-    waiter.wait(StackName=stack_name, WaiterConfig=waiter_config)
+def _template_hash(template: Any, parameters: Dict[str, str], env_tag: str) -> str:
+    if isinstance(template, str):
+        try:
+            template = json.loads(template)
+        except ValueError:
+            pass  # YAML templates are compared as written
+    body = template if isinstance(template, str) else json.dumps(template, sort_keys=True)
+    digest = hashlib.sha256(body.encode("utf-8"))
+    digest.update(json.dumps({"Parameters": parameters, "Env": env_tag}, sort_keys=True).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _deployed_template_hash(stack_name: str) -> Optional[str]:
+    """Hash of the template, parameters and Env tag the stack was last deployed with, None unless it settled"""
+    client = boto3_client("cloudformation")
+    try:
+        stack = client.describe_stacks(StackName=stack_name)["Stacks"][0]
+    except botocore.exceptions.ClientError as ex:
+        if "does not exist" in ex.response["Error"]["Message"]:
+            return None
+        raise
+    if stack["StackStatus"] not in _SETTLED_STATUSES:
+        return None
+    template = client.get_template(StackName=stack_name, TemplateStage="Original")["TemplateBody"]
+    parameters = {p["ParameterKey"]: p.get("ParameterValue", "") for p in stack.get("Parameters", [])}
+    tags = {t["Key"]: t["Value"] for t in stack.get("Tags", [])}
+    return _template_hash(template=template, parameters=parameters, env_tag=tags.get("Env", ""))
+
 
+def _new_events(stack_id: str, seen: Set[str]) -> List[Dict[str, Any]]:
+    """Events not seen yet, oldest first. describe_stack_events pages from the newest, so paging stops at a seen one"""
+    events: List[Dict[str, Any]] = []
+    paginator = boto3_client("cloudformation").get_paginator("describe_stack_events")
+    for page in paginator.paginate(StackName=stack_id):
+        for event in page["StackEvents"]:
+            if event["EventId"] in seen:
+                return events[::-1]
+            seen.add(event["EventId"])
+            events.append(event)
+    return events[::-1]
 
-def deploy_template(stack_name: str, filename: str, env_tag: str, s3_bucket: Optional[str]) -> None:
+
+def _latest_events(stack_id: str) -> Set[str]:
+    resp = boto3_client("cloudformation").describe_stack_events(StackName=stack_id)
+    return {e["EventId"] for e in resp["StackEvents"]}
+
+
+def _stream_events(stack_id: str, stack_name: str, seen: Set[str], timeout: int) -> Tuple[str, List[str]]:
+    """Log the stack events as they happen until the stack settles.
+
+    Returns the final stack status and the reasons of the resources that failed on the way.
+    """
+    deadline = time.monotonic() + timeout
+    delay = EVENTS_DELAY
+    failures: List[str] = []
+    while True:
+        events = _new_events(stack_id=stack_id, seen=seen)
+        for event in events:
+            status: str = event["ResourceStatus"]
+            reason: str = event.get("ResourceStatusReason", "")
+            _logger.info("%s: %s %s %s", stack_name, event["LogicalResourceId"], status, reason)
+            if status.endswith("_FAILED"):
+                failures.append(f"{event['LogicalResourceId']} {status}: {reason}")
+            if event.get("PhysicalResourceId") == stack_id and (
+                status.endswith("_COMPLETE") or status.endswith("_FAILED")
+            ):
+                return status, failures
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Timed out after {timeout}s waiting for the {stack_name} CloudFormation stack")
+        time.sleep(delay)
+        delay = EVENTS_DELAY if events else min(delay * 2, EVENTS_MAX_DELAY)
+
+
+def deploy_template(
+    stack_name: str,
+    filename: str,
+    env_tag: str,
+    s3_bucket: Optional[str],
+    parameters: Optional[Dict[str, str]] = None,
+) -> bool:
+    """Deploy the template, returns False when the stack already runs this template with the same parameters"""
     _logger.debug("Deploying template %s", filename)
     if not os.path.isfile(filename):
         raise FileNotFoundError(f"CloudFormation template not found at {filename}")
+    with open(filename, "r") as handle:
+        template_str = handle.read()
+    parameters = parameters or {}
+    if _deployed_template_hash(stack_name=stack_name) == _template_hash(
+        template=template_str, parameters=parameters, env_tag=env_tag
+    ):
+        _logger.info("Skipping the %s CloudFormation stack, the template and parameters are unchanged", stack_name)
+        return False
     template_size = os.path.getsize(filename)
     if template_size > 51_200:
         if s3_bucket is None:
@@ -130,24 +220,40 @@ def deploy_template(stack_name: str, filename: str, env_tag: str, s3_bucket: Opt
         _logger.debug("s3_template_path: %s", s3_template_path)
         s3.upload_file(src=local_template_path, bucket=s3_bucket, key=key)
         time.sleep(3)  # Avoiding eventual consistence issues
-        changeset_id, changeset_type = _create_changeset(
-            stack_name=stack_name, template_str="", env_tag=env_tag, template_path=s3_template_path
+        changeset_id, changeset_type, stack_id = _create_changeset(
+            stack_name=stack_name,
+            template_str="",
+            env_tag=env_tag,
+            template_path=s3_template_path,
+            parameters=parameters,
         )
     else:
-        with open(filename, "r") as handle:
-            template_str = handle.read()
-        changeset_id, changeset_type = _create_changeset(
-            stack_name=stack_name, template_str=template_str, env_tag=env_tag
+        changeset_id, changeset_type, stack_id = _create_changeset(
+            stack_name=stack_name, template_str=template_str, env_tag=env_tag, parameters=parameters
         )
     has_changes = _wait_for_changeset(changeset_id, stack_name)
-    if has_changes:
-        _execute_changeset(changeset_id=changeset_id, stack_name=stack_name)
-        _wait_for_execute(stack_name=stack_name, changeset_type=changeset_type)
+    if not has_changes:
+        return False
+    seen = _latest_events(stack_id=stack_id)
+    _execute_changeset(changeset_id=changeset_id, stack_name=stack_name)
+    status, failures = _stream_events(stack_id=stack_id, stack_name=stack_name, seen=seen, timeout=DEPLOY_TIMEOUT)
+    if status not in _SETTLED_STATUSES:
+        raise RuntimeError(f"Failed to deploy the {stack_name} CloudFormation stack ({status}): {'; '.join(failures)}")
+    return True
 
 
 def destroy_stack(stack_name: str) -> None:
     _logger.debug("Destroying stack %s", stack_name)
     client = boto3_client("cloudformation")
-    client.delete_stack(StackName=stack_name)
-    waiter = client.get_waiter("stack_delete_complete")
-    waiter.wait(StackName=stack_name, WaiterConfig={"Delay": 5, "MaxAttempts": 200})
+    try:
+        stack_id: str = client.describe_stacks(StackName=stack_name)["Stacks"][0]["StackId"]
+    except botocore.exceptions.ClientError as ex:
+        if "does not exist" in ex.response["Error"]["Message"]:
+            return
+        raise
+    # Deleted stacks are only found by id
+    seen = _latest_events(stack_id=stack_id)
+    client.delete_stack(StackName=stack_id)
+    status, failures = _stream_events(stack_id=stack_id, stack_name=stack_name, seen=seen, timeout=DESTROY_TIMEOUT)
+    if status != "DELETE_COMPLETE":
+        raise RuntimeError(f"Failed to destroy the {stack_name} CloudFormation stack ({status}): {'; '.join(failures)}")
@@ -1,3 +1,4 @@
+import concurrent.futures
 import itertools
 import logging
 from base64 import b64decode
@@ -9,6 +10,16 @@ from aws_orbit.utils import boto3_client
 
 _logger: logging.Logger = logging.getLogger(__name__)
 
+DELETE_REPO_WORKERS = 8
+# BatchGetImage defaults to Docker schema 2 manifests, manifest lists and OCI images come back as failures otherwise
+MANIFEST_MEDIA_TYPES = [
+    "application/vnd.docker.distribution.manifest.v1+json",
+    "application/vnd.docker.distribution.manifest.v2+json",
+    "application/vnd.docker.distribution.manifest.list.v2+json",
+    "application/vnd.oci.image.manifest.v1+json",
+    "application/vnd.oci.image.index.v1+json",
+]
+
 
 def _chunks(iterable: Iterator[Any], size: int) -> Iterator[Any]:
     iterator = iter(iterable)
@@ -70,10 +81,10 @@ def delete_repo(repo: str) -> None:
     client.delete_repository(repositoryName=repo, force=True)
 
 
-def cleanup_remaining_repos(env_name: str) -> None:
+def cleanup_remaining_repos(env_name: str, workers: int = DELETE_REPO_WORKERS) -> None:
     _logger.debug("Deleting any remaining ECR Repos")
-    for repo in _fetch_repos(env_name=env_name):
-        delete_repo(repo=repo)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(lambda repo: delete_repo(repo=repo), _fetch_repos(env_name=env_name)))
 
 
 def create_repository(repository_name: str) -> None:
@@ -95,3 +106,37 @@ def describe_repositories(repository_names: List[str]) -> List[Dict[str, Any]]:
         )
     except client.exceptions.RepositoryNotFoundException:
         return []
+
+
+def describe_image(repository_name: str, tag: str) -> Optional[Dict[str, Any]]:
+    client = boto3_client("ecr")
+    try:
+        images = client.describe_images(repositoryName=repository_name, imageIds=[{"imageTag": tag}])["imageDetails"]
+    except (client.exceptions.RepositoryNotFoundException, client.exceptions.ImageNotFoundException):
+        return None
+    return cast(Dict[str, Any], images[0]) if images else None
+
+
+def tag_image(repository_name: str, source_tag: str, tag: str) -> None:
+    """Point ``tag`` at the image already tagged ``source_tag``, registry side without pulling it"""
+    client = boto3_client("ecr")
+    response = client.batch_get_image(
+        repositoryName=repository_name,
+        imageIds=[{"imageTag": source_tag}],
+        acceptedMediaTypes=MANIFEST_MEDIA_TYPES,
+    )
+    if response["failures"] or not response["images"]:
+        reasons = "; ".join(f"{f['failureCode']}: {f['failureReason']}" for f in response["failures"]) or "not found"
+        raise RuntimeError(f"Unable to tag {repository_name}:{source_tag} as {tag}, {reasons}")
+    image = response["images"][0]
+    params: Dict[str, Any] = {
+        "repositoryName": repository_name,
+        "imageManifest": image["imageManifest"],
+        "imageTag": tag,
+    }
+    if image.get("imageManifestMediaType"):
+        params["imageManifestMediaType"] = image["imageManifestMediaType"]
+    try:
+        client.put_image(**params)
+    except client.exceptions.ImageAlreadyExistsException:
+        _logger.debug("%s:%s already points to %s", repository_name, tag, source_tag)
@@ -58,14 +58,18 @@ def delete_targets(fs_id: str) -> None:
         time.sleep(3)
 
 
-def delete_env_filesystems(env_name: str) -> List[str]:
+def delete_filesystem(fs_id: str) -> None:
     client = boto3_client("efs")
+    delete_targets(fs_id=fs_id)
+    _logger.debug("Deleting fs %s", fs_id)
+    client.delete_file_system(FileSystemId=fs_id)
+
+
+def delete_env_filesystems(env_name: str) -> List[str]:
     fs_ids: List[str] = []
     for fs_id in fetch_env_filesystems(env_name=env_name):
         fs_ids.append(fs_id)
-        delete_targets(fs_id=fs_id)
-        _logger.debug("Deleting fs %s", fs_id)
-        client.delete_file_system(FileSystemId=fs_id)
+        delete_filesystem(fs_id=fs_id)
     return fs_ids
 
 
@@ -90,7 +90,11 @@ def get_elbs_by_service(env_name: str) -> Dict[str, Dict[str, Any]]:
     return {s: _search_elb_by_name(elbs=elbs, name=a) for s, a in services.items()}
 
 
-def delete_load_balancers(env_name: str) -> None:
+def delete_load_balancer(name: str) -> None:
     client = boto3_client("elb")
+    client.delete_load_balancer(LoadBalancerName=name)
+
+
+def delete_load_balancers(env_name: str) -> None:
     for elb in describe_load_balancers(env_name=env_name):
-        client.delete_load_balancer(LoadBalancerName=elb["LoadBalancerName"])
+        delete_load_balancer(name=elb["LoadBalancerName"])
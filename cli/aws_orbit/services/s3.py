@@ -15,56 +15,123 @@
 import concurrent.futures
 import logging
 import random
+import threading
 import time
-from itertools import repeat
-from typing import Any, Dict, List, Optional, cast
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, cast
 
 from botocore.exceptions import ClientError
 
-from aws_orbit.utils import boto3_client, boto3_resource, chunkify
+from aws_orbit.utils import boto3_client, boto3_resource
 
 _logger: logging.Logger = logging.getLogger(__name__)
 
 
-def list_keys(bucket: str) -> List[Dict[str, str]]:
+DELETE_MAX_KEYS = 1_000  # DeleteObjects limit
+DELETE_WORKERS = 8
+DELETE_MAX_ATTEMPTS = 8
+DELETE_PROGRESS_INTERVAL = 30.0
+_THROTTLING_CODES = ("SlowDown", "ServiceUnavailable", "InternalError", "RequestLimitExceeded", "Throttling")
+
+
+class _Backoff:
+    """Delay shared by the workers deleting from one bucket, doubling on throttling and halving on success"""
+
+    def __init__(self, base: float = 0.5, maximum: float = 30.0) -> None:
+        self.base = base
+        self.maximum = maximum
+        self.delay = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        delay = self.delay
+        if delay:
+            time.sleep(random.uniform(delay / 2, delay))
+
+    def throttled(self) -> None:
+        with self._lock:
+            self.delay = min(self.maximum, max(self.base, self.delay * 2))
+
+    def succeeded(self) -> None:
+        with self._lock:
+            self.delay = self.delay / 2 if self.delay > self.base else 0.0
+
+
+def iter_keys(bucket: str) -> Iterator[List[Dict[str, str]]]:
+    """Every version and delete marker of ``bucket``, one page of at most 1,000 keys at a time"""
     client_s3 = boto3_client("s3")
     paginator = client_s3.get_paginator("list_object_versions")
-    response_iterator = paginator.paginate(Bucket=bucket, PaginationConfig={"PageSize": 1000})
-    keys: List[Dict[str, str]] = []
+    response_iterator = paginator.paginate(Bucket=bucket, PaginationConfig={"PageSize": DELETE_MAX_KEYS})
     for page in response_iterator:
-        if "DeleteMarkers" in page:
-            for delete_marker in page["DeleteMarkers"]:
-                keys.append(
-                    {
-                        "Key": delete_marker["Key"],
-                        "VersionId": delete_marker["VersionId"],
-                    }
-                )
-        if "Versions" in page:
-            for version in page["Versions"]:
-                keys.append({"Key": version["Key"], "VersionId": version["VersionId"]})
-    return keys
-
-
-def _delete_objects(bucket: str, chunk: List[Dict[str, str]]) -> None:
-    client_s3 = boto3_client("s3")
-    try:
-        client_s3.delete_objects(Bucket=bucket, Delete={"Objects": chunk})
-    except client_s3.exceptions.ClientError as ex:
-        if "SlowDown" in str(ex):
-            time.sleep(random.randint(3, 10))
-            client_s3.delete_objects(Bucket=bucket, Delete={"Objects": chunk})
+        keys: List[Dict[str, str]] = []
+        for delete_marker in page.get("DeleteMarkers", []):
+            keys.append({"Key": delete_marker["Key"], "VersionId": delete_marker["VersionId"]})
+        for version in page.get("Versions", []):
+            keys.append({"Key": version["Key"], "VersionId": version["VersionId"]})
+        if keys:
+            yield keys
 
 
-def delete_objects(bucket: str, keys: Optional[List[str]] = None) -> None:
+def list_keys(bucket: str) -> List[Dict[str, str]]:
+    return [key for keys in iter_keys(bucket=bucket) for key in keys]
+
+
+def _delete_objects(bucket: str, chunk: List[Dict[str, str]], backoff: _Backoff) -> int:
+    client_s3 = boto3_client("s3")
+    for attempt in range(1, DELETE_MAX_ATTEMPTS + 1):
+        backoff.wait()
+        try:
+            response = client_s3.delete_objects(Bucket=bucket, Delete={"Objects": chunk, "Quiet": True})
+        except ClientError as ex:
+            if ex.response["Error"]["Code"] not in _THROTTLING_CODES or attempt == DELETE_MAX_ATTEMPTS:
+                raise
+            _logger.debug("Deleting from %s throttled (%s), attempt %s", bucket, ex.response["Error"]["Code"], attempt)
+            backoff.throttled()
+            continue
+        errors = response.get("Errors", [])
+        retryable = [e for e in errors if e["Code"] in _THROTTLING_CODES]
+        if len(retryable) < len(errors):
+            failed = [e for e in errors if e["Code"] not in _THROTTLING_CODES]
+            raise RuntimeError(f"Failed to delete {len(failed)} objects from {bucket}, first: {failed[0]}")
+        if not retryable:
+            backoff.succeeded()
+            return len(chunk)
+        backoff.throttled()
+        if attempt == DELETE_MAX_ATTEMPTS:
+            raise RuntimeError(f"Failed to delete {len(retryable)} objects from {bucket}, first: {retryable[0]}")
+        retried = {(e["Key"], e.get("VersionId")) for e in retryable}
+        chunk = [k for k in chunk if (k["Key"], k.get("VersionId")) in retried]
+    return 0
+
+
+def delete_objects(bucket: str, keys: Optional[List[str]] = None, workers: int = DELETE_WORKERS) -> None:
+    """Delete ``keys``, or every version and delete marker of ``bucket``.
+
+    Keys are listed page by page while up to ``workers`` DeleteObjects requests run, with at most two pages per
+    worker waiting, so memory stays flat whatever the size of the bucket.
+    """
     if keys is None:
-        keys_pairs: List[Dict[str, str]] = list_keys(bucket=bucket)
+        chunks: Iterable[List[Dict[str, str]]] = iter_keys(bucket=bucket)
     else:
-        keys_pairs = [{"Key": k} for k in keys]
-    if keys_pairs:
-        chunks: List[List[Dict[str, str]]] = chunkify(lst=keys_pairs, max_length=1_000)
-        with concurrent.futures.ThreadPoolExecutor(max_workers=len(chunks)) as executor:
-            list(executor.map(_delete_objects, repeat(bucket), chunks))
+        chunks = ([{"Key": k} for k in keys[i : i + DELETE_MAX_KEYS]] for i in range(0, len(keys), DELETE_MAX_KEYS))
+    backoff = _Backoff()
+    deleted = 0
+    last_report = time.monotonic()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        in_flight: Set["concurrent.futures.Future[int]"] = set()
+        try:
+            for chunk in chunks:
+                if len(in_flight) >= workers * 2:
+                    done, in_flight = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+                    deleted += sum(f.result() for f in done)
+                    if time.monotonic() - last_report >= DELETE_PROGRESS_INTERVAL:
+                        _logger.info("Deleted %s objects from %s so far", deleted, bucket)
+                        last_report = time.monotonic()
+                in_flight.add(executor.submit(_delete_objects, bucket, chunk, backoff))
+            deleted += sum(f.result() for f in concurrent.futures.as_completed(in_flight))
+        finally:
+            for future in in_flight:
+                future.cancel()
+    _logger.debug("Deleted %s objects from %s", deleted, bucket)
 
 
 def delete_bucket(bucket: str) -> None:
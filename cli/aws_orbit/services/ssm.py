@@ -12,52 +12,145 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 
+import concurrent.futures
 import json
 import logging
+import os
+import threading
 import time
-from typing import Any, Dict, List, Optional, cast
+from typing import Any, Dict, List, Optional, Tuple, cast
 
-from aws_orbit.utils import boto3_client
+from aws_orbit.utils import boto3_client, get_account_id, get_region
 
 _logger: logging.Logger = logging.getLogger(__name__)
 
+# Parameter values are cached locally for this many seconds, keyed by parameter version. 0 disables the cache
+CACHE_TTL = int(os.environ.get("AWS_ORBIT_SSM_CACHE_TTL", "0"))
+CACHE_DIR = ".orbit.out"
+GET_PARAMETERS_MAX_NAMES = 10
+GET_PARAMETERS_WORKERS = 4
+PUT_PARAMETERS_WORKERS = 4
+
+_cache_lock = threading.Lock()
+
+# Version of the parameters last read or written by this process, with the value it read or last asked to write.
+# Only values that differ from the latter are written.
+_seen_lock = threading.Lock()
+_seen: Dict[str, Tuple[int, str, str]] = {}
+_MISSING = object()
+
 
 def put_parameter(name: str, obj: Dict[str, Any]) -> None:
     client = boto3_client(service_name="ssm")
+    value = str(json.dumps(obj=obj, sort_keys=True))
     retries = 3
-    while retries > 0:
+    while True:
         try:
-            client.put_parameter(
+            response = client.put_parameter(
                 Name=name,
-                Value=str(json.dumps(obj=obj, sort_keys=True)),
+                Value=value,
                 Overwrite=True,
                 Tier="Intelligent-Tiering",
                 Type="String",
             )
+            _remember(name=name, version=response["Version"], value=value)
             break
         except client.exceptions.TooManyUpdates as err:
-            if retries < 3:
-                _logger.warning("An error occurred (TooManyUpdates) when calling the PutParameter operation. Retrying")
-                retries -= 1
-                time.sleep(2 ** (4 - retries))
-
+            retries -= 1
             if retries == 0:
                 raise Exception(err)
+            _logger.warning("An error occurred (TooManyUpdates) when calling the PutParameter operation. Retrying")
+            time.sleep(2 ** (4 - retries))
+
+
+def _remember(name: str, version: int, value: str, requested: Optional[str] = None) -> None:
+    with _seen_lock:
+        _seen[name] = (version, value, value if requested is None else requested)
+
+
+def _merge(base: Dict[str, Any], ours: Dict[str, Any], theirs: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    """Three-way merge of top level keys, keys only changed on one side keep that side's value.
+
+    Returns the merged value and the keys both sides changed, which take our value.
+    """
+    merged = dict(theirs)
+    conflicts = []
+    for key in set(base) | set(ours) | set(theirs):
+        if ours.get(key, _MISSING) == base.get(key, _MISSING):
+            continue
+        if theirs.get(key, _MISSING) not in (base.get(key, _MISSING), ours.get(key, _MISSING)):
+            conflicts.append(key)
+        if key in ours:
+            merged[key] = ours[key]
+        else:
+            merged.pop(key, None)
+    return merged, sorted(conflicts)
+
+
+def put_parameters_if_changed(objs: Dict[str, Dict[str, Any]]) -> List[str]:
+    """Write the parameters whose value changed since this process last read or wrote them, concurrently.
+
+    Only the top level keys changed since then are written over the stored value, so writes by someone else in the
+    meantime (the parameter version moved) are kept unless they changed the same keys. Returns the names written.
+    """
+    values = {name: str(json.dumps(obj=obj, sort_keys=True)) for name, obj in objs.items()}
+    with _seen_lock:
+        seen = {name: _seen[name] for name in values if name in _seen}
+    changed = [name for name in values if name not in seen or seen[name][2] != values[name]]
+    if not changed:
+        _logger.debug("No SSM parameter changed")
+        return []
+
+    current = _get_raw_parameters(names=[n for n in changed if n in seen])
+    to_write: Dict[str, Dict[str, Any]] = {}
+    for name in changed:
+        if name not in current:
+            to_write[name] = objs[name]
+            continue
+        version, stored_value, requested_value = seen[name]
+        if current[name][0] != version:
+            _logger.debug("%s moved from version %s to %s", name, version, current[name][0])
+            stored_value = current[name][1]
+        obj, conflicts = _merge(base=json.loads(requested_value), ours=objs[name], theirs=json.loads(stored_value))
+        if conflicts and current[name][0] != version:
+            _logger.warning("%s was changed concurrently, overwriting the other writer's %s", name, conflicts)
+        if str(json.dumps(obj=obj, sort_keys=True)) == current[name][1]:
+            _remember(name=name, version=current[name][0], value=current[name][1], requested=values[name])
+        else:
+            to_write[name] = obj
+
+    if to_write:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(PUT_PARAMETERS_WORKERS, len(to_write))) as executor:
+            list(executor.map(lambda item: put_parameter(name=item[0], obj=item[1]), to_write.items()))
+    # The next write is compared with what was asked here, the stored value may also hold other writers' keys
+    for name in to_write:
+        version, stored_value, _ = _seen[name]
+        _remember(name=name, version=version, value=stored_value, requested=values[name])
+    _logger.debug("SSM parameters written: %s", list(to_write))
+    return list(to_write)
+
+
+def seen_parameters(prefix: str) -> List[str]:
+    """Parameters under ``prefix`` this process has read or written"""
+    with _seen_lock:
+        return [name for name in _seen if name.startswith(prefix)]
 
 
 def get_parameter(name: str) -> Dict[str, Any]:
     client = boto3_client(service_name="ssm")
-    json_str: str = client.get_parameter(Name=name)["Parameter"]["Value"]
-    return cast(Dict[str, Any], json.loads(json_str))
+    parameter = client.get_parameter(Name=name)["Parameter"]
+    _remember(name=name, version=parameter["Version"], value=parameter["Value"])
+    return cast(Dict[str, Any], json.loads(parameter["Value"]))
 
 
 def get_parameter_if_exists(name: str) -> Optional[Dict[str, Any]]:
     client = boto3_client(service_name="ssm")
     try:
-        json_str: str = client.get_parameter(Name=name)["Parameter"]["Value"]
+        parameter = client.get_parameter(Name=name)["Parameter"]
     except client.exceptions.ParameterNotFound:
         return None
-    return cast(Dict[str, Any], json.loads(json_str))
+    _remember(name=name, version=parameter["Version"], value=parameter["Value"])
+    return cast(Dict[str, Any], json.loads(parameter["Value"]))
 
 
 def does_parameter_exist(name: str) -> bool:
@@ -69,7 +162,8 @@ def does_parameter_exist(name: str) -> bool:
         return False
 
 
-def list_parameters(prefix: str) -> List[str]:
+def describe_parameters(prefix: str) -> Dict[str, int]:
+    """Names of the String parameters under ``prefix`` with their current version"""
     client = boto3_client(service_name="ssm")
     paginator = client.get_paginator("describe_parameters")
     response_iterator = paginator.paginate(
@@ -83,15 +177,102 @@ def list_parameters(prefix: str) -> List[str]:
             },
             {"Key": "Name", "Option": "BeginsWith", "Values": [prefix]},
         ],
+        PaginationConfig={"PageSize": 50},
     )
-    ret: List[str] = []
+    ret: Dict[str, int] = {}
     for page in response_iterator:
         for par in page.get("Parameters"):
-            ret.append(par["Name"])
+            ret[par["Name"]] = par["Version"]
+    return ret
+
+
+def list_parameters(prefix: str) -> List[str]:
+    return list(describe_parameters(prefix=prefix))
+
+
+def _cache_path() -> str:
+    # Parameter names repeat across accounts and regions, each pair gets its own cache file
+    return os.path.join(CACHE_DIR, f"ssm-cache-{get_account_id()}-{get_region()}.json")
+
+
+def _load_cache(path: str) -> Dict[str, Dict[str, Any]]:
+    try:
+        with open(path, "r") as file:
+            return cast(Dict[str, Dict[str, Any]], json.load(file))
+    except (OSError, ValueError):
+        return {}
+
+
+def _store_cache(path: str, entries: Dict[str, Dict[str, Any]]) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    now = time.time()
+    with _cache_lock:
+        cache = {k: v for k, v in _load_cache(path=path).items() if now - v["CachedAt"] < CACHE_TTL}
+        cache.update(entries)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}"
+        with open(tmp_path, "w") as file:
+            json.dump(cache, file)
+        os.replace(tmp_path, path)
+
+
+def _get_raw_parameters(names: List[str]) -> Dict[str, Tuple[int, str]]:
+    """Version and raw value of the ``names`` parameters, fetched ten per call with the calls running concurrently"""
+    if not names:
+        return {}
+    client = boto3_client(service_name="ssm")
+
+    def fetch(batch: List[str]) -> List[Dict[str, Any]]:
+        return cast(List[Dict[str, Any]], client.get_parameters(Names=batch)["Parameters"])
+
+    batches = [names[i : i + GET_PARAMETERS_MAX_NAMES] for i in range(0, len(names), GET_PARAMETERS_MAX_NAMES)]
+    ret: Dict[str, Tuple[int, str]] = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(GET_PARAMETERS_WORKERS, len(batches))) as executor:
+        for parameters in executor.map(fetch, batches):
+            for parameter in parameters:
+                ret[parameter["Name"]] = (parameter["Version"], parameter["Value"])
     return ret
 
 
+def get_parameters(names: List[str], versions: Optional[Dict[str, int]] = None) -> Dict[str, Dict[str, Any]]:
+    """Values of the ``names`` parameters, names that do not exist are left out.
+
+    Parameters are fetched ten per call, with the calls running concurrently. When ``versions`` is given and the local
+    cache is enabled (AWS_ORBIT_SSM_CACHE_TTL), parameters cached at their current version are not fetched again.
+    """
+    names = list(dict.fromkeys(names))
+    raw: Dict[str, Tuple[int, str]] = {}
+    cache_enabled = CACHE_TTL > 0 and versions is not None
+    if cache_enabled:
+        cache_path = _cache_path()
+        now = time.time()
+        for name, entry in _load_cache(path=cache_path).items():
+            if (
+                name in names
+                and entry["Version"] == cast(Dict[str, int], versions).get(name)
+                and now - entry["CachedAt"] < CACHE_TTL
+            ):
+                raw[name] = (entry["Version"], entry["Value"])
+        _logger.debug("SSM parameters found in the local cache: %s", list(raw))
+
+    fetched = _get_raw_parameters(names=[n for n in names if n not in raw])
+    raw.update(fetched)
+    if cache_enabled and fetched:
+        _store_cache(
+            path=cache_path,
+            entries={
+                n: {"Version": version, "Value": value, "CachedAt": time.time()}
+                for n, (version, value) in fetched.items()
+            },
+        )
+    for name, (version, value) in raw.items():
+        _remember(name=name, version=version, value=value)
+    return {name: cast(Dict[str, Any], json.loads(raw[name][1])) for name in names if name in raw}
+
+
 def delete_parameters(parameters: List[str]) -> None:
+    with _seen_lock:
+        for name in parameters:
+            _seen.pop(name, None)
     if parameters:
         if len(parameters) < 10:
             client = boto3_client(service_name="ssm")
@@ -1,7 +1,8 @@
 import logging
+import os
 import shlex
 import subprocess
-from typing import Iterable, Optional
+from typing import Dict, Iterable, Optional
 
 from aws_orbit.exceptions import FailedShellCommand
 
@@ -13,8 +14,14 @@ def _clean_up_stdout_line(line: bytes) -> str:
     return line_str[:-1] if line_str.endswith("\n") else line_str
 
 
-def _run_iterating(cmd: str, cwd: Optional[str] = None) -> Iterable[str]:
-    p = subprocess.Popen(shlex.split(cmd), cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+def _run_iterating(cmd: str, cwd: Optional[str] = None, env: Optional[Dict[str, str]] = None) -> Iterable[str]:
+    p = subprocess.Popen(
+        shlex.split(cmd),
+        cwd=cwd,
+        env=None if env is None else {**os.environ, **env},
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
     if p.stdout is None:
         return []
     while p.poll() is None:
@@ -23,10 +30,10 @@ def _run_iterating(cmd: str, cwd: Optional[str] = None) -> Iterable[str]:
         raise FailedShellCommand(f"Exit code: {p.returncode}")
 
 
-def run(cmd: str, cwd: Optional[str] = None, hide_cmd: bool = False) -> None:
+def run(cmd: str, cwd: Optional[str] = None, hide_cmd: bool = False, env: Optional[Dict[str, str]] = None) -> None:
     if hide_cmd is False:
         _logger.debug(f"+ {cmd}")
-    for line in _run_iterating(cmd=cmd, cwd=cwd):
+    for line in _run_iterating(cmd=cmd, cwd=cwd, env=env):
         _logger.debug(line)
 
 
@@ -36,3 +43,15 @@ def run_iterating(cmd: str, cwd: Optional[str] = None, hide_cmd: bool = False) -
     for line in _run_iterating(cmd=cmd, cwd=cwd):
         _logger.debug(line)
         yield line
+
+
+def run_capturing(cmd: str, cwd: Optional[str] = None, hide_cmd: bool = False) -> str:
+    """Run ``cmd`` and return its stdout, stderr is only logged"""
+    if hide_cmd is False:
+        _logger.debug(f"+ {cmd}")
+    p = subprocess.run(shlex.split(cmd), cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    for line in p.stderr.decode("utf-8").splitlines():
+        _logger.debug(line)
+    if p.returncode != 0:
+        raise FailedShellCommand(f"Exit code: {p.returncode}")
+    return p.stdout.decode("utf-8")
@@ -0,0 +1,218 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License").
+#    You may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""Deploy phase tracing.
+
+Spans are recorded as Chrome trace events, the files written under .orbit.out/<env>/traces open in
+chrome://tracing or https://ui.perfetto.dev. Spans recorded inside the remote CodeBuild are uploaded to the toolkit
+bucket when the remote function returns and merged into the local trace as a separate process.
+"""
+
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar, cast
+
+import botocore.exceptions
+from dataclasses import dataclass
+
+from aws_orbit.services import s3
+
+_logger: logging.Logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+TRACES_S3_PREFIX = "cli/remote/traces"
+LOCAL_PID = 1
+REMOTE_PID = 2
+
+_lock = threading.Lock()
+_events: List[Dict[str, Any]] = []
+_threads: Dict[str, int] = {}  # Thread name to trace tid, so each team scheduler thread gets its own track
+
+
+def is_remote() -> bool:
+    return "CODEBUILD_BUILD_ID" in os.environ
+
+
+def _pid() -> int:
+    return REMOTE_PID if is_remote() else LOCAL_PID
+
+
+def _now() -> int:
+    return int(time.time() * 1_000_000)  # Wall clock, local and remote spans share one timeline
+
+
+def _tid() -> int:
+    name = threading.current_thread().name
+    with _lock:
+        if name not in _threads:
+            _threads[name] = len(_threads) + 1
+        return _threads[name]
+
+
+def _metadata(pid: int, threads: Dict[str, int]) -> List[Dict[str, Any]]:
+    events: List[Dict[str, Any]] = [
+        {
+            "name": "process_name",
+            "ph": "M",
+            "pid": pid,
+            "tid": 0,
+            "args": {"name": "codebuild" if pid == REMOTE_PID else "cli"},
+        }
+    ]
+    events.extend(
+        {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+        for name, tid in threads.items()
+    )
+    return events
+
+
+def _record(name: str, category: str, start: int, tid: int, args: Dict[str, Any]) -> None:
+    event: Dict[str, Any] = {
+        "name": name,
+        "cat": category,
+        "ph": "X",
+        "ts": start,
+        "dur": _now() - start,
+        "pid": _pid(),
+        "tid": tid,
+        "args": args,
+    }
+    with _lock:
+        _events.append(event)
+
+
+@contextmanager
+def span(name: str, category: str = "orbit", **args: Any) -> Iterator[None]:
+    start = _now()
+    tid = _tid()
+    try:
+        yield
+    except BaseException as e:
+        args["error"] = str(e) or type(e).__name__
+        raise
+    finally:
+        _record(name=name, category=category, start=start, tid=tid, args=args)
+
+
+def traced(name: Optional[str] = None, category: str = "orbit") -> Callable[[F], F]:
+    """Record every call of the decorated function as a span, named <module>.<function> by default"""
+
+    def decorator(func: F) -> F:
+        span_name = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(span_name, category=category):
+                return func(*args, **kwargs)
+
+        return cast(F, wrapper)
+
+    return decorator
+
+
+def _dump() -> Dict[str, Any]:
+    with _lock:
+        events = list(_events)
+        threads = dict(_threads)
+    return {"traceEvents": _metadata(pid=_pid(), threads=threads) + events, "displayTimeUnit": "ms"}
+
+
+def _remote_key(env_name: str, name: str) -> str:
+    return f"{TRACES_S3_PREFIX}/{env_name}/{name}.json"
+
+
+def _merge_remote(bucket: str, key: str, start: int, end: int) -> None:
+    try:
+        trace = json.loads(s3.get_object(bucket=bucket, key=key))
+    except (botocore.exceptions.ClientError, ValueError) as e:
+        _logger.debug("No remote trace at s3://%s/%s: %s", bucket, key, e)
+        return
+    spans = [e for e in trace.get("traceEvents", []) if e.get("ph") == "X"]
+    if not spans:
+        return
+    first = min(e["ts"] for e in spans)
+    last = max(e["ts"] + e["dur"] for e in spans)
+    if first < start:
+        _logger.debug("Ignoring the remote trace at s3://%s/%s, it belongs to an earlier run", bucket, key)
+        return
+    tid = _tid()
+    with _lock:
+        _events.extend(trace["traceEvents"])
+        # Bundling, upload, CodeBuild queueing and provisioning happen before the first remote span
+        _events.append(_local_span(name="codebuild startup", start=start, end=first, tid=tid))
+        _events.append(_local_span(name="codebuild shutdown", start=last, end=max(last, end), tid=tid))
+
+
+def _local_span(name: str, start: int, end: int, tid: int) -> Dict[str, Any]:
+    return {"name": name, "cat": "remote", "ph": "X", "ts": start, "dur": end - start, "pid": LOCAL_PID, "tid": tid}
+
+
+@contextmanager
+def remote_span(name: str, env_name: str, bucket: Optional[str]) -> Iterator[None]:
+    """Span around a call to a remote function.
+
+    In the CodeBuild the spans recorded so far are uploaded to the toolkit bucket once the function returns, locally
+    they are downloaded and merged when the call returns.
+    """
+    start = _now()
+    try:
+        with span(name, category="remote"):
+            yield
+    finally:
+        if bucket:
+            key = _remote_key(env_name=env_name, name=name)
+            try:
+                if is_remote():
+                    s3.upload_bytes(src=json.dumps(_dump()).encode("utf-8"), bucket=bucket, key=key)
+                else:
+                    _merge_remote(bucket=bucket, key=key, start=start, end=_now())
+            except Exception as e:
+                _logger.debug("Unable to propagate the %s trace: %s", name, e)
+
+
+@dataclass
+class Run:
+    name: str
+    env_name: Optional[str] = None  # Set once the manifest is loaded, the trace is written under its .orbit.out
+    path: Optional[str] = None
+
+
+@contextmanager
+def trace_run(name: str, env_name: Optional[str] = None) -> Iterator[Run]:
+    """Trace everything run inside as one CLI run, written to .orbit.out/<env>/traces/<name>-<timestamp>.json"""
+    run = Run(name=name, env_name=env_name)
+    with _lock:
+        _events.clear()
+    try:
+        with span(name, category="cli"):
+            yield run
+    finally:
+        run.path = write(env_name=run.env_name, name=name)
+        _logger.info("Trace written to %s, open it in chrome://tracing or https://ui.perfetto.dev", run.path)
+
+
+def write(env_name: Optional[str], name: str) -> str:
+    trace_dir = os.path.join(".orbit.out", env_name, "traces") if env_name else os.path.join(".orbit.out", "traces")
+    os.makedirs(trace_dir, exist_ok=True)
+    path = os.path.join(trace_dir, f"{name}-{datetime.now().strftime('%Y%m%dT%H%M%S')}.json")
+    with open(path, "w") as file:
+        json.dump(_dump(), file)
+    return path
@@ -17,9 +17,10 @@ import logging
 import math
 import os
 import random
+import threading
 import time
 from string import Template
-from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Union
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 import boto3
 import botocore.exceptions
@@ -37,28 +38,76 @@ def chunkify(lst: List[Any], num_chunks: int = 1, max_length: Optional[int] = No
     return [lst[i : i + num] for i in range(0, len(lst), num)]  # noqa: E203
 
 
+MAX_POOL_CONNECTIONS = 32  # Clients are shared between the worker threads of the deploy and teardown pools
+
+_BOTO3_LOCK = threading.Lock()
+_BOTO3_SESSIONS: Dict[Tuple[Optional[str], ...], boto3.Session] = {}
+_BOTO3_CLIENTS: Dict[Tuple[Optional[str], ...], Any] = {}
+_BOTO3_RESOURCES = threading.local()
+
+
 def get_botocore_config() -> botocore.config.Config:
     return botocore.config.Config(
         retries={"max_attempts": 5},
         connect_timeout=10,
-        max_pool_connections=10,
+        max_pool_connections=MAX_POOL_CONNECTIONS,
         user_agent_extra=f"awsorbit/{__version__}",
     )
 
 
+def _boto3_session_key() -> Tuple[Optional[str], ...]:
+    # Region and credentials can change between calls (e.g. env vars set by the remote CodeBuild), so they are part
+    # of the key and a change gets a new session instead of a stale client
+    return (
+        os.environ.get("AWS_REGION") or os.environ.get("AWS_DEFAULT_REGION"),
+        os.environ.get("AWS_PROFILE"),
+        os.environ.get("AWS_ACCESS_KEY_ID"),
+    )
+
+
+def _boto3_session(key: Tuple[Optional[str], ...]) -> boto3.Session:
+    # Sessions are not thread safe, callers hold _BOTO3_LOCK
+    session = _BOTO3_SESSIONS.get(key)
+    if session is None:
+        session = _BOTO3_SESSIONS[key] = boto3.Session()
+    return session
+
+
 def boto3_client(service_name: str) -> boto3.client:
-    return boto3.Session().client(service_name=service_name, use_ssl=True, config=get_botocore_config())
+    """Client shared by every thread for the current region and credentials, boto3 clients are thread safe"""
+    key = (service_name,) + _boto3_session_key()
+    client = _BOTO3_CLIENTS.get(key)
+    if client is None:
+        with _BOTO3_LOCK:
+            client = _BOTO3_CLIENTS.get(key)
+            if client is None:
+                client = _boto3_session(key[1:]).client(
+                    service_name=service_name, use_ssl=True, config=get_botocore_config()
+                )
+                _BOTO3_CLIENTS[key] = client
+    return client
 
 
 def boto3_resource(service_name: str) -> boto3.client:
-    return boto3.Session().resource(service_name=service_name, use_ssl=True, config=get_botocore_config())
+    """Resource for the current region and credentials, resources are not thread safe so each thread gets its own"""
+    key = (service_name,) + _boto3_session_key()
+    resources: Dict[Tuple[Optional[str], ...], Any] = _BOTO3_RESOURCES.__dict__.setdefault("resources", {})
+    resource = resources.get(key)
+    if resource is None:
+        with _BOTO3_LOCK:
+            resource = _boto3_session(key[1:]).resource(
+                service_name=service_name, use_ssl=True, config=get_botocore_config()
+            )
+        resources[key] = resource
+    return resource
 
 
 def get_region() -> str:
-    session = boto3.Session()
-    if session.region_name is None:
+    with _BOTO3_LOCK:
+        region = _boto3_session(_boto3_session_key()).region_name
+    if region is None:
         raise ValueError("It is not possible to infer AWS REGION from your environment.")
-    return str(session.region_name)
+    return str(region)
 
 
 def get_account_id() -> str:
@@ -0,0 +1,70 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License").
+#    You may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+"""Cost of a new boto3 Session and client per call against the clients cached by aws_orbit.utils.boto3_client.
+
+No AWS call is made, creating a client does not need credentials. With the CLI installed (pip install -e .):
+
+    python benchmarks/boto3_client_benchmark.py
+"""
+
+import argparse
+import os
+import threading
+import time
+from typing import Any, Callable, Set
+
+import boto3
+
+from aws_orbit import utils
+
+
+def _per_call(func: Callable[[], Any], calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - start) / calls
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--service", default="ssm")
+    parser.add_argument("--uncached-calls", type=int, default=200)
+    parser.add_argument("--cached-calls", type=int, default=100_000)
+    parser.add_argument("--threads", type=int, default=16)
+    args = parser.parse_args()
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+    uncached = _per_call(
+        lambda: boto3.Session().client(service_name=args.service, use_ssl=True, config=utils.get_botocore_config()),
+        calls=args.uncached_calls,
+    )
+    utils.boto3_client(args.service)
+    cached = _per_call(lambda: utils.boto3_client(args.service), calls=args.cached_calls)
+    print(f"new Session and client: {uncached * 1e3:.2f} ms per call")
+    print(f"utils.boto3_client:     {cached * 1e6:.2f} us per call ({uncached / cached:.0f}x faster)")
+
+    clients: Set[int] = set()
+    threads = [
+        threading.Thread(target=lambda: clients.add(id(utils.boto3_client(args.service)))) for _ in range(args.threads)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(f"distinct clients across {args.threads} threads: {len(clients)}")
+
+
+if __name__ == "__main__":
+    main()
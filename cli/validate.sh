@@ -22,3 +22,7 @@ black --check .
 mypy aws_orbit
 flake8 .
 cfn-lint -i E1029,E3031 -- aws_orbit/data/toolkit/template.yaml
+
+# Parsing the command line must not load the commands (boto3, kubernetes, CDK, plugins...), they import lazily
+python -X importtime -c "import aws_orbit.__main__" 2>&1 >/dev/null \
+    | (! grep -E "\|\s+(boto3|botocore|kubernetes|aws_cdk|aws_codeseeder|pkg_resources|aws_orbit\.(commands|services|models|remote_files|plugins))(\.\S+)?$")
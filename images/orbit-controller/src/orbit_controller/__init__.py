@@ -15,7 +15,10 @@
 import logging
 import os
 import subprocess
+import threading
+from typing import Any, Dict
 
+import boto3
 from kubernetes import config as k8_config
 from kubernetes import dynamic
 from kubernetes.client import api_client
@@ -57,14 +60,14 @@ def load_config(in_cluster: bool = True) -> None:
         k8_config.load_kube_config()
 
 
-def run_command(cmd: str) -> str:
+def run_command(cmd: str, timeout: int = 29) -> str:
     """ Module to run shell commands. """
     try:
         output = subprocess.check_output(
             cmd,
             stderr=subprocess.STDOUT,
             shell=True,
-            timeout=29,
+            timeout=timeout,
             universal_newlines=True,
         )
     except subprocess.CalledProcessError as exc:
@@ -78,4 +81,19 @@ def dynamic_client() -> dynamic.DynamicClient:
     return dynamic.DynamicClient(client=api_client.ApiClient())
 
 
+_boto3_lock = threading.Lock()
+_boto3_clients: Dict[str, Any] = {}
+
+
+def boto3_client(service_name: str) -> Any:
+    """Client of the default boto3 session shared by every handler thread, boto3 clients are thread safe"""
+    client = _boto3_clients.get(service_name)
+    if client is None:
+        with _boto3_lock:  # The default session is not
+            client = _boto3_clients.get(service_name)
+            if client is None:
+                client = _boto3_clients[service_name] = boto3.client(service_name)
+    return client
+
+
 logger = _get_logger()
@@ -17,18 +17,15 @@ import base64
 import json
 import logging
 import os
-import re
 import time
 from typing import Any, Dict, List, Optional, Tuple, Union, cast
 from urllib.parse import urlencode, urlparse
 
-import boto3
 import requests
 from flask import Flask, jsonify, render_template, request
 from jose import jwk, jwt
 from jose.utils import base64url_decode
-from kubernetes import dynamic
-from orbit_controller import dynamic_client
+from orbit_controller.utils import auth_utils
 
 _cognito_keys: Optional[List[Dict[str, str]]] = None
 
@@ -93,24 +90,7 @@ def logout(logger: logging.Logger, app: Flask) -> Any:
 
 
 def _is_profile_ready_for_user(logger: logging.Logger, username: str, email: str) -> bool:
-    profiles = _get_kf_profiles(dynamic_client())
-    for p in profiles:
-        logger.debug("profile %s", json.dumps(p))
-        owner = p["spec"].get("owner", {})
-        logger.debug("owner %s", json.dumps(owner))
-        user_email = owner.get("name", None)
-        if user_email and user_email == email:
-            return True
-    return False
-
-
-def _get_kf_profiles(client: dynamic.DynamicClient) -> List[Dict[str, Any]]:
-    try:
-        api = client.resources.get(api_version="v1", group="kubeflow.org", kind="Profile")
-        profiles = api.get()
-        return cast(List[Dict[str, Any]], profiles.to_dict().get("items", []))
-    except dynamic.exceptions.ResourceNotFoundError:
-        return []
+    return email in auth_utils.PROFILE_OWNERS.owners()
 
 
 # https://docs.aws.amazon.com/elasticloadbalancing/latest/application/listener-authenticate-users.html
@@ -123,11 +103,8 @@ def _get_user_info_from_jwt(logger: logging.Logger) -> Tuple[Any, Any, Optional[
     decoded_jwt_headers = decoded_jwt_headers_bytes.decode("utf-8")
     decoded_json = json.loads(decoded_jwt_headers)
     kid = decoded_json["kid"]
-    region = os.environ["AWS_REGION"]
     # Step 2: Get the public key from regional endpoint
-    url = "https://public-keys.auth.elb." + region + ".amazonaws.com/" + kid
-    req = requests.get(url)
-    pub_key = req.text
+    pub_key = auth_utils.get_elb_public_key(kid)
     # Step 3: Get the payload
     payload = jwt.decode(encoded_jwt, pub_key, algorithms=["ES256"])
     logger.debug("payload:\n %s", payload)
@@ -228,25 +205,6 @@ def get_claims(logger: logging.Logger, token: str) -> Dict[str, Union[str, int]]
 
 
 def _get_auth_group_from_ssm(logger: logging.Logger) -> Dict[str, List[str]]:
-    ssm_client = boto3.client("ssm")
-
-    team_info = {}
-    orbit_env = os.environ["ENV_NAME"]
-
-    team_manifest_pattern = re.compile(rf"/orbit/{orbit_env}/teams/.*/manifest")
-
-    paginator = ssm_client.get_paginator("describe_parameters")
-    page_iterator = paginator.paginate()
-
-    for page in page_iterator:
-        for path in page.get("Parameters"):
-            param = path.get("Name")
-
-            if team_manifest_pattern.fullmatch(param):
-                param_value = json.loads(ssm_client.get_parameter(Name=param).get("Parameter").get("Value"))
-                team = param.split("/")[-2]
-                auth_group_val = param_value.get("AuthenticationGroups")
-                team_info[team] = auth_group_val
-
-    logger.info(f"Team Info fetch: {team_info}")
+    team_info = auth_utils.TEAM_AUTH_GROUPS.get()
+    logger.debug(f"Team Info: {team_info}")
     return team_info
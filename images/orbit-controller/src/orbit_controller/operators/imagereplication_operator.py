@@ -19,10 +19,9 @@ import time
 from queue import Queue
 from typing import Any, Dict, Union, cast
 
-import boto3
 import kopf
-from orbit_controller import ORBIT_API_GROUP, ORBIT_API_VERSION, dynamic_client
-from orbit_controller.utils import imagereplication_utils
+from orbit_controller import ORBIT_API_GROUP, ORBIT_API_VERSION, boto3_client, dynamic_client
+from orbit_controller.utils import imagereplication_utils, metrics_utils
 
 LOCK: threading.Lock
 CONFIG: Dict[str, Any]
@@ -39,6 +38,7 @@ def _set_globals(logger: Union[kopf.Logger, logging.Logger]) -> None:
 
     global WORKERS_IN_PROCESS
     WORKERS_IN_PROCESS = 0
+    metrics_utils.REPLICATION_WORKERS.set(WORKERS_IN_PROCESS)
 
 
 @kopf.on.startup()
@@ -51,9 +51,27 @@ def configure(settings: kopf.OperatorSettings, logger: kopf.Logger, **_: Any) ->
     )
     settings.persistence.finalizer = "imagereplication-operator.orbit.aws/kopf-finalizer"
     settings.posting.level = logging.getLevelName(os.environ.get("EVENT_LOG_LEVEL", "INFO"))
+    metrics_utils.start_metrics_server(logger=logger)
     _set_globals(logger=logger)
 
 
+metrics_utils.count_events(__name__, ORBIT_API_GROUP, ORBIT_API_VERSION, "imagereplications")
+
+REPLICATION_STATUSES: Dict[str, str] = {}
+BACKLOG_STATUSES = ["Pending", "Scheduled", "Failed"]
+
+
+@kopf.on.event(ORBIT_API_GROUP, ORBIT_API_VERSION, "imagereplications")  # type: ignore
+def replication_backlog(type: str, namespace: str, name: str, status: kopf.Status, **_: Any) -> None:
+    with LOCK:
+        if type == "DELETED":
+            REPLICATION_STATUSES.pop(f"{namespace}/{name}", None)
+        else:
+            REPLICATION_STATUSES[f"{namespace}/{name}"] = status.get("replication", {}).get("replicationStatus")
+        backlog = len([s for s in REPLICATION_STATUSES.values() if s in BACKLOG_STATUSES])
+    metrics_utils.QUEUE_DEPTH.labels(metrics_utils.operator_name(__name__), "imagereplications").set(backlog)
+
+
 @kopf.on.resume(
     ORBIT_API_GROUP,
     ORBIT_API_VERSION,
@@ -68,6 +86,7 @@ def configure(settings: kopf.OperatorSettings, logger: kopf.Logger, **_: Any) ->
     field="status.replication",
     value=kopf.ABSENT,
 )
+@metrics_utils.timed
 def replication_checker(
     spec: kopf.Spec,
     status: kopf.Status,
@@ -98,6 +117,7 @@ def replication_checker(
     field="status.replication.replicationStatus",
     value="Pending",
 )
+@metrics_utils.timed
 def scheduler(status: kopf.Status, patch: kopf.Patch, logger: kopf.Logger, **_: Any) -> str:
     replication = status.get("replication", {})
     replication["codeBuildStatus"] = None
@@ -116,6 +136,7 @@ def scheduler(status: kopf.Status, patch: kopf.Patch, logger: kopf.Logger, **_:
             logger.debug("WORKERS_IN_PROCESS: %s", WORKERS_IN_PROCESS)
             if WORKERS_IN_PROCESS < CONFIG["workers"]:
                 WORKERS_IN_PROCESS += 1
+                metrics_utils.REPLICATION_WORKERS.set(WORKERS_IN_PROCESS)
                 replication["replicationStatus"] = "Scheduled"
                 replication["attempt"] = attempt
 
@@ -145,6 +166,7 @@ def _needs_rescheduling(status: kopf.Status, **_: Any) -> bool:
     interval=5,
     when=_needs_rescheduling,
 )
+@metrics_utils.timed
 def rescheduler(status: kopf.Status, patch: kopf.Patch, logger: kopf.Logger, **_: Any) -> str:
     logger.debug("Rescheduling")
     replication = status.get("replication", {})
@@ -168,6 +190,7 @@ def rescheduler(status: kopf.Status, patch: kopf.Patch, logger: kopf.Logger, **_
     field="status.replication.replicationStatus",
     value="Scheduled",
 )
+@metrics_utils.timed
 def codebuild_runner(
     spec: kopf.Spec,
     patch: kopf.Patch,
@@ -190,6 +213,7 @@ def codebuild_runner(
         with LOCK:
             global WORKERS_IN_PROCESS
             WORKERS_IN_PROCESS -= 1
+            metrics_utils.REPLICATION_WORKERS.set(WORKERS_IN_PROCESS)
 
     patch["status"] = {"replication": replication}
     if error:
@@ -208,12 +232,13 @@ def codebuild_runner(
     field="status.replication.replicationStatus",
     value="Replicating",
 )
+@metrics_utils.timed
 def codebuild_monitor(status: kopf.Status, patch: kopf.Patch, logger: kopf.Logger, **_: Any) -> str:
     replication = status.get("replication", {})
 
     build_id = replication.get("codeBuildId", None)
 
-    client = boto3.client("codebuild")
+    client = boto3_client("codebuild")
     build = client.batch_get_builds(ids=[build_id])["builds"][0]
     replication["codeBuildStatus"] = build["buildStatus"]
     replication["codeBuildPhase"] = build["currentPhase"]
@@ -223,6 +248,11 @@ def codebuild_monitor(status: kopf.Status, patch: kopf.Patch, logger: kopf.Logge
         with LOCK:
             global WORKERS_IN_PROCESS
             WORKERS_IN_PROCESS -= 1
+            metrics_utils.REPLICATION_WORKERS.set(WORKERS_IN_PROCESS)
+        if build.get("startTime") and build.get("endTime"):
+            metrics_utils.CODEBUILD_DURATION.labels(
+                metrics_utils.operator_name(__name__), build["buildStatus"]
+            ).observe((build["endTime"] - build["startTime"]).total_seconds())
         codebuild_attempts = replication.get("codeBuildAttempts", [])
         codebuild_attempts.append(
             {
@@ -12,17 +12,17 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 
-import json
 import logging
 import os
-from typing import Any, Dict, List, Optional, Tuple, cast
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
 
-import boto3
-import botocore
 import kopf
 from kubernetes.client import (
     BatchV1Api,
     BatchV1beta1Api,
+    CustomObjectsApi,
     V1beta1CronJob,
     V1beta1CronJobSpec,
     V1beta1CronJobStatus,
@@ -31,22 +31,21 @@ from kubernetes.client import (
     V1ObjectMeta,
 )
 from orbit_controller import ORBIT_API_GROUP, ORBIT_API_VERSION
-from orbit_controller.utils import job_utils
-
-ENV_CONTEXT: Optional[Dict[str, Any]] = None
-
-
-def _get_parameter(client: boto3.client, name: str) -> Optional[Dict[str, Any]]:
-    try:
-        return cast(Dict[str, Any], json.loads(client.get_parameter(Name=name)["Parameter"]["Value"]))
-    except botocore.errorfactory.ParameterNotFound:
-        return None
-
+from orbit_controller.utils import (
+    admission_utils,
+    context_utils,
+    job_utils,
+    metrics_utils,
+    retention_utils,
+    shard_utils,
+)
 
-def _load_env_context_from_ssm(env_name: str) -> Optional[Dict[str, Any]]:
-    ssm = boto3.client("ssm")
-    context_parameter_name: str = f"/orbit/{env_name}/context"
-    return _get_parameter(ssm, name=context_parameter_name)
+ADMISSION_CONFIG: Dict[str, Any] = admission_utils.get_config()
+ADMISSION_LOCK = threading.Lock()
+# Jobs admitted by this process whose status change has not yet reached the orbitjobs_idx
+ADMITTED: Dict[Tuple[str, str], float] = {}
+ADMISSION_PLAN: Dict[str, Any] = {"computed_at": 0.0, "admitted": set(), "positions": {}}
+SHARDS = shard_utils.ShardMembership(group="orbitjob-operator", config=shard_utils.get_config())
 
 
 @kopf.on.startup()
@@ -59,9 +58,86 @@ def configure(settings: kopf.OperatorSettings, logger: kopf.Logger, **_: Any) ->
     )
     settings.persistence.finalizer = "orbitjob-operator.orbit.aws/kopf-finalizer"
     settings.posting.level = logging.getLevelName(os.environ.get("EVENT_LOG_LEVEL", "INFO"))
+    metrics_utils.start_metrics_server(logger=logger)
+    SHARDS.start(logger=logger, on_change=lambda: _rebalance(logger=logger))
 
 
-def _should_index_jobs(meta: kopf.Meta, logger: kopf.Logger, **_: Any) -> bool:
+@kopf.on.cleanup()
+def cleanup(logger: kopf.Logger, **_: Any) -> None:
+    SHARDS.stop(logger=logger)
+
+
+def _claim(api: Any, namespace: str, name: str, annotations: Dict[str, str], **kwargs: Any) -> bool:
+    if not SHARDS.ring_owns(namespace) or annotations.get(shard_utils.SHARD_ANNOTATION) == SHARDS.identity:
+        return False
+    # Touching the object makes every replica re-evaluate its handler and index filters
+    api(
+        namespace=namespace,
+        name=name,
+        body={"metadata": {"annotations": {shard_utils.SHARD_ANNOTATION: SHARDS.identity}}},
+        **kwargs,
+    )
+    return True
+
+
+def _rebalance(logger: Union[kopf.Logger, logging.Logger]) -> None:
+    """Claim the unfinished OrbitJobs, and their k8s Jobs, in the namespaces the hash ring assigns to this replica"""
+    custom_objects_api = CustomObjectsApi()
+    claimed = 0
+    _continue = None
+    while True:
+        page = custom_objects_api.list_cluster_custom_object(
+            group=ORBIT_API_GROUP, version=ORBIT_API_VERSION, plural="orbitjobs", limit=500, _continue=_continue
+        )
+        for oj in page.get("items", []):
+            if (
+                oj.get("status", {}).get("orbitJobOperator", {}).get("jobStatus")
+                in retention_utils.FINISHED_JOB_STATUSES
+            ):
+                continue
+            claimed += _claim(
+                custom_objects_api.patch_namespaced_custom_object,
+                namespace=oj["metadata"]["namespace"],
+                name=oj["metadata"]["name"],
+                annotations=oj["metadata"].get("annotations", {}),
+                group=ORBIT_API_GROUP,
+                version=ORBIT_API_VERSION,
+                plural="orbitjobs",
+            )
+        _continue = page.get("metadata", {}).get("continue")
+        if not _continue:
+            break
+
+    for list_func, patch_func in [
+        (BatchV1Api().list_job_for_all_namespaces, BatchV1Api().patch_namespaced_job),
+        (BatchV1beta1Api().list_cron_job_for_all_namespaces, BatchV1beta1Api().patch_namespaced_cron_job),
+    ]:
+        for job in list_func(label_selector="app=orbit-runner").items:
+            if not any(o.kind == "OrbitJob" for o in job.metadata.owner_references or []):
+                continue
+            if getattr(job.status, "completion_time", None):
+                continue
+            claimed += _claim(
+                patch_func,
+                namespace=job.metadata.namespace,
+                name=job.metadata.name,
+                annotations=job.metadata.annotations or {},
+            )
+    logger.info("Shard %s of %s claimed %s objects", SHARDS.identity, SHARDS.members, claimed)
+
+
+def _owns(namespace: str, annotations: kopf.Annotations, **_: Any) -> bool:
+    return SHARDS.owns(namespace, annotations)
+
+
+metrics_utils.count_events(__name__, ORBIT_API_GROUP, ORBIT_API_VERSION, "orbitjobs")
+
+
+def _should_index_jobs(
+    namespace: str, annotations: kopf.Annotations, meta: kopf.Meta, logger: kopf.Logger, **_: Any
+) -> bool:
+    if not SHARDS.owns(namespace, annotations):
+        return False
     for owner_reference in meta.get("ownerReferences", []):
         if owner_reference.get("kind") == "OrbitJob":
             return True
@@ -79,11 +155,14 @@ def jobs_idx(
 
 
 def _monitor_k8s_job(
+    namespace: str,
+    labels: kopf.Labels,
+    annotations: kopf.Annotations,
     status: kopf.Status,
     logger: kopf.Logger,
     **_: Any,
 ) -> bool:
-    if (status.get("create_job", "")).startswith("Job"):
+    if labels.get("k8sJobType") == "Job" and SHARDS.owns(namespace, annotations):
         if status.get("orbitJobOperator", {}).get("jobStatus", None) in ["Complete", "Failed"]:
             return False
         else:
@@ -109,12 +188,15 @@ def podsettings_idx(
     }
 
 
-def _should_process_orbitjob(status: kopf.Status, **_: Any) -> bool:
+def _should_process_orbitjob(namespace: str, annotations: kopf.Annotations, status: kopf.Status, **_: Any) -> bool:
+    if not SHARDS.owns(namespace, annotations):
+        return False
     return "orbitJobOperator" not in status or "jobStatus" not in status["orbitJobOperator"]
 
 
 @kopf.on.resume(ORBIT_API_GROUP, ORBIT_API_VERSION, "orbitjobs", when=_should_process_orbitjob)  # type: ignore
 @kopf.on.create(ORBIT_API_GROUP, ORBIT_API_VERSION, "orbitjobs", when=_should_process_orbitjob)
+@metrics_utils.timed
 def create_job(
     namespace: str,
     name: str,
@@ -128,6 +210,7 @@ def create_job(
     podsettings_idx: kopf.Index[Tuple[str, str], Dict[str, Any]],
     **_: Any,
 ) -> str:
+    patch["metadata"] = {"annotations": {shard_utils.SHARD_ANNOTATION: SHARDS.identity}}
     ns: Optional[Dict[str, Any]] = None
     for ns in namespaces_idx.get(namespace, []):
         logger.debug("ns: %s", ns)
@@ -138,19 +221,37 @@ def create_job(
         }
         return "JobCreationFailed"
 
-    env = ns["env"]
-    team = ns["team"]
+    if not spec.get("schedule") and ADMISSION_CONFIG["enabled"]:
+        logger.info("Queueing OrbitJob for admission")
+        patch["status"] = {"orbitJobOperator": {"jobStatus": admission_utils.QUEUED_JOB_STATUS}}
+        return "Queued"
+
+    return _create_k8s_job(
+        namespace=namespace,
+        env=ns["env"],
+        team=ns["team"],
+        spec=spec,
+        patch=patch,
+        logger=logger,
+        podsettings_idx=podsettings_idx,
+    )
 
-    global ENV_CONTEXT  # Caching
-    if ENV_CONTEXT is None:
-        context = _load_env_context_from_ssm(env)
-        if context is None:
-            patch["status"] = {
-                "orbitJobOperator": {"jobStatus": "JobCreationFailed", "error": "Unable to load Env Context from SSM"}
-            }
-            return "JobCreationFailed"
-        else:
-            ENV_CONTEXT = context
+
+def _create_k8s_job(
+    namespace: str,
+    env: str,
+    team: str,
+    spec: kopf.Spec,
+    patch: kopf.Patch,
+    logger: kopf.Logger,
+    podsettings_idx: kopf.Index[Tuple[str, str], Dict[str, Any]],
+) -> str:
+    env_context = context_utils.get_env_context(env=env, logger=logger)
+    if env_context is None:
+        patch["status"] = {
+            "orbitJobOperator": {"jobStatus": "JobCreationFailed", "error": "Unable to load Env Context from SSM"}
+        }
+        return "JobCreationFailed"
 
     node_type = spec.get("compute", {}).get("nodeType", "fargate")
     labels = {
@@ -167,7 +268,7 @@ def create_job(
     job_spec = job_utils.construct_job_spec(
         env=env,
         team=team,
-        env_context=ENV_CONTEXT,
+        env_context=env_context,
         podsetting_metadata=podsetting_metadata,
         orbit_job_spec=spec,
         labels=labels,
@@ -184,7 +285,10 @@ def create_job(
             api_version="batch/v1beta1",
             kind="CronJob",
             metadata=V1ObjectMeta(
-                name=cronjob_id, labels={**labels, **spec.get("compute", {}).get("labels", {})}, namespace=namespace
+                name=cronjob_id,
+                labels={**labels, **spec.get("compute", {}).get("labels", {})},
+                annotations={shard_utils.SHARD_ANNOTATION: SHARDS.identity},
+                namespace=namespace,
             ),
             status=V1beta1CronJobStatus(),
             spec=cron_job_spec,
@@ -193,7 +297,7 @@ def create_job(
         cron_job_instance: V1beta1CronJob = BatchV1beta1Api().create_namespaced_cron_job(namespace=namespace, body=job)
         cronjob_instance_metadata: V1ObjectMeta = cron_job_instance.metadata
         logger.debug("Started Cron Job: %s", cronjob_instance_metadata.name)
-        patch["metadata"] = {"labels": {"k8sJobType": "CronJob"}}
+        patch.setdefault("metadata", {})["labels"] = {"k8sJobType": "CronJob"}
         patch["status"] = {
             "orbitJobOperator": {
                 "jobStatus": "JobCreated",
@@ -206,7 +310,10 @@ def create_job(
         job = V1Job(
             api_version="batch/v1",
             kind="Job",
-            metadata=V1ObjectMeta(labels={**labels, **spec.get("compute", {}).get("labels", {})}),
+            metadata=V1ObjectMeta(
+                labels={**labels, **spec.get("compute", {}).get("labels", {})},
+                annotations={shard_utils.SHARD_ANNOTATION: SHARDS.identity},
+            ),
             spec=job_spec,
         )
 
@@ -215,20 +322,176 @@ def create_job(
 
         job_instance_metadata: V1ObjectMeta = job_instance.metadata
         logger.debug("Started Job: %s", job_instance_metadata.name)
-        patch["metadata"] = {"labels": {"k8sJobType": "Job"}}
+        patch.setdefault("metadata", {})["labels"] = {"k8sJobType": "Job"}
         patch["status"] = {
             "orbitJobOperator": {
                 "jobStatus": "JobCreated",
                 "jobName": job_instance_metadata.name,
                 "nodeType": node_type,
+                "queuePosition": None,
             }
         }
         return "JobCreated"
 
 
+def _should_index_orbitjob(labels: kopf.Labels, status: kopf.Status, **_: Any) -> bool:
+    job_status = status.get("orbitJobOperator", {}).get("jobStatus", None)
+    return labels.get("k8sJobType") != "CronJob" and (
+        job_status == admission_utils.QUEUED_JOB_STATUS or job_status in admission_utils.ACTIVE_JOB_STATUSES
+    )
+
+
+@kopf.index(ORBIT_API_GROUP, ORBIT_API_VERSION, "orbitjobs", when=_should_index_orbitjob)  # type: ignore
+def orbitjobs_idx(
+    namespace: str, name: str, meta: kopf.Meta, spec: kopf.Spec, status: kopf.Status, **_: Any
+) -> Dict[str, Dict[str, Any]]:
+    """Index of queued and running orbitjobs by namespace"""
+    return {
+        namespace: {
+            "namespace": namespace,
+            "name": name,
+            "jobStatus": status.get("orbitJobOperator", {}).get("jobStatus"),
+            "priorityClassName": spec.get("compute", {}).get("priorityClassName", None),
+            "created": meta.get("creationTimestamp", ""),
+        }
+    }
+
+
+@kopf.index("scheduling.k8s.io", "v1", "priorityclasses")  # type: ignore
+def priorityclasses_idx(name: str, body: kopf.Body, **_: Any) -> Dict[str, int]:
+    """Index of priorityclass values by name"""
+    return {name: body.get("value", 0)}
+
+
+def _get_admission_plan(
+    namespaces_idx: kopf.Index[str, Dict[str, Any]],
+    orbitjobs_idx: kopf.Index[str, Dict[str, Any]],
+    priorityclasses_idx: kopf.Index[str, int],
+    logger: kopf.Logger,
+) -> Dict[str, Any]:
+    """Return the current admission plan, recomputing it at most once per interval. Caller must hold the lock"""
+    now = time.monotonic()
+    if now - ADMISSION_PLAN["computed_at"] < ADMISSION_CONFIG["interval"]:
+        return ADMISSION_PLAN
+
+    queued: List[Dict[str, Any]] = []
+    active: List[Dict[str, Any]] = []
+    seen_queued: Set[Tuple[str, str]] = set()
+    for namespace, jobs in orbitjobs_idx.items():
+        ns: Optional[Dict[str, Any]] = None
+        for ns in namespaces_idx.get(namespace, []):
+            pass
+        if ns is None or ns.get("team") is None:
+            continue
+        for job in jobs:
+            priority = 0
+            for priority in priorityclasses_idx.get(job["priorityClassName"], []):
+                pass
+            entry = {**job, "team": ns["team"], "priority": priority}
+            key = (namespace, job["name"])
+            if job["jobStatus"] == admission_utils.QUEUED_JOB_STATUS:
+                seen_queued.add(key)
+            if job["jobStatus"] == admission_utils.QUEUED_JOB_STATUS and key not in ADMITTED:
+                queued.append(entry)
+            else:
+                active.append(entry)
+
+    # Admitted jobs leave ADMITTED once the index no longer shows them as queued
+    for key, admitted_at in list(ADMITTED.items()):
+        if key not in seen_queued:
+            del ADMITTED[key]
+
+    teams = {job["team"] for job in queued + active}
+    policies = {
+        team: admission_utils.get_team_policy(
+            team_context=context_utils.get_team_context(team=team, logger=logger), config=ADMISSION_CONFIG
+        )
+        for team in teams
+    }
+    admitted, positions = admission_utils.plan_admissions(
+        queued=queued, active=active, policies=policies, max_active=ADMISSION_CONFIG["max_active"]
+    )
+    logger.debug("Admission plan: %s queued, %s active, %s admitted", len(queued), len(active), len(admitted))
+    metrics_utils.QUEUE_DEPTH.labels(metrics_utils.operator_name(__name__), "orbitjobs").set(
+        len(queued) - len(admitted)
+    )
+    ADMISSION_PLAN.update({"computed_at": now, "admitted": admitted, "positions": positions})
+    return ADMISSION_PLAN
+
+
+@kopf.on.timer(  # type: ignore
+    ORBIT_API_GROUP,
+    ORBIT_API_VERSION,
+    "orbitjobs",
+    interval=ADMISSION_CONFIG["interval"],
+    field="status.orbitJobOperator.jobStatus",
+    value=admission_utils.QUEUED_JOB_STATUS,
+    when=_owns,
+)
+@metrics_utils.timed
+def orbit_job_admission(
+    namespace: str,
+    name: str,
+    spec: kopf.Spec,
+    status: kopf.Status,
+    patch: kopf.Patch,
+    logger: kopf.Logger,
+    namespaces_idx: kopf.Index[str, Dict[str, Any]],
+    podsettings_idx: kopf.Index[Tuple[str, str], Dict[str, Any]],
+    orbitjobs_idx: kopf.Index[str, Dict[str, Any]],
+    priorityclasses_idx: kopf.Index[str, int],
+    **_: Any,
+) -> str:
+    ns: Optional[Dict[str, Any]] = None
+    for ns in namespaces_idx.get(namespace, []):
+        logger.debug("ns: %s", ns)
+
+    if ns is None:
+        patch["status"] = {
+            "orbitJobOperator": {"jobStatus": "JobCreationFailed", "error": "No Namespace resource found"}
+        }
+        return "JobCreationFailed"
+
+    key = (namespace, name)
+    with ADMISSION_LOCK:
+        plan = _get_admission_plan(
+            namespaces_idx=namespaces_idx,
+            orbitjobs_idx=orbitjobs_idx,
+            priorityclasses_idx=priorityclasses_idx,
+            logger=logger,
+        )
+        admit = key in plan["admitted"]
+        if admit:
+            plan["admitted"].discard(key)
+            ADMITTED[key] = time.monotonic()
+        position = plan["positions"].get(key, None)
+
+    if not admit:
+        if position is not None and position != status.get("orbitJobOperator", {}).get("queuePosition"):
+            patch["status"] = {"orbitJobOperator": {"queuePosition": position}}
+        return admission_utils.QUEUED_JOB_STATUS
+
+    logger.info("Admitting queued OrbitJob")
+    try:
+        return _create_k8s_job(
+            namespace=namespace,
+            env=ns["env"],
+            team=ns["team"],
+            spec=spec,
+            patch=patch,
+            logger=logger,
+            podsettings_idx=podsettings_idx,
+        )
+    except Exception:
+        with ADMISSION_LOCK:
+            ADMITTED.pop(key, None)
+        raise
+
+
 @kopf.on.timer(  # type: ignore
     ORBIT_API_GROUP, ORBIT_API_VERSION, "orbitjobs", interval=5, initial_delay=5, when=_monitor_k8s_job
 )
+@metrics_utils.timed
 def orbit_job_monitor(
     namespace: str,
     name: str,
@@ -256,13 +519,16 @@ def orbit_job_monitor(
     if k8s_job is None:  # To tackle the race condition caused by Timer
         return "JobMetadataNotFound"
 
-    if k8s_job.get("status", {}).get("active") == 1:
+    k8s_job_status = k8s_job.get("status") or {}
+    condition = (k8s_job_status.get("conditions") or [{}])[0]
+    if (k8s_job_status.get("active") or 0) >= 1:
         job_status = "Active"
     else:
-        job_status = k8s_job.get("status", {}).get("conditions", [{}])[0].get("type")
+        # No condition yet means no pod is running but the Job is not finished, it still counts against the quotas
+        job_status = condition.get("type") or "JobCreated"
 
-    k8s_job_reason = k8s_job.get("status", {}).get("conditions", [{}])[0].get("status")
-    k8s_job_message = k8s_job.get("status", {}).get("conditions", [{}])[0].get("message")
+    k8s_job_reason = condition.get("status")
+    k8s_job_message = condition.get("message")
 
     patch["status"] = {
         "orbitJobOperator": {
@@ -285,11 +551,13 @@ def cron_jobs_idx(
 
 
 def _monitor_k8s_cron_job(
+    namespace: str,
+    annotations: kopf.Annotations,
     status: kopf.Status,
     logger: kopf.Logger,
     **_: Any,
 ) -> bool:
-    if (status.get("create_job", "")).startswith("Cron"):
+    if (status.get("create_job", "")).startswith("Cron") and SHARDS.owns(namespace, annotations):
         if status.get("orbitJobOperator", {}).get("jobStatus", None) in ["Complete", "Failed"]:
             return False
         else:
@@ -301,6 +569,7 @@ def _monitor_k8s_cron_job(
 @kopf.on.timer(  # type: ignore
     ORBIT_API_GROUP, ORBIT_API_VERSION, "orbitjobs", interval=5, initial_delay=5, when=_monitor_k8s_cron_job
 )
+@metrics_utils.timed
 def orbit_cron_job_monitor(
     namespace: str,
     name: str,
@@ -18,7 +18,7 @@ from typing import Any, Dict
 
 import kopf
 from orbit_controller import ORBIT_API_GROUP, ORBIT_API_VERSION, dynamic_client
-from orbit_controller.utils import poddefault_utils
+from orbit_controller.utils import metrics_utils, poddefault_utils
 
 
 @kopf.on.startup()
@@ -31,6 +31,10 @@ def configure(settings: kopf.OperatorSettings, logger: kopf.Logger, **_: Any) ->
     )
     settings.persistence.finalizer = "podsetting-operator.orbit.aws/kopf-finalizer"
     settings.posting.level = logging.getLevelName(os.environ.get("EVENT_LOG_LEVEL", "INFO"))
+    metrics_utils.start_metrics_server(logger=logger)
+
+
+metrics_utils.count_events(__name__, ORBIT_API_GROUP, ORBIT_API_VERSION, "podsettings")
 
 
 def _should_index_namespaces(labels: kopf.Labels, **_: Any) -> bool:
@@ -61,6 +65,7 @@ def _should_process_podsetting(labels: kopf.Labels, status: kopf.Status, **_: An
 
 @kopf.on.resume(ORBIT_API_GROUP, ORBIT_API_VERSION, "podsettings", when=_should_process_podsetting)  # type: ignore
 @kopf.on.create(ORBIT_API_GROUP, ORBIT_API_VERSION, "podsettings", when=_should_process_podsetting)
+@metrics_utils.timed
 def create_poddefaults(
     namespace: str,
     name: str,
@@ -97,6 +102,7 @@ def create_poddefaults(
 
 
 @kopf.on.update(ORBIT_API_GROUP, ORBIT_API_VERSION, "podsettings", when=_should_process_podsetting)  # type: ignore
+@metrics_utils.timed
 def update_poddefaults(
     namespace: str,
     name: str,
@@ -129,6 +135,7 @@ def update_poddefaults(
 
 
 @kopf.on.delete(ORBIT_API_GROUP, ORBIT_API_VERSION, "podsettings", when=_should_process_podsetting)  # type: ignore
+@metrics_utils.timed
 def delete_poddefaults(
     namespace: str,
     name: str,
@@ -15,12 +15,15 @@
 import json
 import logging
 import os
-from typing import Any
+from typing import Any, Dict
 
 import kopf
 from kubernetes import dynamic
 from kubernetes.client import ApiException, CoreV1Api, CustomObjectsApi, V1DeleteOptions, api_client
 from orbit_controller import ORBIT_API_GROUP, ORBIT_API_VERSION
+from orbit_controller.utils import context_utils, metrics_utils, retention_utils, teardown_utils
+
+RETENTION_CONFIG: Dict[str, Any] = retention_utils.get_config()
 
 
 def _dynamic_client() -> dynamic.DynamicClient:
@@ -38,9 +41,13 @@ def configure(settings: kopf.OperatorSettings, logger: kopf.Logger, **_: Any) ->
     settings.posting.level = logging.INFO
     settings.persistence.finalizer = "teamspace-operator.orbit.aws/kopf-finalizer"
     settings.posting.level = logging.getLevelName(os.environ.get("EVENT_LOG_LEVEL", "INFO"))
+    metrics_utils.start_metrics_server(logger=logger)
     logger.info("START the Teamspace Controller")
 
 
+metrics_utils.count_events(__name__, ORBIT_API_GROUP, ORBIT_API_VERSION, "teamspaces")
+
+
 @kopf.on.resume(
     ORBIT_API_GROUP,
     ORBIT_API_VERSION,
@@ -55,6 +62,7 @@ def configure(settings: kopf.OperatorSettings, logger: kopf.Logger, **_: Any) ->
     field="status.teamspaceOperator.status",
     value=kopf.ABSENT,
 )
+@metrics_utils.timed
 def install_team(patch: kopf.Patch, logger: kopf.Logger, **_: Any) -> str:
     logger.info("In INSTALL_TEAM  Teamspace Controller")
     patch["status"] = {"teamspaceOperator": {"status": "Installed"}}
@@ -62,6 +70,7 @@ def install_team(patch: kopf.Patch, logger: kopf.Logger, **_: Any) -> str:
 
 
 @kopf.on.delete(ORBIT_API_GROUP, ORBIT_API_VERSION, "teamspaces")  # type: ignore
+@metrics_utils.timed
 def uninstall_team(namespace: str, name: str, spec: kopf.Spec, patch: kopf.Patch, logger: kopf.Logger, **_: Any) -> str:
     logger.info("In UNINSTALL_TEAM  Teamspace Controller")
 
@@ -74,12 +83,61 @@ def uninstall_team(namespace: str, name: str, spec: kopf.Spec, patch: kopf.Patch
     if team_spec:
         _remove_team_resources(namespace=namespace, team_spec=team_spec, logger=logger)
         _remove_user_namespaces(namespace=namespace, team_spec=team_spec, logger=logger)
+        # Hold the team namespace until the user namespaces are actually gone so none are leaked
+        teardown_utils.wait_for_deletion(
+            CoreV1Api().list_namespace,
+            kind="namespaces",
+            logger=logger,
+            label_selector=f"orbit/team={team_spec},orbit/space=user",
+        )
         patch["status"] = {"teamspaceOperator": {"status": "DeleteProcessed"}}
     else:
         logging.warn("Team spec not found...moving on")
     return "Uninstalled"
 
 
+@kopf.timer(  # type: ignore
+    ORBIT_API_GROUP,
+    ORBIT_API_VERSION,
+    "teamspaces",
+    interval=RETENTION_CONFIG["sweep_interval"],
+    initial_delay=60,
+    idle=60,
+    field="status.teamspaceOperator.status",
+    value="Installed",
+)
+@metrics_utils.timed
+def retention_sweeper(namespace: str, spec: kopf.Spec, logger: kopf.Logger, **_: Any) -> str:
+    team = spec.get("team", namespace)
+    team_context = context_utils.get_team_context(team=team, logger=logger)
+    if team_context is None:
+        return "TeamContextNotFound"
+
+    policy = retention_utils.get_policy(team_context=team_context, config=RETENTION_CONFIG)
+    if policy["count"] is None and policy["hours"] is None:
+        return "NoPolicy"
+
+    client = _dynamic_client()
+    all_namespaces = CoreV1Api().list_namespace(label_selector=f"orbit/team={team}").to_dict()
+    budget = RETENTION_CONFIG["max_deletions"]
+    for item in all_namespaces["items"]:
+        ns = item["metadata"]["name"]
+        expired = retention_utils.find_expired_orbitjobs(namespace=ns, policy=policy, client=client, logger=logger)
+        # Remove the oldest first so an exhausted budget leaves the most recent history in place
+        expired = expired[::-1][:budget]
+        if not expired:
+            continue
+        # Never delete anything that could not be archived
+        retention_utils.archive_orbitjobs(
+            namespace=ns, team=team, bucket=team_context["ScratchBucket"], orbitjobs=expired, logger=logger
+        )
+        budget -= retention_utils.delete_orbitjobs(namespace=ns, orbitjobs=expired, client=client, logger=logger)
+        if budget <= 0:
+            logger.info("Retention deletion budget exhausted, continuing on next sweep")
+            break
+    return "Swept"
+
+
 def _remove_user_namespaces(namespace: str, team_spec: str, logger: kopf.Logger, **_: Any):  # type: ignore
     logger.info(
         f"Removing all user namespaces with labels orbit/team={team_spec},orbit/space=user in namespace {namespace} "
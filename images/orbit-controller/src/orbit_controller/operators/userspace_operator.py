@@ -12,19 +12,13 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 
-import json
 import logging
 import os
-import random
-import string
-import time
-from typing import Any, Dict, Optional, cast
+from typing import Any, Dict, List, Optional, cast
 
-import boto3
 import kopf
-from kubernetes.client import CoreV1Api, V1ConfigMap
-from orbit_controller import ORBIT_API_GROUP, ORBIT_API_VERSION, dynamic_client, load_config, run_command
-from orbit_controller.utils import poddefault_utils
+from orbit_controller import ORBIT_API_GROUP, ORBIT_API_VERSION, boto3_client, dynamic_client, load_config, run_command
+from orbit_controller.utils import helm_utils, metrics_utils, poddefault_utils, teardown_utils
 
 
 @kopf.on.startup()
@@ -37,6 +31,10 @@ def configure(settings: kopf.OperatorSettings, logger: kopf.Logger, **_: Any) ->
     )
     settings.persistence.finalizer = "userspace-operator.orbit.aws/kopf-finalizer"
     settings.posting.level = logging.getLevelName(os.environ.get("EVENT_LOG_LEVEL", "INFO"))
+    metrics_utils.start_metrics_server(logger=logger)
+
+
+metrics_utils.count_events(__name__, ORBIT_API_GROUP, ORBIT_API_VERSION, "userspaces")
 
 
 def _should_index_podsetting(labels: kopf.Labels, **_: Any) -> bool:
@@ -67,27 +65,31 @@ def _install_helm_chart(
     user_efsapid: str,
     repo: str,
     package: str,
+    chart_version: str,
+    installed_release: Optional[Dict[str, Any]],
     logger: kopf.Logger,
 ) -> bool:
     install_status = True
-    # try to uninstall first
-    try:
-        cmd = f"helm uninstall --debug {helm_release} -n {team}"
-        logger.debug("running cmd: %s", cmd)
-        output = run_command(cmd)
-        logger.debug(output)
-        logger.info("finished cmd: %s", cmd)
-    except Exception:
-        logger.debug("helm uninstall did not find the release")
+    # Upgrade in place when the same chart version is already installed, as some charts are not upgradable
+    # across versions we uninstall first otherwise
+    if installed_release is not None and installed_release.get("chart") != f"{package}-{chart_version}":
+        try:
+            cmd = f"helm uninstall --debug {helm_release} -n {team}"
+            logger.debug("running cmd: %s", cmd)
+            output = run_command(cmd, timeout=helm_utils.HELM_COMMAND_TIMEOUT)
+            logger.debug(output)
+            logger.info("finished cmd: %s", cmd)
+        except Exception:
+            logger.debug("helm uninstall did not find the release")
 
     cmd = (
         f"/usr/local/bin/helm upgrade --install --devel --debug --namespace {team} "
-        f"{helm_release} {repo}/{package} "
+        f"{helm_release} {repo}/{package} --version {chart_version} "
         f"--set user={user},user_email={user_email},namespace={namespace},user_efsapid={user_efsapid}"
     )
     try:
         logger.debug("running cmd: %s", cmd)
-        output = run_command(cmd)
+        output = run_command(cmd, timeout=helm_utils.HELM_COMMAND_TIMEOUT)
         logger.debug(output)
         logger.info("finished cmd: %s", cmd)
     except Exception:
@@ -97,7 +99,7 @@ def _install_helm_chart(
 
 
 def _create_user_efs_endpoint(user: str, team_name: str, team_efsid: str, env: str) -> Dict[str, Any]:
-    efs = boto3.client("efs")
+    efs = boto3_client("efs")
 
     return cast(
         Dict[str, str],
@@ -114,7 +116,7 @@ def _create_user_efs_endpoint(user: str, team_name: str, team_efsid: str, env: s
 
 
 def _delete_user_efs_endpoint(user_name: str, user_namespace: str, logger: kopf.Logger, meta: kopf.Meta) -> None:
-    efs = boto3.client("efs")
+    efs = boto3_client("efs")
 
     logger.info(f"Fetching the EFS access point in the namespace {user_namespace} for user {user_name}")
 
@@ -124,7 +126,8 @@ def _delete_user_efs_endpoint(user_name: str, user_namespace: str, logger: kopf.
 
     try:
         efs.delete_access_point(AccessPointId=efs_access_point_id)
-        logger.info(f"Access point {efs_access_point_id} deleted")
+        if teardown_utils.wait_for_access_point_deletion(access_point_id=efs_access_point_id, logger=logger):
+            logger.info(f"Access point {efs_access_point_id} deleted")
     except efs.exceptions.AccessPointNotFound:
         logger.warning(f"Access point not found: {efs_access_point_id}")
     except efs.exceptions.InternalServerError as e:
@@ -136,7 +139,7 @@ def _uninstall_chart(helm_release: str, namespace: str, logger: kopf.Logger) ->
     cmd = f"/usr/local/bin/helm uninstall --debug --namespace {namespace} {helm_release}"
     try:
         logger.debug("running uninstall cmd: %s", cmd)
-        output = run_command(cmd)
+        output = run_command(cmd, timeout=helm_utils.HELM_COMMAND_TIMEOUT)
         logger.debug(output)
         logger.info("finished uninstall cmd: %s", cmd)
     except Exception:
@@ -145,19 +148,26 @@ def _uninstall_chart(helm_release: str, namespace: str, logger: kopf.Logger) ->
     return install_status
 
 
-def _get_team_context(team: str, logger: kopf.Logger) -> Dict[str, Any]:
-    try:
-        api_instance = CoreV1Api()
-        team_context_cf: V1ConfigMap = api_instance.read_namespaced_config_map("orbit-team-context", team)
-        team_context_str = team_context_cf.data["team"]
+def _uninstall_user_charts(name: str, team: str, logger: kopf.Logger) -> Optional[str]:
+    """Uninstall the helm releases of a user space, returning the first chart that failed to uninstall"""
+    _, charts = helm_utils.get_team_charts(team=team, logger=logger)
+    releases = helm_utils.list_releases(namespace=team, prefix=f"{name}-")
+    logger.info("current installed releases: %s", list(releases.keys()))
 
-        logger.debug("team context: %s", team_context_str)
-        team_context: Dict[str, Any] = json.loads(team_context_str)
-        logger.debug("team context keys: %s", team_context.keys())
-    except Exception as e:
-        logger.error("Error during fetching team context configmap")
-        raise e
-    return team_context
+    uninstalls: List[Dict[str, Any]] = []
+    for chart in charts:
+        chart_name = chart["name"].split("/")[1]
+        helm_release = f"{name}-{chart_name}"
+        if helm_release in releases:
+            uninstalls.append({"helm_release": helm_release, "namespace": team, "logger": logger})
+
+    uninstall_statuses = helm_utils.run_concurrently(func=_uninstall_chart, calls=uninstalls)
+    for uninstall, uninstall_status in zip(uninstalls, uninstall_statuses):
+        if uninstall_status:
+            logger.info("Helm release %s uninstalled from %s", uninstall["helm_release"], name)
+        else:
+            return cast(str, uninstall["helm_release"][len(name) + 1 :])
+    return None
 
 
 def _should_process_userspace(annotations: kopf.Annotations, spec: kopf.Spec, **_: Any) -> bool:
@@ -180,6 +190,7 @@ def _should_process_userspace(annotations: kopf.Annotations, spec: kopf.Spec, **
     value=kopf.ABSENT,
     when=_should_process_userspace,
 )
+@metrics_utils.timed
 def install_team(
     name: str,
     meta: kopf.Meta,
@@ -232,56 +243,39 @@ def install_team(
         }
         return "Failed"
 
-    team_context = _get_team_context(team=team, logger=logger)
-    logger.info("team context keys: %s", team_context.keys())
-    helm_repo_url = team_context["UserHelmRepository"]
-    logger.debug("Adding Helm Repository: %s at %s", team, helm_repo_url)
-    repo = f"{team}--userspace"
-    # add the team repo
-    unique_hash = "".join(random.choice(string.ascii_lowercase) for i in range(6))
-    run_command(f"helm repo add {repo} {helm_repo_url}")
-    try:
-        # In isolated envs, we cannot refresh stable, and since we don't use it, we remove it
-        run_command("helm repo remove stable")
-    except Exception:
-        logger.info("Tried to remove stable repo...got an error, but moving on")
-    run_command("helm repo update")
-    run_command(f"helm search repo --devel {repo} -o json > /tmp/{unique_hash}-charts.json")
-    with open(f"/tmp/{unique_hash}-charts.json", "r") as f:
-        charts = json.load(f)
-    run_command(f"helm list -n {team} -o json > /tmp/{unique_hash}-releases.json")
-    with open(f"/tmp/{unique_hash}-releases.json", "r") as f:
-        releaseList = json.load(f)
-        releases = [r["name"] for r in releaseList]
-        logger.info("current installed releases: %s", releases)
+    repo, charts = helm_utils.get_team_charts(team=team, logger=logger)
+    releases = helm_utils.list_releases(namespace=team, prefix=f"{name}-")
+    logger.info("current installed releases: %s", list(releases.keys()))
 
+    installs: List[Dict[str, Any]] = []
     for chart in charts:
         chart_name = chart["name"].split("/")[1]
         helm_release = f"{name}-{chart_name}"
-        # do not install again the chart if its already installed as some charts are not upgradable.
-        # namespaces might
-        if helm_release not in releaseList:
-            # install the helm package for this user space
-            logger.info(f"install the helm package chart_name={chart_name} helm_release={helm_release}")
-            install_status = _install_helm_chart(
-                helm_release=helm_release,
-                namespace=name,
-                team=team,
-                user=user,
-                user_email=user_email,
-                user_efsapid=access_point_id,
-                repo=repo,
-                package=chart_name,
-                logger=logger,
-            )
-            if install_status:
-                logger.info("Helm release %s installed at %s", helm_release, name)
-                continue
-            else:
-                patch["status"] = {
-                    "userSpaceOperator": {"installationStatus": "Failed to install", "chart_name": chart_name}
-                }
-                return "Failed"
+        installs.append(
+            {
+                "helm_release": helm_release,
+                "namespace": name,
+                "team": team,
+                "user": user,
+                "user_email": user_email,
+                "user_efsapid": access_point_id,
+                "repo": repo,
+                "package": chart_name,
+                "chart_version": chart["version"],
+                "installed_release": releases.get(helm_release, None),
+                "logger": logger,
+            }
+        )
+    logger.info("install the helm package charts: %s", [i["package"] for i in installs])
+    install_statuses = helm_utils.run_concurrently(func=_install_helm_chart, calls=installs)
+    for install, install_status in zip(installs, install_statuses):
+        if install_status:
+            logger.info("Helm release %s installed at %s", install["helm_release"], name)
+        else:
+            patch["status"] = {
+                "userSpaceOperator": {"installationStatus": "Failed to install", "chart_name": install["package"]}
+            }
+            return "Failed"
 
     logger.info("Copying PodDefaults from Team")
     logger.info("podsettings_idx:%s", podsettings_idx)
@@ -307,6 +301,7 @@ def install_team(
 
 
 @kopf.on.delete(ORBIT_API_GROUP, ORBIT_API_VERSION, "userspaces")  # type: ignore
+@metrics_utils.timed
 def uninstall_team_charts(
     name: str,
     annotations: kopf.Annotations,
@@ -325,10 +320,15 @@ def uninstall_team_charts(
 
     if space == "team":
         logger.info("delete all namespaces that belong to the team %s", name)
-        run_command(f"kubectl delete profile -l orbit/team={name}")
-        time.sleep(60)
-        run_command(f"kubectl delete namespace -l orbit/team={name},orbit/space=user")
-        logger.info("all namespaces that belong to the team %s are deleted", name)
+        # Profiles own the user namespaces, only remove leftovers once the profile controller is done
+        teardown_utils.delete_profiles(label_selector=f"orbit/team={name}", logger=logger)
+        remaining = teardown_utils.delete_namespaces(
+            label_selector=f"orbit/team={name},orbit/space=user", logger=logger
+        )
+        if remaining:
+            logger.warning("namespaces of the team %s still terminating: %s", name, sorted(remaining))
+        else:
+            logger.info("all namespaces that belong to the team %s are deleted", name)
     elif space == "user":
         env = spec.get("env", None)
         team = spec.get("team", None)
@@ -348,37 +348,24 @@ def uninstall_team_charts(
             )
             return "Skipping"
 
-        _delete_user_efs_endpoint(user_name=user, user_namespace=f"{team}-{user}", logger=logger, meta=meta)
-        team_context = _get_team_context(team=team, logger=logger)
-        logger.info("team context keys: %s", team_context.keys())
-        helm_repo_url = team_context["UserHelmRepository"]
-        repo = f"{team}--userspace"
-        # add the team repo
-        unique_hash = "".join(random.choice(string.ascii_lowercase) for i in range(6))
-        run_command(f"helm repo add {repo} {helm_repo_url}")
-        run_command(f"helm search repo --devel {repo} -o json > /tmp/{unique_hash}-charts.json")
-        with open(f"/tmp/{unique_hash}-charts.json", "r") as f:
-            charts = json.load(f)
-        run_command(f"helm list -n {team} -o json > /tmp/{unique_hash}-releases.json")
-        with open(f"/tmp/{unique_hash}-releases.json", "r") as f:
-            releaseList = json.load(f)
-            releases = [r["name"] for r in releaseList]
-            logger.info("current installed releases: %s", releases)
-
-        for chart in charts:
-            chart_name = chart["name"].split("/")[1]
-            helm_release = f"{name}-{chart_name}"
-            if helm_release in releases:
-                install_status = _uninstall_chart(helm_release=helm_release, namespace=team, logger=logger)
-
-                if install_status:
-                    logger.info("Helm release %s installed at %s", helm_release, name)
-                    continue
-                else:
-                    patch["status"] = {
-                        "userSpaceOperator": {"installationStatus": "Failed to uninstall", "chart_name": chart_name}
-                    }
-                    return "Failed"
+        # The access point and the helm releases are independent, remove them in parallel
+        results = teardown_utils.run_concurrently(
+            {
+                "efs": lambda: _delete_user_efs_endpoint(
+                    user_name=user, user_namespace=f"{team}-{user}", logger=logger, meta=meta
+                ),
+                "helm": lambda: _uninstall_user_charts(name=name, team=team, logger=logger),
+            }
+        )
+        for step, result in results.items():
+            if isinstance(result, Exception):
+                logger.error("teardown step %s failed: %s", step, result)
+                raise result
+        if results["helm"] is not None:
+            patch["status"] = {
+                "userSpaceOperator": {"installationStatus": "Failed to uninstall", "chart_name": results["helm"]}
+            }
+            return "Failed"
 
     patch["status"] = {"userSpaceOperator": {"installationStatus": "Uninstalled"}}
     return "Uninstalled"
@@ -0,0 +1,115 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License").
+#    You may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+import os
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+QUEUED_JOB_STATUS = "Queued"
+ACTIVE_JOB_STATUSES = ["JobCreated", "Active"]
+
+JobKey = Tuple[str, str]
+
+
+def get_config() -> Dict[str, Any]:
+    config = {
+        "enabled": os.environ.get("JOB_QUEUE_ENABLED", "True").lower() in ["true", "yes", "1"],
+        "interval": float(os.environ.get("JOB_QUEUE_INTERVAL", "3")),
+        "max_active": int(os.environ.get("JOB_QUEUE_MAX_ACTIVE", "0")),
+        "team_quota": int(os.environ.get("JOB_QUEUE_TEAM_QUOTA", "0")),
+        "user_quota": int(os.environ.get("JOB_QUEUE_USER_QUOTA", "0")),
+    }
+    return config
+
+
+def get_team_policy(team_context: Optional[Dict[str, Any]], config: Dict[str, Any]) -> Dict[str, int]:
+    """Resolve the admission quotas of a team, a quota of 0 meaning unlimited"""
+    team_context = team_context or {}
+    return {
+        "team_quota": int(team_context.get("JobQueueTeamQuota") or config["team_quota"]),
+        "user_quota": int(team_context.get("JobQueueUserQuota") or config["user_quota"]),
+        "weight": max(int(team_context.get("JobQueueWeight") or 1), 1),
+    }
+
+
+def _below(count: int, quota: int) -> bool:
+    return quota <= 0 or count < quota
+
+
+def plan_admissions(
+    queued: List[Dict[str, Any]],
+    active: List[Dict[str, Any]],
+    policies: Dict[str, Dict[str, int]],
+    max_active: int,
+) -> Tuple[Set[JobKey], Dict[JobKey, int]]:
+    """Decide which queued jobs to admit and the queue position of the rest.
+
+    Jobs are dicts with namespace, name, team and priority. The namespace identifies the user (user spaces) or the
+    team space itself. Within a team, higher priority jobs go first and equal priorities are served round robin
+    across users, starting with the user running the fewest jobs. When the env wide ``max_active`` limit is
+    contended, the team with the lowest running to weight ratio is served first.
+    """
+    team_active: Dict[str, int] = {}
+    user_active: Dict[str, int] = {}
+    for job in active:
+        team_active[job["team"]] = team_active.get(job["team"], 0) + 1
+        user_active[job["namespace"]] = user_active.get(job["namespace"], 0) + 1
+    total_active = len(active)
+
+    # One FIFO per user, ordered by priority then arrival
+    user_queues: Dict[str, List[Dict[str, Any]]] = {}
+    for job in sorted(queued, key=lambda j: (-j["priority"], j["created"], j["name"])):
+        user_queues.setdefault(job["namespace"], []).append(job)
+
+    admitted: Set[JobKey] = set()
+    while user_queues and _below(total_active, max_active):
+        best: Optional[Tuple[Any, ...]] = None
+        for namespace, user_queue in list(user_queues.items()):
+            head = user_queue[0]
+            team = head["team"]
+            policy = policies[team]
+            if not _below(team_active.get(team, 0), policy["team_quota"]) or not _below(
+                user_active.get(namespace, 0), policy["user_quota"]
+            ):
+                # Blocked until something finishes, the user keeps its queue position
+                del user_queues[namespace]
+                continue
+            key = (
+                -head["priority"],
+                team_active.get(team, 0) / policy["weight"],
+                user_active.get(namespace, 0),
+                head["created"],
+                head["name"],
+            )
+            if best is None or key < best[0]:
+                best = (key, namespace)
+        if best is None:
+            break
+
+        namespace = best[1]
+        job = user_queues[namespace].pop(0)
+        if not user_queues[namespace]:
+            del user_queues[namespace]
+        admitted.add((job["namespace"], job["name"]))
+        team_active[job["team"]] = team_active.get(job["team"], 0) + 1
+        user_active[namespace] = user_active.get(namespace, 0) + 1
+        total_active += 1
+
+    positions: Dict[JobKey, int] = {}
+    team_counters: Dict[str, int] = {}
+    for job in sorted(queued, key=lambda j: (-j["priority"], j["created"], j["name"])):
+        if (job["namespace"], job["name"]) in admitted:
+            continue
+        team_counters[job["team"]] = team_counters.get(job["team"], 0) + 1
+        positions[(job["namespace"], job["name"])] = team_counters[job["team"]]
+    return admitted, positions
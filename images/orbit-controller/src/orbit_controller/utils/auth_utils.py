@@ -0,0 +1,168 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License").
+#    You may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set
+
+import requests
+from kubernetes import watch
+from kubernetes.client import ApiException, CustomObjectsApi
+from orbit_controller import boto3_client, load_config
+
+AUTH_GROUPS_REFRESH_INTERVAL = int(os.environ.get("AUTH_GROUPS_REFRESH_INTERVAL", "60"))
+PROFILE_WATCH_TIMEOUT = int(os.environ.get("PROFILE_WATCH_TIMEOUT", "300"))
+
+_logger = logging.getLogger(__name__)
+
+_elb_keys_lock = threading.Lock()
+_elb_keys: Dict[str, str] = {}
+
+
+def get_elb_public_key(kid: str) -> str:
+    """Return the ALB signing key for ``kid``. Keys never change for a given kid, so they are cached for good"""
+    with _elb_keys_lock:
+        if kid in _elb_keys:
+            return _elb_keys[kid]
+    region = os.environ["AWS_REGION"]
+    response = requests.get(f"https://public-keys.auth.elb.{region}.amazonaws.com/{kid}", timeout=10)
+    response.raise_for_status()
+    with _elb_keys_lock:
+        _elb_keys[kid] = response.text
+    return response.text
+
+
+class TeamAuthGroupsIndex:
+    """Team name to AuthenticationGroups, refreshed from the team manifests in SSM by a background thread"""
+
+    def __init__(self, env_name: str, interval: int) -> None:
+        self.env_name = env_name
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._loaded = threading.Event()
+        self._team_info: Dict[str, List[str]] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    def _load(self) -> Dict[str, List[str]]:
+        ssm = boto3_client("ssm")
+        team_info: Dict[str, List[str]] = {}
+        paginator = ssm.get_paginator("get_parameters_by_path")
+        for page in paginator.paginate(Path=f"/orbit/{self.env_name}/teams/", Recursive=True):
+            for parameter in page["Parameters"]:
+                if parameter["Name"].endswith("/manifest"):
+                    team = parameter["Name"].split("/")[-2]
+                    team_info[team] = json.loads(parameter["Value"]).get("AuthenticationGroups")
+        return team_info
+
+    def _refresh(self) -> None:
+        team_info = self._load()
+        with self._lock:
+            if team_info != self._team_info:
+                _logger.info("Team Info refreshed: %s", team_info)
+            self._team_info = team_info
+        self._loaded.set()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            try:
+                self._refresh()
+            except Exception:
+                _logger.exception("Failed to refresh Team Info")
+
+    def get(self) -> Dict[str, List[str]]:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="team-auth-groups", daemon=True)
+                self._thread.start()
+        if not self._loaded.is_set():
+            self._refresh()
+        with self._lock:
+            return dict(self._team_info)
+
+
+class ProfileOwnerIndex:
+    """Kubeflow Profile names by owner email, kept up to date by a watch running in a background thread"""
+
+    def __init__(self, timeout: int) -> None:
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._synced = threading.Event()
+        self._profiles: Dict[str, str] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _owner(profile: Dict[str, Any]) -> Optional[str]:
+        return profile.get("spec", {}).get("owner", {}).get("name", None)  # type: ignore
+
+    def _list(self, api: CustomObjectsApi) -> str:
+        response = api.list_cluster_custom_object(group="kubeflow.org", version="v1", plural="profiles")
+        with self._lock:
+            self._profiles = {p["metadata"]["name"]: self._owner(p) for p in response.get("items", [])}
+        self._synced.set()
+        return str(response["metadata"]["resourceVersion"])
+
+    def _watch(self) -> None:
+        load_config()
+        api = CustomObjectsApi()
+        resource_version: Optional[str] = None
+        while True:
+            try:
+                if resource_version is None:
+                    resource_version = self._list(api)
+                w = watch.Watch()
+                for event in w.stream(
+                    api.list_cluster_custom_object,
+                    group="kubeflow.org",
+                    version="v1",
+                    plural="profiles",
+                    resource_version=resource_version,
+                    timeout_seconds=self.timeout,
+                ):
+                    profile = event["object"]
+                    resource_version = profile["metadata"]["resourceVersion"]
+                    with self._lock:
+                        if event["type"] == "DELETED":
+                            self._profiles.pop(profile["metadata"]["name"], None)
+                        else:
+                            self._profiles[profile["metadata"]["name"]] = self._owner(profile)
+            except ApiException as e:
+                if e.status == 404:
+                    # Kubeflow not installed (yet), there are no profiles to wait for
+                    self._synced.set()
+                    time.sleep(self.timeout)
+                elif e.status != 410:
+                    _logger.exception("Profile watch failed")
+                    time.sleep(5)
+                resource_version = None
+            except Exception:
+                _logger.exception("Profile watch failed")
+                resource_version = None
+                time.sleep(5)
+
+    def owners(self) -> Set[str]:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._watch, name="profile-owners", daemon=True)
+                self._thread.start()
+        self._synced.wait(timeout=10)
+        with self._lock:
+            return {owner for owner in self._profiles.values() if owner}
+
+
+TEAM_AUTH_GROUPS = TeamAuthGroupsIndex(env_name=os.environ.get("ENV_NAME", ""), interval=AUTH_GROUPS_REFRESH_INTERVAL)
+PROFILE_OWNERS = ProfileOwnerIndex(timeout=PROFILE_WATCH_TIMEOUT)
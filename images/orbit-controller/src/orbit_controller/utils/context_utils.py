@@ -0,0 +1,127 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License").
+#    You may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+import kopf
+from kubernetes.client import CoreV1Api, V1ConfigMap
+from kubernetes.client.rest import ApiException
+from orbit_controller import boto3_client
+
+# A loader returns the (version, context) pair for a key, or None when the context does not exist
+ContextLoader = Callable[[str], Optional[Tuple[str, Dict[str, Any]]]]
+
+
+class _CacheEntry:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.version: Optional[str] = None
+        self.context: Optional[Dict[str, Any]] = None
+        self.loaded_at: float = 0.0
+
+
+class ContextCache:
+    """Thread safe, per-key cache of Orbit contexts.
+
+    Entries are refreshed once they are older than ``ttl`` seconds. Concurrent callers of the same key
+    wait on a single load instead of each calling the backing store, and a refresh that returns an unchanged
+    version keeps the already parsed context.
+    """
+
+    def __init__(self, name: str, loader: ContextLoader, ttl: float) -> None:
+        self.name = name
+        self._loader = loader
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: Dict[str, _CacheEntry] = {}
+
+    def _entry(self, key: str) -> _CacheEntry:
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = _CacheEntry()
+            return self._entries[key]
+
+    def get(self, key: str, logger: Union[kopf.Logger, logging.Logger]) -> Optional[Dict[str, Any]]:
+        entry = self._entry(key)
+        with entry.lock:
+            if entry.context is not None and (time.monotonic() - entry.loaded_at) < self._ttl:
+                return entry.context
+
+            try:
+                loaded = self._loader(key)
+            except Exception as e:
+                if entry.context is None:
+                    raise
+                logger.warning(
+                    "Failed to refresh %s context %s, serving cached version %s: %s", self.name, key, entry.version, e
+                )
+                entry.loaded_at = time.monotonic()
+                return entry.context
+
+            if loaded is None:
+                logger.warning("%s context %s not found", self.name, key)
+                entry.version, entry.context, entry.loaded_at = None, None, 0.0
+                return None
+
+            version, context = loaded
+            if entry.version != version:
+                logger.info("Loaded %s context %s version %s (previous: %s)", self.name, key, version, entry.version)
+                entry.version, entry.context = version, context
+            entry.loaded_at = time.monotonic()
+            return entry.context
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+
+def _load_env_context_from_ssm(env_name: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+    ssm = boto3_client("ssm")
+    try:
+        parameter = ssm.get_parameter(Name=f"/orbit/{env_name}/context")["Parameter"]
+    except ssm.exceptions.ParameterNotFound:
+        return None
+    return str(parameter["Version"]), json.loads(parameter["Value"])
+
+
+def _load_team_context_from_configmap(team: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+    try:
+        config_map: V1ConfigMap = CoreV1Api().read_namespaced_config_map("orbit-team-context", team)
+    except ApiException as e:
+        if e.status == 404:
+            return None
+        raise
+    return str(config_map.metadata.resource_version), json.loads(config_map.data["team"])
+
+
+CONTEXT_CACHE_TTL = float(os.environ.get("CONTEXT_CACHE_TTL", "300"))
+
+ENV_CONTEXTS = ContextCache(name="Env", loader=_load_env_context_from_ssm, ttl=CONTEXT_CACHE_TTL)
+TEAM_CONTEXTS = ContextCache(name="Team", loader=_load_team_context_from_configmap, ttl=CONTEXT_CACHE_TTL)
+
+
+def get_env_context(env: str, logger: Union[kopf.Logger, logging.Logger]) -> Optional[Dict[str, Any]]:
+    return ENV_CONTEXTS.get(env, logger=logger)
+
+
+def get_team_context(team: str, logger: Union[kopf.Logger, logging.Logger]) -> Optional[Dict[str, Any]]:
+    return TEAM_CONTEXTS.get(team, logger=logger)
@@ -0,0 +1,71 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License").
+#    You may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import kopf
+from orbit_controller import run_command
+from orbit_controller.utils import context_utils
+
+HELM_INDEX_TTL = float(os.environ.get("HELM_INDEX_TTL", "300"))
+HELM_INSTALL_WORKERS = int(os.environ.get("HELM_INSTALL_WORKERS", "4"))
+HELM_COMMAND_TIMEOUT = int(os.environ.get("HELM_COMMAND_TIMEOUT", "300"))
+
+_logger = logging.getLogger(__name__)
+
+
+def userspace_repo(team: str) -> str:
+    return f"{team}--userspace"
+
+
+def _load_team_charts(team: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+    team_context = context_utils.get_team_context(team=team, logger=_logger)
+    if team_context is None:
+        return None
+    repo = userspace_repo(team)
+    # Adding the repo downloads its index without refreshing every other configured repository
+    run_command(f"helm repo add --force-update {repo} {team_context['UserHelmRepository']}")
+    output = run_command(f"helm search repo --devel {repo} -o json")
+    charts = json.loads(output)
+    version = hashlib.sha256(output.encode("utf-8")).hexdigest()
+    return version, {"repo": repo, "charts": charts}
+
+
+CHART_INDEX = context_utils.ContextCache(name="Chart", loader=_load_team_charts, ttl=HELM_INDEX_TTL)
+
+
+def get_team_charts(team: str, logger: Union[kopf.Logger, logging.Logger]) -> Tuple[str, List[Dict[str, Any]]]:
+    index = CHART_INDEX.get(team, logger=logger)
+    if index is None:
+        raise Exception(f"Unable to load the userspace chart index of team {team}")
+    return index["repo"], index["charts"]
+
+
+def list_releases(namespace: str, prefix: str) -> Dict[str, Dict[str, Any]]:
+    output = run_command(f"helm list -n {namespace} --filter '^{prefix}' -o json")
+    return {r["name"]: r for r in json.loads(output or "[]")}
+
+
+def run_concurrently(
+    func: Callable[..., bool], calls: List[Dict[str, Any]], max_workers: int = HELM_INSTALL_WORKERS
+) -> List[bool]:
+    if not calls:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(calls))) as executor:
+        return list(executor.map(lambda kwargs: func(**kwargs), calls))
@@ -17,11 +17,10 @@ import os
 import re
 from typing import Any, Dict, Optional, Tuple, Union
 
-import boto3
 import kopf
 import yaml
 from kubernetes import dynamic
-from orbit_controller import ORBIT_API_GROUP, ORBIT_API_VERSION
+from orbit_controller import ORBIT_API_GROUP, ORBIT_API_VERSION, boto3_client
 
 
 def _generate_buildspec(repo_host: str, repo_prefix: str, src: str, dest: str) -> Dict[str, Any]:
@@ -97,7 +96,7 @@ def replicate_image(src: str, dest: str, config: Dict[str, Any]) -> Tuple[Option
     buildspec = yaml.safe_dump(_generate_buildspec(config["repo_host"], config["repo_prefix"], src, dest))
 
     try:
-        client = boto3.client("codebuild")
+        client = boto3_client("codebuild")
         build_id = client.start_build(
             projectName=config["codebuild_project"],
             sourceTypeOverride="NO_SOURCE",
@@ -160,7 +159,7 @@ def image_replicated(image: str, logger: Union[kopf.Logger, logging.Logger]) ->
     try:
         repo, tag = image.split(":")
         repo = "/".join(repo.split("/")[1:])
-        client = boto3.client("ecr")
+        client = boto3_client("ecr")
         paginator = client.get_paginator("list_images")
         for page in paginator.paginate(repositoryName=repo):
             for imageId in page["imageIds"]:
@@ -0,0 +1,146 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License").
+#    You may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+import functools
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Optional, TypeVar, Union, cast
+
+import boto3
+import kopf
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "True").lower() in ["true", "yes", "1"]
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "9090"))
+
+_DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, float("inf"))
+_BUILD_BUCKETS = (30.0, 60.0, 120.0, 180.0, 300.0, 600.0, 900.0, 1800.0, 3600.0, float("inf"))
+
+HANDLER_DURATION = Histogram(
+    "orbit_controller_handler_duration_seconds",
+    "Duration of kopf handler invocations",
+    ["operator", "handler"],
+    buckets=_DURATION_BUCKETS,
+)
+HANDLER_ERRORS = Counter(
+    "orbit_controller_handler_errors_total",
+    "Kopf handler invocations that raised",
+    ["operator", "handler", "error"],
+)
+EVENTS = Counter(
+    "orbit_controller_events_total",
+    "Watch events received per resource kind",
+    ["operator", "kind", "type"],
+)
+QUEUE_DEPTH = Gauge(
+    "orbit_controller_queue_depth",
+    "Objects waiting to be processed",
+    ["operator", "queue"],
+)
+REPLICATION_WORKERS = Gauge(
+    "orbit_controller_imagereplication_workers_in_process",
+    "ImageReplications currently holding a CodeBuild worker slot",
+)
+CODEBUILD_DURATION = Histogram(
+    "orbit_controller_codebuild_duration_seconds",
+    "Duration of finished CodeBuild builds",
+    ["operator", "status"],
+    buckets=_BUILD_BUCKETS,
+)
+AWS_CALL_DURATION = Histogram(
+    "orbit_controller_aws_call_duration_seconds",
+    "Latency of AWS API calls",
+    ["service", "operation"],
+    buckets=_DURATION_BUCKETS,
+)
+AWS_CALL_ERRORS = Counter(
+    "orbit_controller_aws_call_errors_total",
+    "AWS API calls answered with an error status",
+    ["service", "operation"],
+)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_server_lock = threading.Lock()
+_server_started = False
+
+
+def operator_name(module: str) -> str:
+    return module.rsplit(".", 1)[-1]
+
+
+def _before_call(model: Any, context: Any, **_: Any) -> None:
+    context["orbit_metrics_start"] = time.monotonic()
+
+
+def _after_call(http_response: Any, model: Any, context: Any, **_: Any) -> None:
+    start = context.pop("orbit_metrics_start", None)
+    if start is None:
+        return
+    service = model.service_model.service_name
+    AWS_CALL_DURATION.labels(service, model.name).observe(time.monotonic() - start)
+    if http_response is not None and http_response.status_code >= 300:
+        AWS_CALL_ERRORS.labels(service, model.name).inc()
+
+
+def instrument_boto3() -> None:
+    """Time every call made by clients of the default boto3 session created after this point"""
+    events = boto3._get_default_session().events
+    events.register("before-call", _before_call, unique_id="orbit-metrics-before-call")
+    events.register("after-call", _after_call, unique_id="orbit-metrics-after-call")
+
+
+def start_metrics_server(logger: Union[kopf.Logger, logging.Logger], port: Optional[int] = None) -> None:
+    global _server_started
+    if not METRICS_ENABLED:
+        return
+    with _server_lock:
+        if _server_started:
+            return
+        instrument_boto3()
+        start_http_server(port or METRICS_PORT)
+        _server_started = True
+    logger.info("Serving metrics on :%s/metrics", port or METRICS_PORT)
+
+
+def timed(func: F) -> F:
+    """Record duration and errors of a handler. Apply beneath the kopf decorators"""
+    operator = operator_name(func.__module__)
+    handler = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        start = time.monotonic()
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            HANDLER_ERRORS.labels(operator, handler, type(e).__name__).inc()
+            raise
+        finally:
+            HANDLER_DURATION.labels(operator, handler).observe(time.monotonic() - start)
+
+    return cast(F, wrapper)
+
+
+def count_events(module: str, *resource: str) -> None:
+    """Register an event handler counting the watch events of a resource kind"""
+    operator = operator_name(module)
+    kind = resource[-1]
+
+    def count(type: Optional[str], **_: Any) -> None:
+        EVENTS.labels(operator, kind, type or "LIST").inc()
+
+    kopf.on.event(*resource, id=f"metrics-{kind}")(count)
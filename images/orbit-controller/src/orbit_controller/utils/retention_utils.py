@@ -0,0 +1,227 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License").
+#    You may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+import gzip
+import json
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+import kopf
+from kubernetes import dynamic
+from kubernetes.client import BatchV1Api, CoreV1Api
+from orbit_controller import ORBIT_API_GROUP, ORBIT_API_VERSION, boto3_client
+
+FINISHED_JOB_STATUSES = ["Complete", "Failed", "JobCreationFailed"]
+ARCHIVE_PREFIX = "orbit/job-archive"
+PAGE_SIZE = 500
+
+
+def get_config() -> Dict[str, Any]:
+    config = {
+        "sweep_interval": int(os.environ.get("RETENTION_SWEEP_INTERVAL", "900")),
+        "max_deletions": int(os.environ.get("RETENTION_MAX_DELETIONS", "1000")),
+        "default_count": os.environ.get("JOB_RETENTION_COUNT", None),
+        "default_hours": os.environ.get("JOB_RETENTION_HOURS", None),
+    }
+    return config
+
+
+def get_policy(team_context: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, Optional[int]]:
+    count = team_context.get("JobRetentionCount", config["default_count"])
+    hours = team_context.get("JobRetentionHours", config["default_hours"])
+    return {
+        "count": int(count) if count is not None else None,
+        "hours": int(hours) if hours is not None else None,
+    }
+
+
+def _list_pages(list_func: Any, namespace: str, **kwargs: Any) -> Iterator[Any]:
+    _continue = None
+    while True:
+        page = list_func(namespace=namespace, limit=PAGE_SIZE, _continue=_continue, **kwargs)
+        for item in page.items:
+            yield item
+        _continue = page.metadata._continue
+        if not _continue:
+            break
+
+
+def _parse_time(value: Any) -> Optional[datetime]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+
+
+def _finished_at(job: Any) -> Optional[datetime]:
+    if job.status.completion_time:
+        return _parse_time(job.status.completion_time)
+    for condition in job.status.conditions or []:
+        if condition.type in ["Complete", "Failed"] and condition.status == "True":
+            return _parse_time(condition.last_transition_time)
+    return None
+
+
+def _k8s_jobs_by_orbitjob(namespace: str) -> Dict[str, Any]:
+    jobs: Dict[str, Any] = {}
+    for job in _list_pages(BatchV1Api().list_namespaced_job, namespace=namespace):
+        for owner_reference in job.metadata.owner_references or []:
+            if owner_reference.kind == "OrbitJob":
+                jobs[owner_reference.name] = job
+    return jobs
+
+
+def _pod_summaries(namespace: str, job_names: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    summaries: Dict[str, List[Dict[str, Any]]] = {name: [] for name in job_names}
+    for pod in _list_pages(CoreV1Api().list_namespaced_pod, namespace=namespace, label_selector="job-name"):
+        job_name = (pod.metadata.labels or {}).get("job-name")
+        if job_name not in summaries:
+            continue
+        containers = []
+        for container_status in pod.status.container_statuses or []:
+            terminated = container_status.state.terminated if container_status.state else None
+            containers.append(
+                {
+                    "name": container_status.name,
+                    "image": container_status.image,
+                    "restartCount": container_status.restart_count,
+                    "exitCode": terminated.exit_code if terminated else None,
+                    "reason": terminated.reason if terminated else None,
+                    "startedAt": str(terminated.started_at) if terminated else None,
+                    "finishedAt": str(terminated.finished_at) if terminated else None,
+                }
+            )
+        summaries[job_name].append(
+            {
+                "name": pod.metadata.name,
+                "phase": pod.status.phase,
+                "nodeName": pod.spec.node_name,
+                "startTime": str(pod.status.start_time) if pod.status.start_time else None,
+                "containers": containers,
+            }
+        )
+    return summaries
+
+
+def _list_orbitjobs(api: Any, namespace: str) -> Iterator[Dict[str, Any]]:
+    # k8sJobType!=CronJob also matches OrbitJobs that failed before their k8s Job was created and got no label
+    _continue = None
+    while True:
+        page = api.get(
+            namespace=namespace, label_selector="k8sJobType!=CronJob", limit=PAGE_SIZE, _continue=_continue
+        ).to_dict()
+        for item in page.get("items", []):
+            yield item
+        _continue = page.get("metadata", {}).get("continue")
+        if not _continue:
+            break
+
+
+def find_expired_orbitjobs(
+    namespace: str,
+    policy: Dict[str, Optional[int]],
+    client: dynamic.DynamicClient,
+    logger: Union[kopf.Logger, logging.Logger],
+) -> List[Dict[str, Any]]:
+    api = client.resources.get(api_version=ORBIT_API_VERSION, group=ORBIT_API_GROUP, kind="OrbitJob")
+    orbitjobs = [
+        oj
+        for oj in _list_orbitjobs(api=api, namespace=namespace)
+        if oj.get("status", {}).get("orbitJobOperator", {}).get("jobStatus") in FINISHED_JOB_STATUSES
+    ]
+    if not orbitjobs:
+        return []
+
+    k8s_jobs = _k8s_jobs_by_orbitjob(namespace=namespace)
+    for oj in orbitjobs:
+        k8s_job = k8s_jobs.get(oj["metadata"]["name"])
+        finished_at = _finished_at(k8s_job) if k8s_job else None
+        oj["finishedAt"] = finished_at or _parse_time(oj["metadata"]["creationTimestamp"])
+        oj["k8sJob"] = k8s_job
+    orbitjobs.sort(key=lambda oj: oj["finishedAt"], reverse=True)
+
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=policy["hours"]) if policy["hours"] is not None else None
+    expired = [
+        oj
+        for i, oj in enumerate(orbitjobs)
+        if (policy["count"] is not None and i >= policy["count"]) or (cutoff is not None and oj["finishedAt"] < cutoff)
+    ]
+    logger.debug("Namespace %s: %s finished OrbitJobs, %s expired", namespace, len(orbitjobs), len(expired))
+    return expired
+
+
+def archive_orbitjobs(
+    namespace: str,
+    team: str,
+    bucket: str,
+    orbitjobs: List[Dict[str, Any]],
+    logger: Union[kopf.Logger, logging.Logger],
+) -> str:
+    job_names = [oj["k8sJob"].metadata.name for oj in orbitjobs if oj["k8sJob"]]
+    pods = _pod_summaries(namespace=namespace, job_names=job_names)
+
+    records = []
+    for oj in orbitjobs:
+        k8s_job = oj["k8sJob"]
+        records.append(
+            {
+                "namespace": namespace,
+                "name": oj["metadata"]["name"],
+                "labels": oj["metadata"].get("labels", {}),
+                "creationTimestamp": oj["metadata"]["creationTimestamp"],
+                "finishedAt": oj["finishedAt"].isoformat(),
+                "spec": oj.get("spec", {}),
+                "status": oj.get("status", {}).get("orbitJobOperator", {}),
+                "k8sJob": {
+                    "name": k8s_job.metadata.name,
+                    "succeeded": k8s_job.status.succeeded,
+                    "failed": k8s_job.status.failed,
+                }
+                if k8s_job
+                else None,
+                "pods": pods.get(k8s_job.metadata.name, []) if k8s_job else [],
+            }
+        )
+
+    now = datetime.now(timezone.utc)
+    key = (
+        f"{team}/{ARCHIVE_PREFIX}/{namespace}/{now.strftime('%Y-%m-%d')}/"
+        f"{now.strftime('%H%M%S')}-{uuid.uuid4().hex[:8]}.jsonl.gz"
+    )
+    body = gzip.compress("\n".join(json.dumps(r, default=str) for r in records).encode("utf-8"))
+    boto3_client("s3").put_object(Bucket=bucket, Key=key, Body=body, ContentEncoding="gzip")
+    logger.info("Archived %s OrbitJobs from %s to s3://%s/%s", len(records), namespace, bucket, key)
+    return key
+
+
+def delete_orbitjobs(
+    namespace: str,
+    orbitjobs: List[Dict[str, Any]],
+    client: dynamic.DynamicClient,
+    logger: Union[kopf.Logger, logging.Logger],
+) -> int:
+    api = client.resources.get(api_version=ORBIT_API_VERSION, group=ORBIT_API_GROUP, kind="OrbitJob")
+    deleted = 0
+    for oj in orbitjobs:
+        try:
+            # Jobs and Pods are owned by the OrbitJob and are garbage collected with it
+            api.delete(namespace=namespace, name=oj["metadata"]["name"], propagation_policy="Background")
+            deleted += 1
+        except Exception as e:
+            logger.warning("Failed to delete OrbitJob %s/%s: %s", namespace, oj["metadata"]["name"], e)
+    return deleted
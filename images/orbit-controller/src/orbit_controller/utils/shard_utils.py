@@ -0,0 +1,174 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License").
+#    You may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+import bisect
+import hashlib
+import logging
+import os
+import socket
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple, Union
+
+import kopf
+from kubernetes.client import ApiException, CoordinationV1Api
+from orbit_controller import ORBIT_SYSTEM_NAMESPACE, load_config
+
+SHARD_ANNOTATION = "orbit.aws/shard"
+SHARD_GROUP_LABEL = "orbit/shard-group"
+
+
+def get_config() -> Dict[str, Any]:
+    config = {
+        "identity": os.environ.get("POD_NAME", socket.gethostname()),
+        "namespace": os.environ.get("POD_NAMESPACE", ORBIT_SYSTEM_NAMESPACE),
+        "lease_duration": int(os.environ.get("SHARD_LEASE_DURATION", "30")),
+        "renew_interval": int(os.environ.get("SHARD_RENEW_INTERVAL", "10")),
+        "vnodes": int(os.environ.get("SHARD_VNODES", "64")),
+    }
+    return config
+
+
+def _hash(key: str) -> int:
+    return int(hashlib.md5(key.encode("utf-8")).hexdigest()[:16], 16)
+
+
+class HashRing:
+    """Consistent hash ring, so a membership change only moves the keys of the joining or leaving member"""
+
+    def __init__(self, members: List[str], vnodes: int) -> None:
+        self.members = sorted(members)
+        points = sorted((_hash(f"{member}#{i}"), member) for member in self.members for i in range(vnodes))
+        self._hashes = [p[0] for p in points]
+        self._owners = [p[1] for p in points]
+
+    def owner(self, key: str) -> Optional[str]:
+        if not self._hashes:
+            return None
+        i = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._owners[i]
+
+
+class ShardMembership:
+    """Replica membership of a shard group, tracked with one coordination.k8s.io Lease per replica.
+
+    Every replica renews its own Lease and lists the Leases of its peers, a peer whose Lease has not been renewed
+    within the lease duration has left the group. Namespaces are partitioned between live replicas on a hash ring.
+    """
+
+    def __init__(self, group: str, config: Dict[str, Any]) -> None:
+        self.group = group
+        self.identity: str = config["identity"]
+        self.namespace: str = config["namespace"]
+        self.lease_duration: int = config["lease_duration"]
+        self.renew_interval: int = config["renew_interval"]
+        self.vnodes: int = config["vnodes"]
+        self._lock = threading.Lock()
+        self._ring = HashRing(members=[self.identity], vnodes=self.vnodes)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def lease_name(self) -> str:
+        return f"{self.group}-{self.identity}"
+
+    @property
+    def members(self) -> List[str]:
+        with self._lock:
+            return self._ring.members
+
+    def _renew(self, api: CoordinationV1Api) -> None:
+        now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+        body = {
+            "metadata": {"name": self.lease_name, "labels": {SHARD_GROUP_LABEL: self.group}},
+            "spec": {
+                "holderIdentity": self.identity,
+                "leaseDurationSeconds": self.lease_duration,
+                "renewTime": now,
+            },
+        }
+        try:
+            api.patch_namespaced_lease(name=self.lease_name, namespace=self.namespace, body=body)
+        except ApiException as e:
+            if e.status != 404:
+                raise
+            body["spec"]["acquireTime"] = now
+            api.create_namespaced_lease(namespace=self.namespace, body=body)
+
+    def _live_members(self, api: CoordinationV1Api) -> List[str]:
+        now = datetime.now(timezone.utc)
+        members = {self.identity}
+        leases = api.list_namespaced_lease(namespace=self.namespace, label_selector=f"{SHARD_GROUP_LABEL}={self.group}")
+        for lease in leases.items:
+            renew_time = lease.spec.renew_time
+            if lease.spec.holder_identity and renew_time:
+                renew_time = renew_time if renew_time.tzinfo else renew_time.replace(tzinfo=timezone.utc)
+                if renew_time + timedelta(seconds=lease.spec.lease_duration_seconds or self.lease_duration) > now:
+                    members.add(lease.spec.holder_identity)
+        return sorted(members)
+
+    def _sync(self, api: CoordinationV1Api) -> Tuple[List[str], List[str]]:
+        self._renew(api)
+        members = self._live_members(api)
+        with self._lock:
+            previous = self._ring.members
+            if members != previous:
+                self._ring = HashRing(members=members, vnodes=self.vnodes)
+        return previous, members
+
+    def _run(self, logger: Union[kopf.Logger, logging.Logger], on_change: Callable[[], None]) -> None:
+        api = CoordinationV1Api()
+        while not self._stop.wait(self.renew_interval):
+            try:
+                previous, members = self._sync(api)
+                if members != previous:
+                    logger.info("Shard group %s changed from %s to %s", self.group, previous, members)
+                    on_change()
+            except Exception:
+                logger.exception("Failed to sync shard group %s", self.group)
+
+    def start(self, logger: Union[kopf.Logger, logging.Logger], on_change: Callable[[], None]) -> None:
+        load_config()
+        _, members = self._sync(CoordinationV1Api())
+        logger.info("Joined shard group %s as %s, members: %s", self.group, self.identity, members)
+        self._thread = threading.Thread(
+            target=self._run, name=f"shard-{self.group}", daemon=True, kwargs={"logger": logger, "on_change": on_change}
+        )
+        self._thread.start()
+        on_change()
+
+    def stop(self, logger: Union[kopf.Logger, logging.Logger]) -> None:
+        """Leave the group right away instead of waiting for the Lease to expire"""
+        self._stop.set()
+        try:
+            CoordinationV1Api().delete_namespaced_lease(name=self.lease_name, namespace=self.namespace)
+        except ApiException as e:
+            if e.status != 404:
+                logger.warning("Unable to delete Lease %s: %s", self.lease_name, e)
+
+    def ring_owns(self, namespace: str) -> bool:
+        with self._lock:
+            return self._ring.owner(namespace) == self.identity
+
+    def owns(self, namespace: str, annotations: Optional[Mapping[str, str]] = None) -> bool:
+        """Whether this replica handles objects in ``namespace``.
+
+        An object annotated with a live owner stays with that owner until the replica the ring assigns it to claims
+        it, so ownership moves once per object and without overlap between replicas.
+        """
+        owner = (annotations or {}).get(SHARD_ANNOTATION)
+        with self._lock:
+            if owner and owner in self._ring.members:
+                return owner == self.identity
+            return self._ring.owner(namespace) == self.identity
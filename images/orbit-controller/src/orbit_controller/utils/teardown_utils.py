@@ -0,0 +1,148 @@
+#  Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License").
+#    You may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set, Union
+
+import kopf
+from kubernetes import watch
+from kubernetes.client import ApiException, CoreV1Api, CustomObjectsApi
+from orbit_controller import boto3_client
+
+TEARDOWN_TIMEOUT = int(os.environ.get("TEARDOWN_TIMEOUT", "300"))
+
+
+def _names(items: List[Any]) -> Set[str]:
+    return {item["metadata"]["name"] if isinstance(item, dict) else item.metadata.name for item in items}
+
+
+def wait_for_deletion(
+    list_func: Callable[..., Any],
+    kind: str,
+    logger: Union[kopf.Logger, logging.Logger],
+    timeout: int = TEARDOWN_TIMEOUT,
+    **kwargs: Any,
+) -> Set[str]:
+    """Watch a collection until every object currently in it is gone.
+
+    Returns the names still present when ``timeout`` expires, an empty set on success.
+    """
+    deadline = time.monotonic() + timeout
+    response = list_func(**kwargs)
+    items = response["items"] if isinstance(response, dict) else response.items
+    remaining = _names(items)
+    resource_version = (
+        response["metadata"]["resourceVersion"] if isinstance(response, dict) else response.metadata.resource_version
+    )
+
+    while remaining:
+        seconds_left = int(deadline - time.monotonic())
+        if seconds_left <= 0:
+            break
+        logger.info("Waiting up to %ss for deletion of %s: %s", seconds_left, kind, sorted(remaining))
+        w = watch.Watch()
+        try:
+            for event in w.stream(list_func, resource_version=resource_version, timeout_seconds=seconds_left, **kwargs):
+                obj = event["object"]
+                name = obj["metadata"]["name"] if isinstance(obj, dict) else obj.metadata.name
+                if event["type"] == "DELETED":
+                    remaining.discard(name)
+                if not remaining:
+                    w.stop()
+        except ApiException as e:
+            if e.status != 410:
+                raise
+            # Watch expired, start over from a fresh list
+            response = list_func(**kwargs)
+            items = response["items"] if isinstance(response, dict) else response.items
+            remaining &= _names(items)
+            resource_version = (
+                response["metadata"]["resourceVersion"]
+                if isinstance(response, dict)
+                else response.metadata.resource_version
+            )
+
+    if remaining:
+        logger.warning("Timed out waiting for deletion of %s: %s", kind, sorted(remaining))
+    else:
+        logger.info("All %s deleted", kind)
+    return remaining
+
+
+def delete_profiles(label_selector: str, logger: Union[kopf.Logger, logging.Logger]) -> Set[str]:
+    api = CustomObjectsApi()
+    kwargs: Dict[str, Any] = {"group": "kubeflow.org", "version": "v1", "plural": "profiles"}
+    # delete_collection_cluster_custom_object takes no label_selector in the pinned kubernetes client
+    try:
+        profiles = api.list_cluster_custom_object(label_selector=label_selector, **kwargs)["items"]
+    except ApiException as e:
+        logger.warning("Unable to list profiles %s: %s", label_selector, e)
+        profiles = []
+    for profile in _names(profiles):
+        logger.info("Deleting profile %s", profile)
+        try:
+            api.delete_cluster_custom_object(name=profile, **kwargs)
+        except ApiException as e:
+            if e.status != 404:
+                logger.warning("Unable to delete profile %s: %s", profile, e)
+    return wait_for_deletion(
+        api.list_cluster_custom_object, kind="profiles", logger=logger, label_selector=label_selector, **kwargs
+    )
+
+
+def delete_namespaces(label_selector: str, logger: Union[kopf.Logger, logging.Logger]) -> Set[str]:
+    api = CoreV1Api()
+    for namespace in _names(api.list_namespace(label_selector=label_selector).items):
+        logger.info("Deleting namespace %s", namespace)
+        try:
+            api.delete_namespace(name=namespace)
+        except ApiException as e:
+            if e.status != 404:
+                logger.warning("Unable to delete namespace %s: %s", namespace, e)
+    return wait_for_deletion(api.list_namespace, kind="namespaces", logger=logger, label_selector=label_selector)
+
+
+def wait_for_access_point_deletion(
+    access_point_id: str, logger: Union[kopf.Logger, logging.Logger], timeout: int = TEARDOWN_TIMEOUT
+) -> bool:
+    efs = boto3_client("efs")
+    deadline = time.monotonic() + timeout
+    delay = 1.0
+    while time.monotonic() < deadline:
+        try:
+            access_points = efs.describe_access_points(AccessPointId=access_point_id)["AccessPoints"]
+        except efs.exceptions.AccessPointNotFound:
+            return True
+        if not access_points or access_points[0]["LifeCycleState"] == "deleted":
+            return True
+        time.sleep(delay)
+        delay = min(delay * 2, 10.0)
+    logger.warning("Timed out waiting for deletion of access point %s", access_point_id)
+    return False
+
+
+def run_concurrently(tasks: Dict[str, Callable[[], Any]]) -> Dict[str, Any]:
+    """Run independent teardown steps in parallel, returning each result (or raised exception) by name"""
+    if not tasks:
+        return {}
+    results: Dict[str, Any] = {}
+    with ThreadPoolExecutor(max_workers=len(tasks)) as executor:
+        futures = {name: executor.submit(task) for name, task in tasks.items()}
+        for name, future in futures.items():
+            exception: Optional[BaseException] = future.exception()
+            results[name] = exception if exception is not None else future.result()
+    return results
@@ -19,7 +19,7 @@ from typing import Any, Dict, List, Optional
 
 import kopf
 from orbit_controller import ORBIT_API_GROUP, ORBIT_API_VERSION, dynamic_client
-from orbit_controller.utils import imagereplication_utils
+from orbit_controller.utils import imagereplication_utils, metrics_utils
 
 CONFIG: Dict[str, Any]
 
@@ -40,6 +40,7 @@ def configure(settings: kopf.OperatorSettings, logger: kopf.Logger, **_: Any) ->
     )
     settings.persistence.finalizer = "imagereplication-pod-webhook.orbit.aws/kopf-finalizer"
     settings.posting.level = logging.getLevelName(os.environ.get("EVENT_LOG_LEVEL", "INFO"))
+    metrics_utils.start_metrics_server(logger=logger)
 
     global CONFIG
     CONFIG = imagereplication_utils.get_config()
@@ -70,6 +71,7 @@ def imagereplications_idx(namespace: str, name: str, spec: kopf.Spec, status: ko
 
 
 @kopf.on.mutate("pods", id="update-pod-images")  # type: ignore
+@metrics_utils.timed
 def update_pod_images(
     spec: kopf.Spec,
     patch: kopf.Patch,
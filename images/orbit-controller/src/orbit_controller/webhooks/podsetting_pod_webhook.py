@@ -19,7 +19,7 @@ from typing import Any, Dict, List, Optional, cast
 
 import kopf
 from orbit_controller import ORBIT_API_GROUP, ORBIT_API_VERSION
-from orbit_controller.utils import podsetting_utils
+from orbit_controller.utils import metrics_utils, podsetting_utils
 
 
 @kopf.on.startup()
@@ -38,6 +38,7 @@ def configure(settings: kopf.OperatorSettings, logger: kopf.Logger, **_: Any) ->
     )
     settings.persistence.finalizer = "podsetting-pod-webhook.orbit.aws/kopf-finalizer"
     settings.posting.level = logging.getLevelName(os.environ.get("EVENT_LOG_LEVEL", "INFO"))
+    metrics_utils.start_metrics_server(logger=logger)
 
 
 @kopf.index("namespaces")  # type: ignore
@@ -68,6 +69,7 @@ def podsettings_idx(
 
 
 @kopf.on.mutate("pods", id="apply-pod-settings")  # type: ignore
+@metrics_utils.timed
 def update_pod_images(
     namespace: str,
     labels: kopf.Labels,
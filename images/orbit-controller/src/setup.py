@@ -36,6 +36,7 @@ setup(
         "cryptography>=3.4.7,<41.1.0",
         "python-jose~=3.2.0",
         "kopf~=1.33.0",
+        "prometheus-client~=0.12.0",
     ],
     include_package_data=True,
 )
@@ -76,7 +76,37 @@ class ContainersRouteHandler(APIHandler):
         return json.dumps(data)
 
     @staticmethod
-    def _dump_pod(clist) -> str:
+    def _dump_queued(clist) -> List[Dict[str, str]]:
+        data: List[Dict[str, str]] = []
+        for c in clist:
+            container: Dict[str, str] = dict()
+            container["name"] = c["metadata"]["name"]
+            container["job_name"] = c["metadata"]["name"]
+            container["time"] = c["metadata"]["creationTimestamp"]
+            container["job_state"] = "queued"
+            container["queue_position"] = c["status"]["orbitJobOperator"].get("queuePosition", "")
+            container["completionTime"] = ""
+            container["duration"] = ""
+            container["pod_app"] = "orbit-runner"
+            container["container_name"] = ""
+            tasks = c["spec"].get("tasks", [])
+            container["hint"] = json.dumps({"tasks": tasks}, indent=4)
+            container["tasks"] = tasks
+            if not tasks:
+                container["notebook"] = ""
+            elif "notebookName" in tasks[0]:
+                container["notebook"] = tasks[0]["notebookName"]
+            else:
+                container["notebook"] = f'{tasks[0]["moduleName"]}.{tasks[0]["functionName"]}'
+            container["node_type"] = c["spec"].get("compute", {}).get("nodeType", "fargate")
+            container["job_type"] = "orbit-runner"
+            container["rank"] = 3
+            container["info"] = c
+            data.append(container)
+        return data
+
+    @staticmethod
+    def _dump_pod(clist, queued=None) -> str:
         data: List[Dict[str, str]] = []
         for c in clist:
             container: Dict[str, str] = dict()
@@ -165,6 +195,7 @@ class ContainersRouteHandler(APIHandler):
                 container["rank"] = 2
             container["info"] = c
             data.append(container)
+        data.extend(ContainersRouteHandler._dump_queued(queued or []))
         data = sorted(
             data,
             key=lambda i: (
@@ -185,11 +216,11 @@ class ContainersRouteHandler(APIHandler):
             if type == "user":
                 MYJOBS = controller.list_my_running_pods()
                 data = MYJOBS
-                self.finish(self._dump_pod(data))
+                self.finish(self._dump_pod(data, controller.list_my_queued_jobs()))
             elif type == "team":
                 TEAMJOBS = controller.list_team_running_pods()
                 data = TEAMJOBS
-                self.finish(self._dump_pod(data))
+                self.finish(self._dump_pod(data, controller.list_team_queued_jobs()))
             elif type == "cron":
                 CRONJOBS = controller.list_running_cronjobs()
                 data = CRONJOBS
@@ -237,12 +268,12 @@ class ContainersRouteHandler(APIHandler):
             controller.delete_pod(name)
             data = MYJOBS
             self._delete(name, data)
-            self.finish(self._dump_pod(data, type))
+            self.finish(self._dump_pod(data))
         elif job_type == "team":
             controller.delete_pod(name)
             data = TEAMJOBS
             self._delete(name, data)
-            self.finish(self._dump_pod(data, type))
+            self.finish(self._dump_pod(data))
         elif job_type == "cron":
             controller.delete_cronjob(name)
             data = CRONJOBS
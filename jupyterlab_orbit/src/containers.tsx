@@ -26,6 +26,7 @@ import { ContainerCategoryLeftList } from './containers/containersCategory';
 import { ContainerCentralPanel } from './containers/containersCentral';
 import {
   CheckOutlined,
+  ClockCircleOutlined,
   CloseOutlined,
   LoadingOutlined,
   QuestionOutlined,
@@ -49,6 +50,7 @@ export interface IItem {
   node_type: string;
   job_state: string;
   job_name: string;
+  queue_position?: number;
   pod_app: string;
   container_name: string;
 }
@@ -93,6 +95,11 @@ export const getStateIcon = (
       color = ORBIT_COLOR;
       icon = <LoadingOutlined style={{ color: color }} />;
       break;
+    case 'queued':
+      title = 'Queued';
+      color = ORBIT_COLOR;
+      icon = <ClockCircleOutlined style={{ color: color }} />;
+      break;
     case 'succeeded':
       title = 'Succeeded!';
       color = 'green';
@@ -33,8 +33,11 @@ const Item = (props: {
   type: string;
 }) => {
   const { title, color, icon } = getStateIcon(props.item.job_state);
+  const tooltip = props.item.queue_position
+    ? `${title} (position ${props.item.queue_position})`
+    : title;
   return (
-    <Tooltip placement="topLeft" title={title} color={color} key={'Orbit'}>
+    <Tooltip placement="topLeft" title={tooltip} color={color} key={'Orbit'}>
       <li className={ITEM_CLASS}>
         <span> {icon} </span>
         <span
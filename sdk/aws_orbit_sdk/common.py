@@ -1,8 +1,9 @@
 import json
 import logging
 import os
+import threading
 from os.path import expanduser
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, Optional, Tuple
 
 import boto3
 import botocore
@@ -95,17 +96,61 @@ def split_s3_path(s3_path: str) -> Tuple[str, str]:
     return bucket, key
 
 
+MAX_POOL_CONNECTIONS = 32
+
+_BOTO3_LOCK = threading.Lock()
+_BOTO3_SESSIONS: Dict[Tuple[Optional[str], ...], boto3.Session] = {}
+_BOTO3_CLIENTS: Dict[Tuple[Optional[str], ...], Any] = {}
+
+
 def get_botocore_config() -> botocore.config.Config:
     return botocore.config.Config(
         retries={"max_attempts": 5},
         connect_timeout=10,
-        max_pool_connections=10,
+        max_pool_connections=MAX_POOL_CONNECTIONS,
         user_agent_extra=f"awsorbit/{__version__}",
     )
 
 
+def _boto3_session_key() -> Tuple[Optional[str], ...]:
+    return (
+        os.environ.get("AWS_REGION") or os.environ.get("AWS_DEFAULT_REGION"),
+        os.environ.get("AWS_PROFILE"),
+        os.environ.get("AWS_ACCESS_KEY_ID"),
+    )
+
+
 def boto3_client(service_name: str) -> boto3.client:
-    return boto3.Session().client(service_name=service_name, config=get_botocore_config())
+    """
+    Returns a boto3 client shared by every thread of the notebook for the current region and credentials.
+
+    Parameters
+    ----------
+    service_name : str
+        Name of the AWS service, e.g. 's3'.
+
+    Returns
+    -------
+    client : boto3.client
+        The cached client, created on first use.
+
+    Example
+    -------
+    >>> from aws_orbit_sdk.common import boto3_client
+    >>> s3 = boto3_client("s3")
+    """
+    key = (service_name,) + _boto3_session_key()
+    client = _BOTO3_CLIENTS.get(key)
+    if client is None:
+        with _BOTO3_LOCK:
+            client = _BOTO3_CLIENTS.get(key)
+            if client is None:
+                session = _BOTO3_SESSIONS.get(key[1:])
+                if session is None:
+                    session = _BOTO3_SESSIONS[key[1:]] = boto3.Session()
+                client = session.client(service_name=service_name, config=get_botocore_config())
+                _BOTO3_CLIENTS[key] = client
+    return client
 
 
 def get_workspace() -> Dict[str, str]:
@@ -165,7 +210,7 @@ def get_scratch_database() -> str:
     >>> from aws_orbit_sdk.common import get_scratch_database
     >>> scratch_database = get_scratch_database()
     """
-    glue = boto3.client("glue")
+    glue = boto3_client("glue")
     response = glue.get_databases()
     workspace = get_workspace()
     scratch_db_name = f"scratch_db_{workspace['env_name']}_{workspace['team_space']}".lower().replace("-", "_")
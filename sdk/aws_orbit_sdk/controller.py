@@ -12,6 +12,7 @@
 #    See the License for the specific language governing permissions and
 #    limitations under the License.
 
+import gzip
 import json
 import logging
 import os
@@ -20,7 +21,6 @@ from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Union, cast
 
-import boto3
 import botocore
 import pandas as pd
 import yaml
@@ -42,7 +42,7 @@ from kubernetes.client import (
     exceptions,
 )
 
-from aws_orbit_sdk.common import get_properties
+from aws_orbit_sdk.common import boto3_client, get_properties, get_workspace, split_s3_path
 
 logging.basicConfig(
     format="%(asctime)s %(levelname)-8s %(message)s",
@@ -64,12 +64,14 @@ APP_LABEL_SELECTOR: List[str] = ["orbit-runner", "emr-spark"]
 
 ORBIT_API_VERSION = "v1"
 ORBIT_API_GROUP = "orbit.aws"
+JOB_ARCHIVE_PREFIX = "orbit/job-archive"
+ORBIT_JOBS_PAGE_SIZE = 200
 
 
 def read_team_manifest_ssm(env_name: str, team_name: str) -> Optional[MANIFEST_TEAM_TYPE]:
     parameter_name: str = f"/orbit/{env_name}/teams/{team_name}/manifest"
     _logger.debug("Trying to read manifest from SSM parameter (%s).", parameter_name)
-    client = boto3.client("ssm")
+    client = boto3_client("ssm")
     try:
         json_str: str = client.get_parameter(Name=parameter_name)["Parameter"]["Value"]
     except client.exceptions.ParameterNotFound:
@@ -89,14 +91,14 @@ def get_parameter(client, name: str) -> Dict[str, Any]:
 
 
 def load_env_context_from_ssm(env_name: str) -> Optional[MANIFEST_TEAM_TYPE]:
-    ssm = boto3.client("ssm")
+    ssm = boto3_client("ssm")
     context_parameter_name: str = f"/orbit/{env_name}/context"
     context = get_parameter(ssm, name=context_parameter_name)
     return cast(MANIFEST_TEAM_TYPE, context)
 
 
 def load_team_context_from_ssm(env_name: str, team_name: str) -> Optional[MANIFEST_TEAM_TYPE]:
-    ssm = boto3.client("ssm")
+    ssm = boto3_client("ssm")
     context_parameter_name: str = f"/orbit/{env_name}/teams/{team_name}/context"
     context = get_parameter(ssm, name=context_parameter_name)
     return cast(MANIFEST_TEAM_TYPE, context)
@@ -318,6 +320,90 @@ def list_running_jobs(namespace: str):
     ]
 
 
+def list_team_queued_jobs():
+    props = get_properties()
+    team_name = props["AWS_ORBIT_TEAM_SPACE"]
+    return list_queued_jobs(team_name)
+
+
+def list_my_queued_jobs():
+    props = get_properties()
+    team_name = props["AWS_ORBIT_TEAM_SPACE"]
+    namespace = os.environ.get("AWS_ORBIT_USER_SPACE", team_name)
+    return list_queued_jobs(namespace)
+
+
+def _list_orbit_jobs(namespace: str, label_selector: str) -> List[Dict[str, Any]]:
+    api = _dynamic_client().resources.get(api_version=ORBIT_API_VERSION, group=ORBIT_API_GROUP, kind="OrbitJob")
+    jobs: List[Dict[str, Any]] = []
+    _continue = None
+    while True:
+        try:
+            res = api.get(
+                namespace=namespace, label_selector=label_selector, limit=ORBIT_JOBS_PAGE_SIZE, _continue=_continue
+            ).to_dict()
+        except ApiException as e:
+            _logger.info("Exception when calling DynamicClient.get() for OrbitJobs: %s\n" % e)
+            raise e
+        jobs.extend(res.get("items", []))
+        _continue = res.get("metadata", {}).get("continue")
+        if not _continue:
+            return jobs
+
+
+def list_queued_jobs(namespace: str):
+    # The operator labels an OrbitJob with its k8sJobType when it creates the k8s Job, queued ones have no label yet
+    queued = [
+        oj
+        for oj in _list_orbit_jobs(namespace=namespace, label_selector="!k8sJobType")
+        if oj.get("status", {}).get("orbitJobOperator", {}).get("jobStatus") == "Queued"
+    ]
+    return sorted(queued, key=lambda oj: oj["status"]["orbitJobOperator"].get("queuePosition") or 0)
+
+
+def list_archived_jobs(
+    namespace: Optional[str] = None, start_date: Optional[str] = None, end_date: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    List OrbitJobs archived by the retention controller before their removal from the cluster.
+
+    Parameters
+    ----------
+    namespace: str
+        Namespace of the archived jobs. Defaults to the current user space.
+    start_date: str
+        Earliest archive date to include (YYYY-MM-DD). Defaults to no lower bound.
+    end_date: str
+        Latest archive date to include (YYYY-MM-DD). Defaults to no upper bound.
+
+    Returns
+    -------
+    jobs: List[Dict[str, Any]]
+        Final OrbitJob status, spec and pod summary of each archived job.
+
+    Example
+    --------
+    >>> from aws_orbit_sdk import controller
+    >>> controller.list_archived_jobs(start_date="2021-06-01")
+    """
+    props = get_properties()
+    team_name = props["AWS_ORBIT_TEAM_SPACE"]
+    namespace = namespace or os.environ.get("AWS_ORBIT_USER_SPACE", team_name)
+    bucket, team_prefix = split_s3_path(get_workspace()["ScratchBucket"])
+    prefix = f"{team_prefix}/{JOB_ARCHIVE_PREFIX}/{namespace}/"
+
+    s3 = boto3_client("s3")
+    jobs: List[Dict[str, Any]] = []
+    for page in s3.get_paginator("list_objects_v2").paginate(Bucket=bucket, Prefix=prefix):
+        for obj in page.get("Contents", []):
+            archive_date = obj["Key"][len(prefix) :].split("/")[0]
+            if (start_date and archive_date < start_date) or (end_date and archive_date > end_date):
+                continue
+            body = gzip.decompress(s3.get_object(Bucket=bucket, Key=obj["Key"])["Body"].read())
+            jobs.extend(json.loads(line) for line in body.decode("utf-8").splitlines() if line)
+    return jobs
+
+
 def list_team_running_pods():
     props = get_properties()
     team_name = props["AWS_ORBIT_TEAM_SPACE"]
@@ -470,7 +556,7 @@ def get_nodegroups(cluster_name: str):
     nodegroups: List[Dict[str, Any]] = []
     _logger.debug(f"Fetching cluster {cluster_name} nodegroups")
     try:
-        response: Dict[str, Any] = boto3.client("lambda").invoke(
+        response: Dict[str, Any] = boto3_client("lambda").invoke(
             FunctionName=f"orbit-{env_name}-eks-service-handler",
             InvocationType="RequestResponse",
             Payload=json.dumps({"cluster_name": cluster_name}).encode("utf-8"),
@@ -484,7 +570,7 @@ def get_nodegroups(cluster_name: str):
         raise ekse
 
     # Get launch template details per nodegroup
-    ec2_client = boto3.client("ec2")
+    ec2_client = boto3_client("ec2")
     for nodegroup in nodegroups:
         try:
             ng = nodegroup
@@ -17,7 +17,14 @@ from pandas import DataFrame
 from sqlalchemy.engine import Engine, create_engine
 from sqlalchemy.orm import sessionmaker
 
-from aws_orbit_sdk.common import AWS_ORBIT_TEAM_SPACE, ORBIT_ENV, get_properties, get_workspace, split_s3_path
+from aws_orbit_sdk.common import (
+    AWS_ORBIT_TEAM_SPACE,
+    ORBIT_ENV,
+    boto3_client,
+    get_properties,
+    get_workspace,
+    split_s3_path,
+)
 from aws_orbit_sdk.glue_catalog import run_crawler
 from aws_orbit_sdk.json import display_json
 from aws_orbit_sdk.magics.database import AthenaMagics, RedshiftMagics
@@ -262,12 +269,12 @@ class RedshiftUtils(DatabaseCommon):
 
         """
 
-        redshift = boto3.client("redshift")
+        redshift = boto3_client("redshift")
 
         if lambdaName:
             # Trying to get user and temp password from cluster
             try:
-                lambda_client = boto3.client("lambda")
+                lambda_client = boto3_client("lambda")
                 response = lambda_client.invoke(
                     InvocationType="RequestResponse",
                     FunctionName=lambdaName,
@@ -395,9 +402,9 @@ class RedshiftUtils(DatabaseCommon):
         ...     s3_location = 's3://bucketname/folder/'
         ... )
         """
-        glue = boto3.client("glue")
+        glue = boto3_client("glue")
         target_s3 = glue.get_database(Name=database_name)["Database"]["LocationUri"]
-        s3 = boto3.client("s3")
+        s3 = boto3_client("s3")
 
         if target_s3 is None or len(target_s3) == 0:
             if s3_location is not None:
@@ -485,7 +492,7 @@ class RedshiftUtils(DatabaseCommon):
         """
 
         props = get_properties()
-        redshift = boto3.client("redshift")
+        redshift = boto3_client("redshift")
         env = props["AWS_ORBIT_ENV"]
         team_space = props["AWS_ORBIT_TEAM_SPACE"]
         cluster_identifier = f"orbit-{env}-{team_space}-{cluster_name}".lower()
@@ -541,7 +548,7 @@ class RedshiftUtils(DatabaseCommon):
         orbit = props["AWS_ORBIT_ENV"]
         team_space = props["AWS_ORBIT_TEAM_SPACE"]
         functionName = "{}-{}-{}".format(orbit, team_space, funcName)
-        lambda_client = boto3.client("lambda")
+        lambda_client = boto3_client("lambda")
 
         invoke_response = lambda_client.invoke(
             FunctionName=functionName,
@@ -585,7 +592,7 @@ class RedshiftUtils(DatabaseCommon):
         props = get_properties()
         env = props["AWS_ORBIT_ENV"]
         team_space = props["AWS_ORBIT_TEAM_SPACE"]
-        redshift = boto3.client("redshift")
+        redshift = boto3_client("redshift")
         namespace = f"orbit-{env}-{team_space}-"
         cluster_name_value = cluster_name.lower()
         cluster_identifier = cluster_name if namespace in cluster_name_value else namespace + cluster_name_value
@@ -648,7 +655,7 @@ class RedshiftUtils(DatabaseCommon):
         using Lambda.list_functions().
         """
 
-        lambda_client = boto3.client("lambda")
+        lambda_client = boto3_client("lambda")
         props = get_properties()
         env_name = props["AWS_ORBIT_ENV"]
         team_space = props["AWS_ORBIT_TEAM_SPACE"]
@@ -706,7 +713,7 @@ class RedshiftUtils(DatabaseCommon):
 
         cluster_def_func = f"orbit-{env}-{team_space}-StartRedshift-{funcName}"
 
-        lambda_client = boto3.client("lambda")
+        lambda_client = boto3_client("lambda")
         clusterArgs["cluster_name"] = cluster_name
         invoke_response = lambda_client.invoke(
             FunctionName=cluster_def_func,
@@ -742,7 +749,7 @@ class RedshiftUtils(DatabaseCommon):
 
         cluster_args = {"cluster_name": cluster_identifier, "Nodes": number_of_nodes, "NodeType": node_type}
 
-        lambda_client = boto3.client("lambda")
+        lambda_client = boto3_client("lambda")
         invoke_response = lambda_client.invoke(
             FunctionName=cluster_def_func,
             Payload=bytes(json.dumps(cluster_args), "utf-8"),
@@ -839,8 +846,8 @@ class RedshiftUtils(DatabaseCommon):
         >>> RedshiftUtils.getCatalog(schema_name="my_schema",table_name="table1")
         """
 
-        glue = boto3.client("glue")
-        s3 = boto3.client("s3")
+        glue = boto3_client("glue")
+        s3 = boto3_client("s3")
         sql = """
             SELECT cols.schemaname, cols.tablename, cols.columnname, cols.external_type, cols.columnnum,
                 tables.location, schemas.databasename, tables.parameters
@@ -914,7 +921,7 @@ class RedshiftUtils(DatabaseCommon):
 
         """
 
-        redshift = boto3.client("redshift")
+        redshift = boto3_client("redshift")
         props = get_properties()
         if cluster_id is None:
             redshift_cluster_search_tag = props["AWS_ORBIT_ENV"] + "-" + props["AWS_ORBIT_TEAM_SPACE"]
@@ -1042,7 +1049,7 @@ class AthenaUtils(DatabaseCommon):
         >>> AthenaUtils.getCatalog(database="my_database")
         """
 
-        glue = boto3.client("glue")
+        glue = boto3_client("glue")
         schemas = dict()
         response = glue.get_tables(DatabaseName=database, MaxResults=1000)
         for t in response["TableList"]:
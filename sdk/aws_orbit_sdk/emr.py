@@ -8,7 +8,14 @@ from typing import Any, Dict, Iterator, List, Mapping, Optional, Tuple, cast
 import boto3
 import requests
 
-from aws_orbit_sdk.common import AWS_ORBIT_TEAM_SPACE, ORBIT_ENV, ORBIT_PRODUCT_KEY, ORBIT_PRODUCT_NAME, get_properties
+from aws_orbit_sdk.common import (
+    AWS_ORBIT_TEAM_SPACE,
+    ORBIT_ENV,
+    ORBIT_PRODUCT_KEY,
+    ORBIT_PRODUCT_NAME,
+    boto3_client,
+    get_properties,
+)
 
 logging.basicConfig(
     format="%(asctime)s %(levelname)-8s %(message)s",
@@ -21,7 +28,7 @@ SSM_PARAMETER_PREFIX = "/emr_launch/emr_launch_functions"
 
 
 def get_virtual_cluster_id() -> str:
-    emr = boto3.client("emr-containers")
+    emr = boto3_client("emr-containers")
     props = get_properties()
     env_name = props["AWS_ORBIT_ENV"]
     team_space = props["AWS_ORBIT_TEAM_SPACE"]
@@ -57,7 +64,7 @@ def stop_cluster(cluster_id: str) -> None:
     >>> sparkConnection.stop_cluster(cluster_id=cluster_id)
     """
 
-    emr = boto3.client("emr")
+    emr = boto3_client("emr")
 
     response = emr.terminate_job_flows(JobFlowIds=[cluster_id])
     logger.info("stopping cluster %s", cluster_id)
@@ -116,7 +123,7 @@ def connect_to_spark(
         else:
             raise Exception("One of `cluster_name` or `clusterArgs['ClusterName']` is required")
 
-    emr = boto3.client("emr")
+    emr = boto3_client("emr")
     ClusterStates = ["STARTING", "BOOTSTRAPPING", "RUNNING", "WAITING"]
     res = emr.list_clusters(ClusterStates=ClusterStates)
     while True:
@@ -251,7 +258,7 @@ def get_emr_step_function_error(execution_arn: str) -> None:
     None
         None.
     """
-    sfn = boto3.client("stepfunctions")
+    sfn = boto3_client("stepfunctions")
     logger.error(f"Step function failed launching EMR, execution_arn: {execution_arn}")
     response = sfn.get_execution_history(
         executionArn=execution_arn,
@@ -275,7 +282,7 @@ def _start_and_wait_for_emr(
     """
     Start EMR and wait for cluster to begin running as well as get any execution errors.
     """
-    sfn = boto3.client("stepfunctions")
+    sfn = boto3_client("stepfunctions")
     logger.info(f"entering _start_and_wait_for_emr() {cluster_name}")
 
     emr_functions = _get_emr_functions()
@@ -330,7 +337,7 @@ def _get_functions(namespace: Optional[str] = "default", next_token: Optional[st
     params = {"Path": f"{SSM_PARAMETER_PREFIX}/{namespace}/"}
     if next_token:
         params["NextToken"] = next_token
-    result = boto3.client("ssm").get_parameters_by_path(**params)
+    result = boto3_client("ssm").get_parameters_by_path(**params)
 
     functions = {"EMRLaunchFunctions": [json.loads(p["Value"]) for p in result["Parameters"]]}
     if "NextToken" in result:
@@ -451,7 +458,7 @@ def get_cluster_info(cluster_id: str) -> Dict[str, Dict[str, str]]:
     >>> import aws.utils.notebooks.spark.emr as sparkConnection
     >>> get_cluster_info(cluster_id)
     """
-    emr = boto3.client("emr")
+    emr = boto3_client("emr")
     info = {}
     info["MASTER"] = emr.list_instances(ClusterId=cluster_id, InstanceGroupTypes=["MASTER"])
     info["CORE"] = emr.list_instances(ClusterId=cluster_id, InstanceGroupTypes=["CORE"])
@@ -534,7 +541,7 @@ def spark_submit(job: Dict[str, Any]) -> Dict[str, Any]:
 
     module = os.path.join(s3WorkspaceDir, module)
 
-    emr = boto3.client("emr")
+    emr = boto3_client("emr")
     args = [
         "/usr/bin/spark-submit",
         "--verbose",
@@ -588,7 +595,7 @@ def get_team_clusters(cluster_id: Optional[str] = None) -> Dict[str, Dict[str, s
     >>> sparkConnection.get_team_clusters()
     """
 
-    emr = boto3.client("emr")
+    emr = boto3_client("emr")
     props = get_properties()
     if cluster_id is None:
         clusters = emr.list_clusters(ClusterStates=["STARTING", "BOOTSTRAPPING", "RUNNING", "WAITING"])
@@ -3,9 +3,7 @@ import logging
 import time
 from typing import Any, Dict, List, Optional
 
-import boto3
-
-from aws_orbit_sdk.common import get_workspace
+from aws_orbit_sdk.common import boto3_client, get_workspace
 
 logging.basicConfig(
     format="%(asctime)s %(levelname)-8s %(message)s",
@@ -34,7 +32,7 @@ def delete_crawler(crawler: str) -> None:
     >>> import aws_orbit_sdk.glue_catalog as glue
     >>> delete_crawler(crawler= "crawler-name")
     """
-    glue = boto3.client("glue")
+    glue = boto3_client("glue")
     glue.delete_crawler(Name=crawler)
     logger.info("existing crawler deleted")
 
@@ -65,7 +63,7 @@ def run_crawler(crawler: str, target_db: str, target_path: str, wait: Optional[A
     >>> response = glue.run_crawler(crawler, target_db, target_path, wait=True)
     """
     role = get_workspace()["EksPodRoleArn"]
-    glue = boto3.client("glue")
+    glue = boto3_client("glue")
     try:
         glue.delete_crawler(Name=crawler)
         logger.info("existing crawler deleted")
@@ -131,7 +129,7 @@ def update_teamspace_lakeformation_permissions(db_name: Optional[str] = "*") ->
     >>> glue.update_teamspace_lakeformation_permissions(database_name)
     """
     workspace = get_workspace()
-    lambda_client = boto3.client("lambda")
+    lambda_client = boto3_client("lambda")
 
     inp = {
         "env_name": workspace["env_name"],
@@ -212,7 +210,7 @@ def tag_columns(
     ...                        key='security-level',
     ...                        table_tag_value='sec-4')
     """
-    glue = boto3.client("glue")
+    glue = boto3_client("glue")
     response = glue.get_table(DatabaseName=database, Name=table_name)
     update_table = response["Table"]
     if "Parameters" not in update_table["StorageDescriptor"]:
@@ -273,7 +271,7 @@ def untag_columns(
     >>> import aws_orbit_sdk.glue_catalog as glue
     >>> orbit_catalog_api.untag_columns(database='secured_database',key='security-level')
     """
-    glue = boto3.client("glue")
+    glue = boto3_client("glue")
     table_names = []
     if table_name is not None:
         table_names = [table_name]
@@ -336,7 +334,7 @@ def getCatalogAsDict(database: Optional[str] = None) -> List[Dict[str, Any]]:
     >>> from aws.utils.notebooks.json import display_json
     >>> AthenaUtils.getCatalog(database="my_database")
     """
-    glue = boto3.client("glue")
+    glue = boto3_client("glue")
     schemas: List[Dict[str, Any]] = []
     response = glue.get_databases()
     key: int = 0
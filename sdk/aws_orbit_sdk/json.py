@@ -8,11 +8,10 @@ from pathlib import Path
 from tempfile import mkstemp
 from typing import Any, Dict, List, Optional, Union
 
-import boto3
 import IPython.display
 from IPython.display import JSON
 
-from aws_orbit_sdk.common import split_s3_path
+from aws_orbit_sdk.common import boto3_client, split_s3_path
 
 logging.basicConfig(
     format="%(asctime)s %(levelname)-8s %(message)s",
@@ -74,7 +73,7 @@ def write_json(doc: Any, path: str) -> None:
     >>> write_json(doc=data, path='testbucket123')
     """
 
-    s3 = boto3.client("s3")
+    s3 = boto3_client("s3")
     if path.startswith("s3://"):
         (bucket, key) = split_s3_path(path)
         s3.put_object(Body=doc, Bucket=bucket, Key=key)
@@ -4,11 +4,9 @@ import logging
 import time
 from typing import Any, Dict, List
 
-import boto3
-
 import aws_orbit_sdk.controller as controller
 import aws_orbit_sdk.emr as sparkConnection
-from aws_orbit_sdk.common import get_workspace
+from aws_orbit_sdk.common import boto3_client, get_workspace
 
 # Initialize parameters
 logging.basicConfig(
@@ -18,9 +16,9 @@ logging.basicConfig(
 )
 
 logger = logging.getLogger()
-glue = boto3.client("glue")
-sns = boto3.client("sns")
-s3 = boto3.client("s3")
+glue = boto3_client("glue")
+sns = boto3_client("sns")
+s3 = boto3_client("s3")
 
 # Adding output path and other parameters for the reports
 notebook_name = "Automated-Data-Transformations.ipynb"